@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Rewrite legacy ISO-string timestamps as BSON dates (see
+services/datetime_fields.py for the list of fields).
+
+Usage:
+    MONGO_URL=mongodb://... DB_NAME=dogefood_lab_production python3 scripts/normalize_datetimes.py
+
+    Add --dry-run to count what it would convert without changing anything.
+
+Safe to re-run: only string values are touched. The server also runs this
+once on boot and records it in the `migrations` collection; running it by
+hand afterwards picks up anything written in between.
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+
+from services import datetime_fields  # noqa: E402
+
+MONGO_URL = os.environ.get("MONGO_URL", "")
+DB_NAME = os.environ.get("DB_NAME", "dogefood_lab_production")
+DRY_RUN = "--dry-run" in sys.argv
+
+if not MONGO_URL:
+    sys.exit("Set MONGO_URL (and DB_NAME if not the production default) before running.")
+
+
+async def main():
+    db = AsyncIOMotorClient(MONGO_URL)[DB_NAME]
+    print(f"{'[dry-run] ' if DRY_RUN else ''}Normalizing datetimes in {DB_NAME}...")
+    report = await datetime_fields.migrate(db, dry_run=DRY_RUN)
+    if not report:
+        print("Nothing to convert — every temporal field is already a BSON date.")
+    for collection, counts in report.items():
+        for field, count in counts.items():
+            print(f"  {collection}.{field}: {count}")
+    if not DRY_RUN:
+        await datetime_fields.ensure_indexes(db)
+        print("Indexes ensured.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,6 +1,7 @@
 from fastapi import FastAPI, APIRouter, HTTPException, BackgroundTasks, Request, Query, Depends, Header
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response, StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
@@ -16,7 +17,8 @@ import json
 import urllib.parse
 import random
 import asyncio
-from telegram import Bot
+import time
+from bson import ObjectId
 import httpx  # For Firebase verification
 import feedparser  # Lab Feed RSS ingestion
 from eth_account import Account
@@ -58,66 +60,16 @@ async def find_player_by_address(address: str):
     """Find player by address, handling Telegram TG_/tg_ case mismatch
     and historical duplicate documents.
 
-    For Telegram users, historical code paths created up to THREE separate
-    player documents for the same user:
-      A1) {address: "tg_<id>", telegram_id: null}    (lowercase, legacy)
-      A2) {address: "TG_<id>", telegram_id: null}    (UPPERCASE, modern)
-      B ) {address: null,     telegram_id: <int>}    (Telegram-auth doc)
-
-    Because the previous lookup returned whichever doc matched FIRST in the
-    fallback chain, a player's gameplay points (stored on one doc) could be
-    permanently invisible to other endpoints that happened to find a
-    different doc first.
-
-    Fix: collect every candidate document and return the canonical one —
-    defined as the doc with the most points (tie-breaker: most treats).
-    This guarantees endpoints all converge on the same record regardless
-    of the caller's case/prefix style.
+    For Telegram users, historical code paths created up to three separate
+    player documents for the same user (tg_<id>, TG_<id>, telegram_id-only).
+    The canonical one — most points, then most treats, then most recent
+    last_active — is resolved once and memoized in the player_aliases index
+    (see services/player_identity.py), so this is a single point read on
+    the hot path instead of a multi-document $or scan.
     """
     if not address:
         return None
-
-    # Non-Telegram (wallet / guest / 0x… / etc.): single exact lookup
-    if not address.lower().startswith("tg_"):
-        return await db.players.find_one({"address": address}, {"_id": 0})
-
-    tg_id_str = address[3:]
-    candidates = []
-    seen_ids = set()
-
-    def _add(p):
-        if p and p.get("id") not in seen_ids:
-            seen_ids.add(p.get("id"))
-            candidates.append(p)
-
-    # Gather every variant in parallel
-    or_clauses = [
-        {"address": address},
-        {"address": f"TG_{tg_id_str}"},
-        {"address": f"tg_{tg_id_str}"},
-    ]
-    try:
-        or_clauses.append({"telegram_id": int(tg_id_str)})
-    except (ValueError, TypeError):
-        pass
-
-    async for doc in db.players.find({"$or": or_clauses}, {"_id": 0}):
-        _add(doc)
-
-    if not candidates:
-        return None
-
-    # Pick the canonical document: highest points, then most treats created,
-    # then most recent last_active. This is the doc that has actually been
-    # receiving gameplay updates.
-    def _rank(d):
-        return (
-            int(d.get("points") or 0),
-            len(d.get("created_treats") or []),
-            str(d.get("last_active") or ""),
-        )
-
-    return max(candidates, key=_rank)
+    return await player_identity.resolve(address)
 
 
 
@@ -222,6 +174,11 @@ from services.merkle_tree import MerkleTreeGenerator
 from services.treat_game_engine import TreatGameEngine, TreatRarity
 from services.ingredient_system import IngredientSystem
 from services.season_manager import SeasonManager
+from services import datetime_fields, leaderboard_view, response_cache, treat_simulator
+from services.player_identity import PlayerIdentityIndex
+from services.auto_mixer_engine import AutoMixerEngine, AutoMixScheduler
+from services.notification_dispatcher import NotificationDispatcher, due_at_for
+from services.brew_stream import BrewStreamHub, format_sse, KEEPALIVE_SECONDS as BREW_STREAM_KEEPALIVE_SECONDS
 
 
 # Firebase Configuration - MUST be set via environment variables in production
@@ -306,6 +263,8 @@ async def verify_admin(
 game_engine = TreatGameEngine(GAME_SECRET_KEY)
 ingredient_system = IngredientSystem()
 season_manager = SeasonManager(db)
+player_identity = PlayerIdentityIndex(db)
+brew_stream = BrewStreamHub(db)
 
 
 # Background task functions
@@ -322,6 +281,65 @@ async def award_treat_creation_points(player_address: str, treat_metadata: dict)
         logger.error(f"Error awarding treat creation points: {e}")
 
 
+async def refresh_leaderboard_entry(player_address: str, collected: bool = False):
+    """Push a player's new points onto the materialized leaderboard. Non-fatal —
+    the periodic reconcile in leaderboard_view catches anything missed here."""
+    try:
+        await leaderboard_view.sync_player(db, player_address, collected=collected)
+    except Exception as e:
+        logger.warning(f"Leaderboard entry refresh skipped for {player_address}: {e}")
+
+
+async def after_treat_insert(treat_doc: dict):
+    """Bookkeeping every treat insert shares: the creator's anti-cheat
+    sliding window, season_daily_rollups (non-fatal — the nightly
+    compaction rebuilds each finished day from raw treats), the activity
+    cache and live brew stream subscribers."""
+    response_cache.invalidate("activity_recent")
+    await asyncio.gather(
+        anti_cheat_system.record_treat_creation(
+            treat_doc.get("creator_address"),
+            treat_doc.get("created_at"),
+            treat_doc.get("ingredients"),
+        ),
+        _record_season_treat(treat_doc),
+    )
+    brew_stream.treat_created(treat_doc)
+
+
+async def after_treats_insert(treat_docs: list):
+    """after_treat_insert() for a batch of inserted treats (auto-mixer), one
+    bulk write per collection."""
+    if not treat_docs:
+        return
+    response_cache.invalidate("activity_recent")
+    await asyncio.gather(
+        anti_cheat_system.record_treat_creations(treat_docs),
+        _record_season_treats(treat_docs),
+    )
+    for treat_doc in treat_docs:
+        brew_stream.treat_created(treat_doc)
+
+
+async def _record_season_treats(treat_docs: list):
+    try:
+        await season_manager.record_treats(treat_docs)
+    except Exception as e:
+        logger.warning(f"Season rollup skipped for {len(treat_docs)} treats: {e}")
+
+
+async def _record_season_treat(treat_doc: dict):
+    try:
+        await season_manager.record_treat(
+            treat_doc.get("creator_address"),
+            treat_doc.get("rarity"),
+            treat_doc.get("ingredients"),
+            treat_doc.get("created_at"),
+        )
+    except Exception as e:
+        logger.warning(f"Season rollup skipped for treat {treat_doc.get('id')}: {e}")
+
+
 # Create the main app without a prefix
 app = FastAPI()
 
@@ -1135,6 +1153,7 @@ async def nowpayments_ipn_webhook(request: Request):
                 "activated_at": now,
             }}
         )
+        auto_mix_scheduler.track({**subscription, "status": "active", "subscription_end": now + timedelta(days=30)})
         logger.info(f"NOWPayments: activated auto-mixer subscription for {subscription['player_address']} (order {order_id})")
         return {"received": True, "granted": True}
 
@@ -1345,6 +1364,8 @@ async def apply_referral(data: ApplyReferralRequest):
             "$set": {"referral_used": True, "referred_by": referrer_address, "referred_by_code": referral_code}
         }
     )
+    await refresh_leaderboard_entry(referrer_address)
+    await refresh_leaderboard_entry(new_player_address_key)
 
     logger.info(f"✅ Referral applied: {referrer_address} referred {new_address} | +{REFERRAL_POINTS_REFERRER} / +{REFERRAL_POINTS_NEW_PLAYER} pts")
 
@@ -1452,6 +1473,7 @@ async def update_player_progress(progress: PlayerProgress):
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Player not found")
+    await refresh_leaderboard_entry(progress.address)
     
     return {"message": "Progress updated successfully"}
 
@@ -1490,6 +1512,7 @@ async def happy_hour_status():
 
 
 @api_router.get("/activity/recent")
+@response_cache.cached("activity_recent", ttl=5, maxsize=32)
 async def get_recent_activity(limit: int = 20):
     """Get recent global activity: treat creations + spin wheel outcomes + arena rewards"""
     try:
@@ -1525,7 +1548,7 @@ async def get_recent_activity(limit: int = 20):
         # ── 2. Spin wheel + arena events from activity_feed ───────────────
         # Only show events from the last 48 hours to prevent old arena
         # settlement cycles accumulating and flooding the feed.
-        cutoff_48h = (now - timedelta(hours=48)).isoformat()
+        cutoff_48h = now - timedelta(hours=48)
         feed_events = await db.activity_feed.find(
             {"created_at": {"$gte": cutoff_48h}}, {"_id": 0}
         ).sort("created_at", -1).limit(limit).to_list(limit)
@@ -1570,6 +1593,7 @@ async def get_recent_activity(limit: int = 20):
 
 
 @api_router.get("/chat/messages")
+@response_cache.cached("chat_messages", ttl=3, maxsize=32)
 async def get_chat_messages(limit: int = 50):
     """Get recent chat messages for the live feed"""
     try:
@@ -1644,6 +1668,7 @@ async def send_chat_message(data: dict):
 
 
         result = await db.chat_messages.insert_one(doc)
+        response_cache.invalidate("chat_messages")
 
 
         return {
@@ -2007,7 +2032,9 @@ async def create_treat(treat_data: TreatCreate, background_tasks: BackgroundTask
     )
     
     # Add treat to database
-    await db.treats.insert_one(treat.dict())
+    treat_doc = treat.dict()
+    await db.treats.insert_one(treat_doc)
+    await after_treat_insert(treat_doc)
     
     # Add treat ID to player's created_treats list. Defensive: if no player
     # document exists yet for this address (e.g. registration hasn't landed
@@ -2029,7 +2056,7 @@ async def create_treat(treat_data: TreatCreate, background_tasks: BackgroundTask
             "address": treat_data.creator_address,
             "nickname": f"Scientist {short_addr}",
             "created_treats": [treat.id],
-            "last_active": datetime.now(timezone.utc).isoformat(),
+            "last_active": datetime.now(timezone.utc),
         })
         logger.warning(f"Created missing player doc on first treat for {treat_data.creator_address} (registration should have created this already)")
     
@@ -2233,7 +2260,7 @@ async def update_profile_image(address: str, data: dict):
         if player:
             await db.players.update_one(
                 {"id": player.get("id")},
-                {"$set": {"profile_image": image_data, "last_active": datetime.now(timezone.utc).isoformat()}}
+                {"$set": {"profile_image": image_data, "last_active": datetime.now(timezone.utc)}}
             )
         else:
             # No existing player matched at all — create a new wallet-style record.
@@ -2243,8 +2270,8 @@ async def update_profile_image(address: str, data: dict):
                 "id": str(uuid.uuid4()),
                 "address": address,
                 "profile_image": image_data,
-                "created_at": datetime.now(timezone.utc).isoformat(),
-                "last_active": datetime.now(timezone.utc).isoformat()
+                "created_at": datetime.now(timezone.utc),
+                "last_active": datetime.now(timezone.utc)
             })
         
         return {"success": True, "message": "Profile image updated"}
@@ -2289,6 +2316,7 @@ async def credit_existing_nft_holders():
                     "$inc": {"points": 500}
                 }
             )
+            await refresh_leaderboard_entry(address)
             
             credited_count += 1
             credited_players.append({
@@ -2378,6 +2406,7 @@ async def credit_single_nft_holder(address: str):
                 "$inc": {"points": 500}
             }
         )
+        await refresh_leaderboard_entry(address)
         
         logger.info(f"🌟 Manually credited VIP bonus to {address}: {current_points} -> {current_points + 500}")
         
@@ -2582,6 +2611,7 @@ async def verify_nft_on_blockchain(address: str):
                             "$inc": {"points": 500}
                         }
                     )
+                    await refresh_leaderboard_entry(address)
                     logger.info(f"🌟 DogeOS verified & credited: {address}")
                     return {
                         "address": address,
@@ -2702,6 +2732,7 @@ async def verify_all_nft_holders_blockchain():
                                     "$inc": {"points": 500}
                                 }
                             )
+                            await refresh_leaderboard_entry(address)
                             results["newly_credited"].append({
                                 "address": address,
                                 "nickname": player.get("nickname"),
@@ -3111,6 +3142,7 @@ async def scan_and_credit_all_nft_holders():
                                 "$inc": {"points": 500}
                             }
                         )
+                        await refresh_leaderboard_entry(player["address"])
                         credited.append({
                             "address": holder_address,
                             "nickname": player.get("nickname"),
@@ -3191,7 +3223,9 @@ async def check_treat_timer(treat_id: str):
 
 @api_router.get("/treats/{address}/brewing")
 async def get_brewing_treats(address: str):
-    """Get all treats currently brewing for a player with real-time timer data"""
+    """Get all treats currently brewing for a player with real-time timer data.
+    Read-only: the brew completion sweep (services/brew_stream.py) owns the
+    brewing -> ready transition; a treat past ready_at is reported as ready."""
     try:
         brewing_treats = await db.treats.find({
             "creator_address": address,
@@ -3208,11 +3242,7 @@ async def get_brewing_treats(address: str):
                 ready_at = parse_utc_datetime(ready_at)
                 
                 if now >= ready_at:
-                    # Auto-update to ready
-                    await db.treats.update_one(
-                        {"id": treat["id"]},
-                        {"$set": {"brewing_status": "ready"}}
-                    )
+                    # Due for the next completion sweep
                     treat["brewing_status"] = "ready"
                     treat["time_remaining"] = 0
                 else:
@@ -3254,7 +3284,8 @@ def format_time_remaining(seconds: int) -> str:
 async def get_active_treats_with_timer(address: str):
     """
     Get all active treats for a player with real-time countdown timers.
-    This endpoint is optimized for frontend polling.
+    This endpoint is optimized for frontend polling. Read-only — see
+    get_brewing_treats.
     """
     try:
         now = datetime.now(timezone.utc)
@@ -3307,12 +3338,8 @@ async def get_active_treats_with_timer(address: str):
                 is_ready = True
                 progress = 100
             
-            # Update status if ready
+            # Due for the next completion sweep
             if is_ready and treat.get("brewing_status") == "brewing":
-                await db.treats.update_one(
-                    {"id": treat["id"]},
-                    {"$set": {"brewing_status": "ready"}}
-                )
                 treat["brewing_status"] = "ready"
             
             # Remove MongoDB _id
@@ -3341,6 +3368,37 @@ async def get_active_treats_with_timer(address: str):
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
+@api_router.get("/treats/{address}/stream")
+async def stream_brewing_treats(address: str, request: Request):
+    """
+    Server-Sent Events feed of a player's brewing state: one `snapshot`
+    event (same payload as /treats/{address}/active), then `treat` events
+    for new treats and `ready` events as timers complete, with keep-alive
+    comments in between. Replaces polling /active for countdowns.
+    """
+    async def events():
+        queue = brew_stream.subscribe(address)
+        try:
+            snapshot = await get_active_treats_with_timer(address)
+            brew_stream.schedule_treats(snapshot["treats"])
+            yield format_sse("snapshot", snapshot)
+            while not await request.is_disconnected():
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), timeout=BREW_STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event, data)
+        finally:
+            brew_stream.unsubscribe(address, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @api_router.post("/treats/{treat_id}/collect")
 async def collect_treat(treat_id: str, data: dict):
     """
@@ -3394,7 +3452,7 @@ async def collect_treat(treat_id: str, data: dict):
                 "address": player_address,
                 "nickname": f"Scientist {short_addr}",
                 "created_treats": [],
-                "last_active": now.isoformat(),
+                "last_active": now,
             }
             await db.players.insert_one(new_player_doc)
             player = new_player_doc
@@ -3444,13 +3502,13 @@ async def collect_treat(treat_id: str, data: dict):
             collect_heat_id = await arena_system.get_active_heat_event_id(db)
             if collect_heat_id == "golden_hour":
                 original_pts = final_points_reward
-                final_points_reward = final_points_reward * 2
+                final_points_reward = final_points_reward * arena_system.HEAT_COLLECT_POINTS_MULT["golden_hour"]
                 bonus_details["golden_hour_bonus"] = final_points_reward - original_pts
                 logger.info(f"✨ Heat: Golden Hour — points doubled: {original_pts} → {final_points_reward}")
             elif collect_heat_id == "crit_state":
                 # Critical Mix: +50% points bonus on collect in addition to higher rarity at brew
                 original_pts = final_points_reward
-                final_points_reward = int(final_points_reward * 1.5)
+                final_points_reward = int(final_points_reward * arena_system.HEAT_COLLECT_POINTS_MULT["crit_state"])
                 bonus_details["crit_state_bonus"] = final_points_reward - original_pts
                 logger.info(f"✨ Heat: Critical Mix — +50% points: {original_pts} → {final_points_reward}")
         except Exception as _heat_err:
@@ -3461,7 +3519,7 @@ async def collect_treat(treat_id: str, data: dict):
             {"id": treat_id},
             {"$set": {
                 "brewing_status": "collected",
-                "collected_at": now.isoformat(),
+                "collected_at": now,
                 "final_points_awarded": final_points_reward,
                 "final_xp_awarded": final_xp_reward,
                 "character_bonuses_applied": bonus_details
@@ -3496,13 +3554,14 @@ async def collect_treat(treat_id: str, data: dict):
                 {"$set": {
                     "experience": new_xp,
                     "level": new_level,
-                    "last_active": now.isoformat()
+                    "last_active": now
                 },
                 "$inc": {"points": final_points_reward}}
             )
             
             # Run both updates in parallel
             await asyncio.gather(treat_update_task, player_update_task)
+            await refresh_leaderboard_entry(player.get("address") or player_address, collected=True)
 
             # Credit arena leaderboard score (non-fatal — never block a collect)
             try:
@@ -3647,6 +3706,9 @@ async def _merge_player_into_address(guest_doc: dict, wallet_address: str, dry_r
         )
         applied[coll_name] = result.modified_count
 
+    await player_identity.forget(old_address, wallet_address)
+    await refresh_leaderboard_entry(wallet_address)
+
     plan["dry_run"] = False
     plan["applied"] = applied
     plan["status"] = "merged"
@@ -3896,6 +3958,7 @@ async def merge_duplicate_telegram_players(admin_key: str = None, dry_run: bool
                     {"creator_address": {"$in": variants}},
                     {"$set": {"creator_address": canonical_address}}
                 )
+                await player_identity.forget(canonical_address, *loser_addresses)
                 merged_summary[-1]["status"] = "merged"
             except Exception as merge_exc:
                 merged_summary[-1]["status"] = f"failed: {type(merge_exc).__name__}: {str(merge_exc)[:300]}"
@@ -3970,175 +4033,85 @@ async def normalize_telegram_creator_addresses(admin_key: str = None, dry_run: b
     return summary
 
 
-# Leaderboard Routes
-@api_router.get("/leaderboard")
-async def get_leaderboard(limit: int = 200):
-    # Only include active players who collected treats
-    active_creator_addresses = await db.treats.distinct(
-        "creator_address",
-        {
-            "brewing_status": "collected",
-            "creator_address": {"$nin": [None, "", "GUEST_USER"]}
-        }
-    )
+# Character data mapping for leaderboard rows
+LEADERBOARD_CHARACTER_DATA = {
+    'max': {
+        'name': 'Shiba Scientist Max',
+        'image': 'https://customer-assets.emergentagent.com/job_50ed16dc-caaa-4db1-ad7d-d26be77125c0/artifacts/5thty2tp_20250921_1510_Doge%20Scientist%20Trio_simple_compose_01k5p68s01e1p8f81hk4dvm5tm.png'
+    },
+    'rex': {
+        'name': 'Shiba Scientist Rex',
+        'image': 'https://customer-assets.emergentagent.com/job_50ed16dc-caaa-4db1-ad7d-d26be77125c0/artifacts/w3y5oh69_assets_task_01k5p6sq20fh68gb4hjbs9271e_1758460753_img_0.webp'
+    },
+    'luna': {
+        'name': 'Shiba Scientist Luna',
+        'image': 'https://customer-assets.emergentagent.com/job_50ed16dc-caaa-4db1-ad7d-d26be77125c0/artifacts/m1k3hm3c_assets_task_01k5p7arcvf6jt34pk82yke1sh_1758461571_img_0.webp'
+    }
+}
 
 
-    if not active_creator_addresses:
-        # Season just started — no treats collected yet, show all registered players
-        query = {
-            "$or": [
-                {"address": {"$nin": [None, "", "GUEST_USER"]}},
-                {"telegram_id": {"$exists": True, "$ne": None}}
-            ]
-        }
-    else:
-        # Split creator addresses into wallet addresses and tg_ telegram addresses
-        tg_ids = []
-        wallet_addresses = []
-        tg_address_variants = []  # both TG_<id> and tg_<id> for legacy duplicate docs
-        for addr in active_creator_addresses:
-            if addr and addr.lower().startswith("tg_"):
-                raw_id = addr[3:]
-                tg_address_variants.append(f"TG_{raw_id}")
-                tg_address_variants.append(f"tg_{raw_id}")
-                try:
-                    tg_ids.append(int(raw_id))
-                except (ValueError, TypeError):
-                    pass
-            elif addr:
-                wallet_addresses.append(addr)
-
-        # Build a query that matches both wallet players and telegram players.
-        # IMPORTANT: include TG_/tg_ address variants because historical
-        # gameplay points live on those docs (not the telegram_id-only doc).
-        or_clauses = []
-        if wallet_addresses:
-            or_clauses.append({"address": {"$in": wallet_addresses}})
-        if tg_address_variants:
-            or_clauses.append({"address": {"$in": tg_address_variants}})
-        if tg_ids:
-            or_clauses.append({"telegram_id": {"$in": tg_ids}})
-
-        if or_clauses:
-            query = {"$or": or_clauses} if len(or_clauses) > 1 else or_clauses[0]
-        else:
-            query = {"address": {"$in": active_creator_addresses}}
-    
-    projection = {
-        "_id": 0,
-        "address": 1,
-        "nickname": 1,
-        "telegram_first_name": 1,
-        "telegram_id": 1,
-        "guest_id": 1,
-        "points": 1,
-        "level": 1,
-        "is_nft_holder": 1,
-        "is_dogeonews_holder": 1,
-        "is_vip": 1,
-        "selected_character": 1,
-        "vip_bonus_claimed": 1,
+def _format_leaderboard_entry(player: dict, rank: int) -> dict:
+    char_id = player.get("selected_character")
+    char_info = LEADERBOARD_CHARACTER_DATA.get(char_id, {})
+    return {
+        "address": player["address"],
+        "nickname": player["nickname"],
+        "points": player.get("points", 0),
+        "level": player.get("level", 1),
+        "is_nft_holder": player.get("is_nft_holder", False),
+        "is_dogeonews_holder": player.get("is_dogeonews_holder", False),
+        "is_vip": player.get("is_vip", False),
+        "rank": rank,
+        "selected_character": char_id,
+        "character_name": char_info.get('name'),
+        "character_image": char_info.get('image')
     }
-    
-    top_players = await db.players.find(query, projection).sort([("points", -1), ("level", -1)]).limit(limit + 20).to_list(limit + 20)
-
-    # Dedupe duplicate Telegram docs: a single TG user can have up to three
-    # records in the DB (tg_<id>, TG_<id>, telegram_id-only). Keep the one
-    # with the highest points so the leaderboard never shows an "empty"
-    # duplicate. Wallet users are not deduped (address is a stable id).
-    deduped = []
-    seen_tg = {}
-    for p in top_players:
-        addr = p.get("address") or ""
-        tg_id_val = p.get("telegram_id")
-        tg_key = None
-        if tg_id_val is not None:
-            tg_key = int(tg_id_val)
-        elif addr.lower().startswith("tg_"):
-            try:
-                tg_key = int(addr[3:])
-            except (ValueError, TypeError):
-                tg_key = None
 
-        if tg_key is None:
-            deduped.append(p)
-            continue
 
-        existing = seen_tg.get(tg_key)
-        if existing is None:
-            seen_tg[tg_key] = p
-        else:
-            # Keep whichever doc has more points (tie → more level → has address)
-            def _rank(d):
-                return (
-                    int(d.get("points") or 0),
-                    int(d.get("level") or 0),
-                    1 if d.get("address") else 0,
-                )
-            if _rank(p) > _rank(existing):
-                # Carry over telegram identity fields from the loser if missing
-                for k in ("telegram_id", "telegram_first_name", "nickname"):
-                    if not p.get(k) and existing.get(k):
-                        p[k] = existing[k]
-                seen_tg[tg_key] = p
-            else:
-                for k in ("telegram_id", "telegram_first_name", "nickname"):
-                    if not existing.get(k) and p.get(k):
-                        existing[k] = p[k]
-
-    # Re-assemble: wallet players in original order + best TG doc per user
-    deduped.extend(seen_tg.values())
-    deduped.sort(key=lambda d: (-(d.get("points") or 0), -(d.get("level") or 0)))
-    top_players = deduped
-    
-    # Character data mapping
-    character_data = {
-        'max': {
-            'name': 'Shiba Scientist Max',
-            'image': 'https://customer-assets.emergentagent.com/job_50ed16dc-caaa-4db1-ad7d-d26be77125c0/artifacts/5thty2tp_20250921_1510_Doge%20Scientist%20Trio_simple_compose_01k5p68s01e1p8f81hk4dvm5tm.png'
-        },
-        'rex': {
-            'name': 'Shiba Scientist Rex',
-            'image': 'https://customer-assets.emergentagent.com/job_50ed16dc-caaa-4db1-ad7d-d26be77125c0/artifacts/w3y5oh69_assets_task_01k5p6sq20fh68gb4hjbs9271e_1758460753_img_0.webp'
-        },
-        'luna': {
-            'name': 'Shiba Scientist Luna',
-            'image': 'https://customer-assets.emergentagent.com/job_50ed16dc-caaa-4db1-ad7d-d26be77125c0/artifacts/m1k3hm3c_assets_task_01k5p7arcvf6jt34pk82yke1sh_1758461571_img_0.webp'
-        }
+# Leaderboard Routes
+@api_router.get("/leaderboard")
+@response_cache.cached("leaderboard", ttl=10, maxsize=32)
+async def get_leaderboard(limit: int = 200):
+    # Served from the materialized leaderboard_entries view (see
+    # services/leaderboard_view.py) — one indexed range read. Eligibility
+    # (has collected a treat), TG_/tg_/telegram_id de-duplication and the
+    # VIP-only filter are all resolved when the rows are written.
+    top_players = await leaderboard_view.get_top(db, limit)
+    return [
+        _format_leaderboard_entry(player, rank)
+        for rank, player in enumerate(top_players, start=1)
+    ]
+
+
+async def _resolve_leaderboard_rank(address: str):
+    """(player, leaderboard row, rank) for any address spelling. rank is None
+    when the player isn't shown on the leaderboard."""
+    player = await find_player_by_address(address)
+    if not player and address.startswith("guest_"):
+        player = await db.players.find_one({"guest_id": address}, {"_id": 0})
+    if not player:
+        return None, None, None
+    entry = await leaderboard_view.get_entry(db, player)
+    if not entry:
+        return player, None, None
+    return player, entry, await leaderboard_view.get_rank(db, entry)
+
+
+@api_router.get("/leaderboard/around/{address}")
+async def get_leaderboard_around(address: str, radius: int = 5):
+    """A player's rank plus the players immediately above and below it —
+    works for every ranked player, not just the top 200."""
+    radius = max(0, min(radius, 25))
+    _, entry, rank = await _resolve_leaderboard_rank(address)
+    if rank is None:
+        return {"address": address, "rank": None, "entries": []}
+    rows = await leaderboard_view.get_around(db, rank, radius)
+    return {
+        "address": address,
+        "rank": rank,
+        "points": entry.get("points", 0),
+        "entries": [_format_leaderboard_entry(row, row["rank"]) for row in rows],
     }
-    
-    leaderboard = []
-    display_rank = 0
-    for player in top_players:
-        # Skip VIP-only players: they have 500 bonus but no gameplay earnings
-        if player.get("vip_bonus_claimed") and player.get("points", 0) <= 500:
-            continue
-        
-        display_rank += 1
-        if display_rank > limit:
-            break
-            
-        char_id = player.get("selected_character")
-        char_info = character_data.get(char_id, {})
-        
-        player_address = player.get("address") or f"tg_{player.get('telegram_id')}" or f"guest_{player.get('guest_id', 'unknown')}"
-        player_nickname = player.get("nickname") or player.get("telegram_first_name") or "Player"
-        
-        leaderboard.append({
-            "address": player_address,
-            "nickname": player_nickname,
-            "points": player.get("points", 0),
-            "level": player.get("level", 1),
-            "is_nft_holder": player.get("is_nft_holder", False),
-            "is_dogeonews_holder": player.get("is_dogeonews_holder", False),
-            "is_vip": player.get("is_vip", False),
-            "rank": display_rank,
-            "selected_character": char_id,
-            "character_name": char_info.get('name'),
-            "character_image": char_info.get('image')
-        })
-    
-    return leaderboard
 
 
 # ── $LAB reward pools/formula — kept in exact sync with Leaderboard.jsx's
@@ -4181,36 +4154,14 @@ def calc_lab_reward(rank: Optional[int]) -> int:
 async def get_player_lab_estimate(address: str):
     """
     Live estimate of a player's $LAB reward if the season ended right now.
-    Reuses get_leaderboard() directly (not a re-implementation) so this
-    number can never disagree with what the Leaderboard page itself shows
-    — it finds the player's current display rank in that exact same
-    ranked list, then applies the identical reward formula.
+    The rank comes from the same leaderboard_entries rows and ordering that
+    /leaderboard serves, via a single indexed count (see
+    leaderboard_view.get_rank), so this number can never disagree with what
+    the Leaderboard page shows — and it's cheap for every player, not just
+    those in the top 200.
     """
-    leaderboard = await get_leaderboard(limit=200)
-
-    player = await find_player_by_address(address)
-    if not player and address.startswith("guest_"):
-        player = await db.players.find_one({"guest_id": address}, {"_id": 0})
-
-    # Match this player's entry on the leaderboard by whichever identifier
-    # it was keyed on (address, or tg_<telegram_id> per get_leaderboard's
-    # own fallback at player_address construction time).
-    canonical_address = (player or {}).get("address")
-    telegram_id = (player or {}).get("telegram_id")
-    candidates = {a for a in [
-        address,
-        canonical_address,
-        f"tg_{telegram_id}" if telegram_id is not None else None,
-        f"TG_{telegram_id}" if telegram_id is not None else None,
-    ] if a}
-
-    rank = None
-    points = (player or {}).get("points", 0)
-    for entry in leaderboard:
-        if entry.get("address") in candidates or entry.get("address", "").lower() in {c.lower() for c in candidates}:
-            rank = entry["rank"]
-            points = entry.get("points", points)
-            break
+    player, entry, rank = await _resolve_leaderboard_rank(address)
+    points = (entry or player or {}).get("points", 0)
 
     estimated_lab = calc_lab_reward(rank)
     bonus_allocation = (player or {}).get("lab_bonus_allocation") or 0
@@ -4230,6 +4181,7 @@ async def get_player_lab_estimate(address: str):
 
 # Game Stats Routes
 @api_router.get("/stats")
+@response_cache.cached("stats", ttl=30, maxsize=1)
 async def get_game_stats():
     try:
         today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
@@ -4243,7 +4195,7 @@ async def get_game_stats():
         )
         nft_task = db.players.count_documents({"is_nft_holder": True})
         treats_task = db.treats.count_documents({"brewing_status": "collected"})
-        today_task = db.treats.count_documents({"collected_at": {"$gte": today.isoformat()}})
+        today_task = db.treats.count_documents({"collected_at": {"$gte": today}})
         
         collected_creators, nft_holders, total_treats, active_today = await asyncio.gather(
             collected_creators_task, nft_task, treats_task, today_task
@@ -4392,6 +4344,7 @@ async def verify_player_nft(address: str, data: dict = None):
                             "$inc": {"points": 500}
                         }
                     )
+                    await refresh_leaderboard_entry(address)
                     logger.info(f"🌟 VIP bonus awarded to existing player: {address} - 500 points!")
                     return {
                         "address": address,
@@ -4496,6 +4449,7 @@ async def verify_nft_ownership(address: str, is_holder: str = "false"):
                             "$inc": {"points": 500}
                         }
                     )
+                    await refresh_leaderboard_entry(address)
                     logger.info(f"🌟 VIP bonus awarded to existing player: {address} - 500 points!")
                     return {
                         "address": address,
@@ -4713,31 +4667,71 @@ async def get_rarity_system():
     }
 
 
+class _StageTimer:
+    """Wall-clock breakdown of a request's stages, reported through the
+    Server-Timing response header (visible in browser devtools) and the
+    debug log."""
+
+    def __init__(self):
+        self._last = time.perf_counter()
+        self.stages: List[tuple] = []
+
+    def mark(self, stage: str) -> None:
+        now = time.perf_counter()
+        self.stages.append((stage, (now - self._last) * 1000))
+        self._last = now
+
+    def header(self) -> str:
+        return ", ".join(f"{name};dur={ms:.1f}" for name, ms in self.stages)
+
+
 # Enhanced Treat Creation with Game Engine
 @api_router.post("/treats/enhanced")
-async def create_enhanced_treat(treat_data: EnhancedTreatCreate, background_tasks: BackgroundTasks):
-    """Create treat with enhanced game mechanics including rarity calculation and timers"""
+async def create_enhanced_treat(treat_data: EnhancedTreatCreate, background_tasks: BackgroundTasks, response: Response):
+    """Create treat with enhanced game mechanics including rarity calculation and timers.
+
+    Runs as a staged pipeline so a brew costs about two database round
+    trips: every read is issued in one gather, streak / extra treat /
+    heat / kernel / sack rewards are worked out in memory, and the treat
+    insert, the single combined player update and the kernel holder update
+    go out together. Per-stage timings are returned in Server-Timing.
+    """
+    timer = _StageTimer()
     try:
         # Validate treat creation
         validation = game_engine.validate_treat_creation(treat_data.ingredients, treat_data.player_level)
         if not validation["valid"]:
             raise HTTPException(status_code=400, detail=f"Invalid treat creation: {validation['errors']}")
         
-        # PERFORMANCE: Fetch player + recent treats ONCE upfront in parallel
-        player_task = find_player_by_address(treat_data.creator_address)
-        treats_task = db.treats.find({
-            "creator_address": treat_data.creator_address,
-            "created_at": {"$gte": datetime.now(timezone.utc) - timedelta(hours=24)}
-        }).sort("created_at", -1).to_list(100)
-        
-        player, recent_treats_24h = await asyncio.gather(player_task, treats_task)
+        # ── Stage 1: reads — everything the request needs, in one round trip ──
+        now = datetime.now(timezone.utc)
+        (
+            player,
+            recent_treats_24h,
+            block_record,
+            heat_event_id,
+            kernel_holder,
+        ) = await asyncio.gather(
+            find_player_by_address(treat_data.creator_address),
+            anti_cheat_system.rate_window.recent(treat_data.creator_address, hours=24),
+            anti_cheat_system.is_player_blocked(treat_data.creator_address),
+            arena_system.get_active_heat_event_id(db),
+            db.special_ingredient_holders.find_one({
+                "player_address": treat_data.creator_address,
+                "is_active": True,
+                "expires_at": {"$gt": now}
+            }),
+        )
+        timer.mark("reads")
         
-        # Anti-cheat validation — pass prefetched data to avoid re-querying
+        # Anti-cheat validation — all inputs prefetched; it only touches the
+        # DB itself when it has violations to log
         cheat_check = await anti_cheat_system.validate_treat_creation(
             treat_data.creator_address,
             {"ingredients": treat_data.ingredients, "level": treat_data.player_level},
             prefetched_player=player,
-            prefetched_treats_24h=recent_treats_24h
+            prefetched_treats_24h=recent_treats_24h,
+            prefetched_block_record=block_record
         )
         if not cheat_check["valid"]:
             daily_status = cheat_check.get("daily_status")
@@ -4749,16 +4743,11 @@ async def create_enhanced_treat(treat_data: EnhancedTreatCreate, background_task
             # Blocked players get 403 (forbidden) so it's distinguishable
             # client-side from an ordinary 429 rate-limit/backoff case.
             raise HTTPException(status_code=403 if is_blocked else 429, detail=error_detail)
+        timer.mark("anti_cheat")
         
-        # Run remaining DB operations in parallel, passing prefetched data
-        extra_treat_task = anti_cheat_system.consume_extra_treat_if_needed(
-            treat_data.creator_address, prefetched_player=player, prefetched_treats_24h=recent_treats_24h
-        )
-        streak_task = anti_cheat_system.update_player_streak(
-            treat_data.creator_address, prefetched_player=player
-        )
-        
-        extra_treat_consumed, streak_result = await asyncio.gather(extra_treat_task, streak_task)
+        # ── Stage 2: compute — streak, extra treat, outcome, rewards ──────
+        extra_treat_consumed = anti_cheat_system.needs_extra_treat(player, recent_treats_24h)
+        streak_result, streak_fields = anti_cheat_system.compute_streak_update(player)
         
         streak_bonus = streak_result.get("streak_bonus", {})
         xp_multiplier = streak_bonus.get("xp_multiplier", 1.0)
@@ -4776,21 +4765,20 @@ async def create_enhanced_treat(treat_data: EnhancedTreatCreate, background_task
                 logger.info(f"🦖 Rex bonus: +{rare_chance_bonus*100}% rare chance for {treat_data.creator_address}")
         
         # ── Apply active heat event modifiers ─────────────────────────────
-        heat_event_id = await arena_system.get_active_heat_event_id(db)
         heat_rare_bonus   = 0.0
         heat_timer_factor = 1.0  # multiplier on brewing time (1.0 = no change)
 
         if heat_event_id == "lab_surge":
-            heat_rare_bonus = 0.10
+            heat_rare_bonus = arena_system.HEAT_RARE_CHANCE_BONUS["lab_surge"]
             logger.info("🧪 Heat: Lab Surge — +10% rare chance active")
         elif heat_event_id == "crit_state":
-            heat_rare_bonus = 0.20
+            heat_rare_bonus = arena_system.HEAT_RARE_CHANCE_BONUS["crit_state"]
             logger.info("🔴 Heat: Critical Mix — +20% rare chance active")
         elif heat_event_id == "overclock":
-            heat_timer_factor = 0.50
+            heat_timer_factor = arena_system.HEAT_TIMER_FACTOR["overclock"]
             logger.info("⚡ Heat: Overclock Mode — brewing time halved")
 
-        rare_chance_bonus = min(rare_chance_bonus + heat_rare_bonus, 0.60)  # cap at 60%
+        rare_chance_bonus = min(rare_chance_bonus + heat_rare_bonus, arena_system.RARE_CHANCE_BONUS_CAP)
 
         # Calculate treat outcome using game engine with character bonus
         treat_outcome = game_engine.calculate_treat_outcome(
@@ -4851,16 +4839,12 @@ async def create_enhanced_treat(treat_data: EnhancedTreatCreate, background_task
         
         # Add Season 1 specific metadata for future NFT compatibility
         treat_dict = treat.dict()
+        # Assign the Mongo _id up front so the player's created_treats push
+        # can go out alongside the insert instead of after it
+        treat_dict["_id"] = ObjectId()
         
-        # Check if player has Kernel of Wow and apply bonus
+        # Kernel of Wow bonus (holder record prefetched in stage 1)
         kernel_bonus = None
-        now = datetime.now(timezone.utc)
-        kernel_holder = await db.special_ingredient_holders.find_one({
-            "player_address": treat_data.creator_address,
-            "is_active": True,
-            "expires_at": {"$gt": now}
-        })
-        
         base_points_reward = treat_outcome.get("points_reward", 10)
         base_xp_reward = treat_outcome.get("xp_reward", 5)
         
@@ -4884,15 +4868,6 @@ async def create_enhanced_treat(treat_data: EnhancedTreatCreate, background_task
             final_points_reward = boosted_points
             final_xp_reward = boosted_xp
             
-            # Update kernel holder record
-            await db.special_ingredient_holders.update_one(
-                {"id": kernel_holder.get("id")},
-                {
-                    "$push": {"used_in_treats": treat.id},
-                    "$inc": {"total_bonus_earned": kernel_bonus["points_bonus"]}
-                }
-            )
-            
             logger.info(f"Kernel of Wow bonus applied: {kernel_bonus['bonus_percent']}% ({kernel_bonus['tier']})")
         else:
             final_points_reward = base_points_reward
@@ -4925,38 +4900,9 @@ async def create_enhanced_treat(treat_data: EnhancedTreatCreate, background_task
             "migration_ready": True  # Flags this treat as ready for future onchain migration
         })
         
-        # Save to database with enhanced metadata
-        result = await db.treats.insert_one(treat_dict)
-        
-        # Use player data already fetched earlier (avoid redundant DB call)
-        if not player:
-            player = {
-                "address": treat_data.creator_address,
-                "level": 1,
-                "experience": 0,
-                "points": 0,
-                "created_treats": [],
-                "sack_progress": 0,
-                "sack_completed_count": 0,
-                "total_treats_created": 0,
-                "nickname": "Player",
-                "is_nft_holder": False,
-                "leaderboard_eligible": True,
-                "last_activity": datetime.now(timezone.utc)
-            }
-            # Use upsert to avoid duplicate key error if player was created
-            # by update_player_streak (which runs in parallel with upsert=True)
-            await db.players.update_one(
-                {"address": treat_data.creator_address},
-                {"$setOnInsert": player},
-                upsert=True
-            )
-        
-        # Update treat count and sack progress
-        current_treats_count = len(player.get('created_treats', []))
-        new_treats_count = current_treats_count + 1
-        
         # Sack system: every 5 treats = 1 sack completion
+        current_treats_count = len(player.get('created_treats', [])) if player else 0
+        new_treats_count = current_treats_count + 1
         sack_completion_threshold = 5
         sack_progress = new_treats_count % sack_completion_threshold
         sack_completed_count = new_treats_count // sack_completion_threshold
@@ -4966,29 +4912,64 @@ async def create_enhanced_treat(treat_data: EnhancedTreatCreate, background_task
         sack_just_completed = sack_completed_count > previous_completions
         sack_bonus_xp = 50 if sack_just_completed else 0  # 50 XP bonus per sack completion
         
-        # Run player update and daily status fetch in parallel
-        # Pass prefetched player data to daily_status to avoid re-querying
-        player_update_task = db.players.update_one(
-            {"address": treat_data.creator_address},
-            {
-                "$push": {"created_treats": str(result.inserted_id)},
-                "$set": {
-                    "sack_progress": sack_progress,
-                    "sack_completed_count": sack_completed_count, 
-                    "total_treats_created": new_treats_count,
-                    "last_activity": datetime.now(timezone.utc)
-                },
-                "$inc": {
-                    "experience": sack_bonus_xp
-                }
+        # One player update carries the streak, extra-treat spend, sack
+        # progress and the created_treats push. Upserts a minimal player doc
+        # if none exists yet for this address.
+        player_inc = {"experience": sack_bonus_xp}
+        if extra_treat_consumed:
+            player_inc["extra_treats_balance"] = -1
+        player_update = {
+            "$push": {"created_treats": str(treat_dict["_id"])},
+            "$set": {
+                **streak_fields,
+                "sack_progress": sack_progress,
+                "sack_completed_count": sack_completed_count,
+                "total_treats_created": new_treats_count,
+                "last_activity": datetime.now(timezone.utc)
+            },
+            "$inc": player_inc,
+        }
+        if not player:
+            player_update["$setOnInsert"] = {
+                "level": 1,
+                "points": 0,
+                "nickname": "Player",
+                "is_nft_holder": False,
+                "leaderboard_eligible": True,
             }
+        
+        # Daily status after this treat, from the prefetched window plus the
+        # new treat and the player's post-update streak / extra balance
+        player_after = {**(player or {}), **streak_fields}
+        if extra_treat_consumed:
+            player_after["extra_treats_balance"] = player_after.get("extra_treats_balance", 0) - 1
+        daily_status = await anti_cheat_system.get_daily_treat_status(
+            treat_data.creator_address,
+            prefetched_player=player_after,
+            prefetched_treats_24h=[{"created_at": datetime.utcnow()}] + recent_treats_24h
         )
-        # Recompute daily status using prefetched data + newly created treat
-        daily_status_task = anti_cheat_system.get_daily_treat_status(
-            treat_data.creator_address, prefetched_player=player
-        )
+        timer.mark("compute")
         
-        _, daily_status = await asyncio.gather(player_update_task, daily_status_task)
+        # ── Stage 3: writes — issued together ─────────────────────────────
+        writes = [
+            db.treats.insert_one(treat_dict),
+            db.players.update_one(
+                {"address": treat_data.creator_address},
+                player_update,
+                upsert=not player
+            ),
+        ]
+        if kernel_bonus:
+            writes.append(db.special_ingredient_holders.update_one(
+                {"id": kernel_holder.get("id")},
+                {
+                    "$push": {"used_in_treats": treat.id},
+                    "$inc": {"total_bonus_earned": kernel_bonus["points_bonus"]}
+                }
+            ))
+        await asyncio.gather(*writes)
+        await after_treat_insert(treat_dict)
+        timer.mark("writes")
         
         # NOTE: Points and XP rewards are awarded ONLY when the treat is COLLECTED (not created)
         # This prevents double-awarding. The points_reward and xp_reward are stored in the treat
@@ -5010,9 +4991,7 @@ async def create_enhanced_treat(treat_data: EnhancedTreatCreate, background_task
             treat_response['ready_at'] = treat_response['ready_at'].isoformat()
         
         # Set the MongoDB inserted ID as the treat ID
-        treat_response['id'] = str(result.inserted_id)
-        
-        # daily_status already fetched in parallel above
+        treat_response['id'] = str(treat_dict["_id"])
         
         # Build streak message
         streak_message = ""
@@ -5047,6 +5026,10 @@ async def create_enhanced_treat(treat_data: EnhancedTreatCreate, background_task
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating enhanced treat: {str(e)}")
+    finally:
+        timer.mark("respond")
+        response.headers["Server-Timing"] = timer.header()
+        logger.debug(f"⏱️ create_enhanced_treat stages: {timer.header()}")
 
 
 
@@ -5057,10 +5040,11 @@ async def create_enhanced_treat(treat_data: EnhancedTreatCreate, background_task
 
 
 @api_router.get("/ingredients/catalog")
+@response_cache.cached("ingredient_catalog", ttl=3600, maxsize=1)
 async def get_ingredient_catalog():
     """Get complete ingredient catalog with all details"""
-    from services.ingredient_system import IngredientSystem, RECIPE_TEMPLATES
-    ing_system = IngredientSystem()
+    from services.ingredient_system import RECIPE_TEMPLATES
+    ing_system = ingredient_system
     
     return {
         "ingredients": ing_system.get_all_ingredients_json(),
@@ -5075,62 +5059,7 @@ async def get_ingredient_catalog():
 @api_router.get("/ingredients/unlocked/{player_level}")
 async def get_unlocked_ingredients(player_level: int):
     """Get ingredients unlocked at a specific player level"""
-    from services.ingredient_system import IngredientSystem
-    ing_system = IngredientSystem()
-    
-    unlocked = ing_system.get_unlocked_ingredients(player_level)
-    locked = ing_system.get_locked_ingredients(player_level)
-    
-    # Group unlocked by category
-    unlocked_by_category = {}
-    for ing in unlocked:
-        cat = ing.category.value
-        if cat not in unlocked_by_category:
-            unlocked_by_category[cat] = []
-        unlocked_by_category[cat].append({
-            "id": ing.id,
-            "name": ing.name,
-            "emoji": ing.emoji,
-            "description": ing.description,
-            "special_effect": ing.special_effect.value,
-            "rarity_weight": ing.rarity_weight,
-            "color": ing.color,
-            "unlock_level": ing.unlock_level
-        })
-    
-    # Get next unlocks
-    next_unlocks = []
-    current_locked_levels = sorted(set(ing.unlock_level for ing in locked))
-    for level in current_locked_levels[:3]:  # Show next 3 unlock levels
-        ingredients_at_level = [ing for ing in locked if ing.unlock_level == level]
-        next_unlocks.append({
-            "level": level,
-            "ingredients": [{"id": ing.id, "name": ing.name, "emoji": ing.emoji, "category": ing.category.value} 
-                          for ing in ingredients_at_level]
-        })
-    
-    return {
-        "player_level": player_level,
-        "unlocked_count": len(unlocked),
-        "locked_count": len(locked),
-        "unlocked_by_category": unlocked_by_category,
-        "ingredients": [
-            {
-                "id": ing.id,
-                "name": ing.name,
-                "category": ing.category.value,
-                "emoji": ing.emoji,
-                "description": ing.description,
-                "special_effect": ing.special_effect.value,
-                "rarity_weight": ing.rarity_weight,
-                "color": ing.color,
-                "unlock_level": ing.unlock_level,
-            }
-            for ing in unlocked
-        ],
-        "next_unlocks": next_unlocks,
-        "categories": ing_system.get_category_info()
-    }
+    return Response(content=ingredient_system.unlocked_overview_json(player_level), media_type="application/json")
 
 
 
@@ -5138,13 +5067,15 @@ async def get_unlocked_ingredients(player_level: int):
 @api_router.post("/ingredients/validate-recipe")
 async def validate_recipe(ingredients: List[str] = [], player_level: int = 1):
     """Validate a recipe before creating a treat"""
-    from services.ingredient_system import IngredientSystem
-    ing_system = IngredientSystem()
+    ing_system = ingredient_system
     
     # Check if all ingredients are unlocked
-    unlocked_ids = [ing.id for ing in ing_system.get_unlocked_ingredients(player_level)]
+    unlocked_ids = {ing.id for ing in ing_system.get_unlocked_ingredients(player_level)}
     locked_ingredients = [ing_id for ing_id in ingredients if ing_id not in unlocked_ids]
     
+    # Weight sum, effects and gate flags in one (memoized) pass
+    profile = ing_system.recipe_profile(ingredients)
+    
     # Get special effects
     effects = ing_system.get_special_effects(ingredients)
     
@@ -5163,8 +5094,8 @@ async def validate_recipe(ingredients: List[str] = [], player_level: int = 1):
         "locked_ingredients": locked_ingredients,
         "special_effects": [e.value for e in effects],
         "rarity_modifier": round(rarity_mod, 2),
-        "has_mythic_catalyst": ing_system.has_mythic_catalyst(ingredients),
-        "has_legendary_gate": ing_system.has_legendary_gate(ingredients),
+        "has_mythic_catalyst": profile.has_mythic_catalyst,
+        "has_legendary_gate": profile.has_legendary_gate,
         "possible_rarities": possible_rarities,
         "max_possible_rarity": possible_rarities[-1] if possible_rarities else "Common"
     }
@@ -5251,6 +5182,7 @@ async def register_player(registration_data: dict):
         }
         
         result = await db.players.insert_one(player_data)
+        await player_identity.bind(player_data)
         
         return {
             "message": f"Player registered successfully with username: {username}",
@@ -5372,6 +5304,7 @@ async def register_telegram_player(request: Request):
         }
         
         result = await db.players.insert_one(player_data)
+        await player_identity.bind(player_data)
         
         return {
             "message": f"Telegram player registered successfully: {telegram_first_name or telegram_username}",
@@ -5438,6 +5371,7 @@ async def register_guest_player(request: Request):
         }
         
         await db.players.insert_one(player_data)
+        await player_identity.bind(player_data)
         logger.info(f"👤 Guest player registered: {username} ({guest_id})")
         
         return {
@@ -5556,6 +5490,7 @@ async def register_firebase_player(request: Request):
         }
         
         await db.players.insert_one(player_data)
+        await player_identity.bind(player_data)
         logger.info(f"🔥 Firebase player registered: {final_username} ({provider}) - {email}")
         
         return {
@@ -5625,6 +5560,7 @@ async def link_nft_wallet(request: Request):
             {"id": player_id},
             {"$set": update_data}
         )
+        await player_identity.forget(player.get("address"), wallet_address)
         
         return {
             "success": True,
@@ -5696,6 +5632,7 @@ async def link_wallet_to_telegram(request: Request):
             {"telegram_id": telegram_id},
             {"$set": update_data}
         )
+        await player_identity.forget(telegram_player.get("address"), wallet_address, f"tg_{telegram_id}")
         
         return {
             "message": "Wallet successfully linked to Telegram account",
@@ -5746,7 +5683,6 @@ async def get_current_season_info():
 @api_router.get("/ingredients")
 async def get_ingredients(level: int = 1):
     """Get all ingredients available at the specified level"""
-    ingredients = ingredient_system.export_ingredients_for_frontend(level)
     # Include active heat event so the frontend can highlight bonus ingredients.
     # Import arena_system locally so this never fails if the module-level import
     # hasn't run yet (it lives at the bottom of this file).
@@ -5756,15 +5692,15 @@ async def get_ingredients(level: int = 1):
         from services import arena_system as _arena
         heat_event_id = await _arena.get_active_heat_event_id(db)
         if heat_event_id and heat_event_id != "idle_calm":
-            arena_doc = await db.arena_sessions.find_one(
-                {"status": "active"}, {"_id": 0, "heat_event": 1}
-            )
-            if arena_doc and arena_doc.get("heat_event"):
-                heat_event = arena_doc["heat_event"]
+            heat_event = _arena.heat_event_at()["event"]
     except Exception:
         heat_event_id = "idle_calm"
         heat_event = None
-    return {"ingredients": ingredients, "level": level, "heat_event_id": heat_event_id, "heat_event": heat_event}
+    return Response(
+        content=ingredient_system.export_ingredients_json(
+            level, level=level, heat_event_id=heat_event_id, heat_event=heat_event),
+        media_type="application/json",
+    )
 
 
 @api_router.get("/ingredients/stats")
@@ -5826,7 +5762,7 @@ async def simulate_treat_outcome(
         raise HTTPException(status_code=400, detail="Minimum 2 ingredients required")
     
     outcomes = []
-    rarity_counts = {"Common": 0, "Rare": 0, "Epic": 0, "Legendary": 0}
+    rarity_counts = {r.value: 0 for r in TreatRarity}
     
     for i in range(min(simulations, 50)):  # Limit to 50 simulations
         try:
@@ -5847,6 +5783,30 @@ async def simulate_treat_outcome(
     }
 
 
+class SimulateEconomyRequest(BaseModel):
+    recipes: List[List[str]]
+    recipe_weights: Optional[List[float]] = None
+    players: int = 1000
+    days: int = 90
+    treats_per_day: Optional[int] = None
+    rare_chance_bonus: float = 0.0
+    streak_days: int = 1
+    heat_event_id: Optional[str] = None  # None = follow the heat calendar
+    starting_supply: Optional[float] = None
+    seed: Optional[int] = None
+
+
+@api_router.post("/game/simulate-economy", dependencies=[Depends(verify_admin)])
+async def simulate_economy(payload: SimulateEconomyRequest):
+    """Monte-Carlo a whole season of treats (admin only) — rarity histogram,
+    expected points/XP per player-day and season point inflation. See
+    services/treat_simulator.py."""
+    try:
+        return await asyncio.to_thread(treat_simulator.simulate, game_engine, **payload.dict())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 # Season Management Endpoints
 
 
@@ -5865,6 +5825,7 @@ async def delete_player(address: str, admin_key: str):
     
     # Delete player
     await db.players.delete_one({"address": address})
+    await player_identity.forget(address)
     
     # Delete their treats too
     treats_result = await db.treats.delete_many({"player_address": address})
@@ -6359,6 +6320,9 @@ async def season2_reset(admin_key: str = None):
             upsert=True
         )
 
+        await leaderboard_view.rebuild(db)
+        response_cache.invalidate()
+
         logger.info(
             f"🚀 SEASON 2 RESET — {len(ranked_players)} ranked reset, "
             f"{players_with_lab} players earned $LAB"
@@ -6576,6 +6540,9 @@ async def reset_leaderboard(admin_key: str = None):
             upsert=True
         )
         
+        await leaderboard_view.rebuild(db)
+        response_cache.invalidate()
+
         logger.info(f"🚀 SEASON 1 OFFICIALLY STARTED! Leaderboard reset. {result.modified_count} players reset, {vip_result.modified_count} VIP bonuses awarded.")
         
         return {
@@ -6592,6 +6559,22 @@ async def reset_leaderboard(admin_key: str = None):
         raise HTTPException(status_code=500, detail=f"Failed to reset leaderboard: {str(e)}")
 
 
+@response_cache.cached("season_timer", ttl=60, maxsize=1)
+async def _load_season_end_date():
+    """Season 1 end date from the seasons collection. Cached on its own so
+    the countdown itself is still computed fresh on every request."""
+    # Check if we have a stored season in database
+    season_doc = await db.seasons.find_one({"season_id": 1}, {"_id": 0})
+    
+    if season_doc and season_doc.get("end_date"):
+        end_date = season_doc["end_date"]
+        if isinstance(end_date, str):
+            end_date = datetime.fromisoformat(end_date.replace("Z", "+00:00"))
+        return end_date
+    # Default Season 1 end date: March 31, 2026
+    return datetime(2026, 3, 31, 23, 59, 59)
+
+
 @api_router.get("/season/timer")
 async def get_season_timer():
     """
@@ -6599,16 +6582,7 @@ async def get_season_timer():
     Returns time remaining in the current season.
     """
     try:
-        # Check if we have a stored season in database
-        season_doc = await db.seasons.find_one({"season_id": 1}, {"_id": 0})
-        
-        if season_doc and season_doc.get("end_date"):
-            end_date = season_doc["end_date"]
-            if isinstance(end_date, str):
-                end_date = datetime.fromisoformat(end_date.replace("Z", "+00:00"))
-        else:
-            # Default Season 1 end date: March 31, 2026
-            end_date = datetime(2026, 3, 31, 23, 59, 59)
+        end_date = await _load_season_end_date()
         
         now = datetime.now(timezone.utc)
         
@@ -6700,6 +6674,7 @@ async def create_chat_message(message_data: ChatMessageCreate):
         )
         
         await db.chat_messages.insert_one(message.dict())
+        response_cache.invalidate("chat_messages")
         
         return {**message.dict(), "_id": None}
     except HTTPException:
@@ -6728,6 +6703,7 @@ async def upvote_chat_message(upvote_data: ChatUpvoteRequest):
                     "$inc": {"upvote_count": -1}
                 }
             )
+            response_cache.invalidate("chat_messages")
             # Remove XP from message author
             await db.players.update_one(
                 {"address": message["sender_address"]},
@@ -6747,6 +6723,7 @@ async def upvote_chat_message(upvote_data: ChatUpvoteRequest):
                 "$inc": {"upvote_count": 1}
             }
         )
+        response_cache.invalidate("chat_messages")
         
         # Award 1 XP to message author
         await db.players.update_one(
@@ -6774,6 +6751,7 @@ async def delete_chat_message(message_id: str, sender_address: str):
             raise HTTPException(status_code=403, detail="Can only delete your own messages")
         
         await db.chat_messages.delete_one({"id": message_id})
+        response_cache.invalidate("chat_messages")
         return {"success": True}
     except HTTPException:
         raise
@@ -6813,7 +6791,7 @@ async def delete_chat_message(message_id: str, sender_address: str):
 #   base64 form directly. You already provided the public key — re-generate
 #   if you don't have the matching private key.
 
-from pywebpush import webpush, WebPushException  # noqa: E402
+from services.notification_delivery import TelegramSender, WebPushSender  # noqa: E402
 
 VAPID_PUBLIC_KEY = os.environ.get(
     "VAPID_PUBLIC_KEY",
@@ -6823,6 +6801,10 @@ VAPID_PRIVATE_KEY = os.environ.get("VAPID_PRIVATE_KEY", "")
 VAPID_SUBJECT = os.environ.get("VAPID_SUBJECT", "mailto:admin@dogefoodlab.com")
 TELEGRAM_BOT_USERNAME = os.environ.get("TELEGRAM_BOT_USERNAME", "")
 
+# Long-lived, rate-limited delivery clients shared by every send below
+telegram_sender = TelegramSender(os.getenv("TELEGRAM_BOT_TOKEN"))
+web_push_sender = WebPushSender(VAPID_PRIVATE_KEY, VAPID_SUBJECT)
+
 
 class NotificationSubscription(BaseModel):
     player_address: Optional[str] = None
@@ -6862,12 +6844,10 @@ async def _try_send_telegram_welcome(telegram_id: int) -> bool:
     """Send the welcome message via Telegram. Returns False if the user
     has not /start'd the bot yet (Telegram refuses with 'Forbidden:
     bot can't initiate conversation with a user' in that case)."""
-    bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
-    if not bot_token:
+    if not telegram_sender.configured:
         return False
     try:
-        bot = Bot(token=bot_token)
-        await bot.send_message(
+        await telegram_sender.send(
             chat_id=telegram_id,
             text=(
                 "🔔 Notifications enabled!\n\n"
@@ -6887,40 +6867,7 @@ async def send_web_push(subscription_info: dict, title: str, body: str,
                         url: str = "/", icon: str = "/dogefood-logo.png") -> bool:
     """Send a Web Push notification. Returns False if the subscription
     is expired / invalid so the caller can mark it inactive."""
-    if not VAPID_PRIVATE_KEY:
-        logger.warning("VAPID_PRIVATE_KEY not configured — skipping web push")
-        return False
-    if not subscription_info or not subscription_info.get("endpoint"):
-        return False
-
-    payload = json.dumps({
-        "title": title,
-        "body": body,
-        "url": url,
-        "icon": icon,
-    })
-
-    try:
-        # pywebpush is synchronous — run it in a thread so we don't block.
-        await asyncio.to_thread(
-            webpush,
-            subscription_info=subscription_info,
-            data=payload,
-            vapid_private_key=VAPID_PRIVATE_KEY,
-            vapid_claims={"sub": VAPID_SUBJECT},
-        )
-        return True
-    except WebPushException as e:
-        status = getattr(getattr(e, "response", None), "status_code", None)
-        if status in (404, 410):
-            # Subscription gone — caller should mark inactive.
-            logger.info(f"Web push subscription expired (status {status})")
-            return False
-        logger.warning(f"WebPushException: {e}")
-        return False
-    except Exception as e:
-        logger.error(f"send_web_push unexpected error: {e}")
-        return False
+    return await web_push_sender.send(subscription_info, title, body, url=url, icon=icon)
 
 
 # ── Telegram subscribe / unsubscribe / preferences ────────────────────────────
@@ -7056,7 +7003,7 @@ async def update_web_preferences(data: NotificationSubscription):
 
 # ── Schedule endpoints (called from GameLab when a treat starts brewing) ──────
 @api_router.post("/notifications/schedule/treat-ready")
-async def schedule_treat_ready_notification(data: ScheduleNotification, background_tasks: BackgroundTasks):
+async def schedule_treat_ready_notification(data: ScheduleNotification):
     try:
         notification_data = {
             "id": str(uuid.uuid4()),
@@ -7066,6 +7013,9 @@ async def schedule_treat_ready_notification(data: ScheduleNotification, backgrou
             "created_at": datetime.now(timezone.utc),
             "sent": False,
         }
+        notification_data["due_at"] = due_at_for(notification_data)
+        if notification_data["due_at"] is None:
+            raise HTTPException(status_code=400, detail="Valid ready_time required")
         if data.telegram_id:
             notification_data["telegram_id"] = data.telegram_id
         elif data.player_address:
@@ -7074,7 +7024,7 @@ async def schedule_treat_ready_notification(data: ScheduleNotification, backgrou
             raise HTTPException(status_code=400, detail="Telegram ID or player address required")
 
         await db.scheduled_notifications.insert_one(notification_data)
-        background_tasks.add_task(send_scheduled_notification, notification_data["id"])
+        notification_dispatcher.schedule(notification_data["due_at"])
         return {"success": True, "notification_id": notification_data["id"]}
     except HTTPException:
         raise
@@ -7084,7 +7034,7 @@ async def schedule_treat_ready_notification(data: ScheduleNotification, backgrou
 
 
 @api_router.post("/notifications/schedule/limit-reset")
-async def schedule_limit_reset_notification(data: ScheduleNotification, background_tasks: BackgroundTasks):
+async def schedule_limit_reset_notification(data: ScheduleNotification):
     try:
         notification_data = {
             "id": str(uuid.uuid4()),
@@ -7093,6 +7043,9 @@ async def schedule_limit_reset_notification(data: ScheduleNotification, backgrou
             "created_at": datetime.now(timezone.utc),
             "sent": False,
         }
+        notification_data["due_at"] = due_at_for(notification_data)
+        if notification_data["due_at"] is None:
+            raise HTTPException(status_code=400, detail="Valid reset_time required")
         if data.telegram_id:
             notification_data["telegram_id"] = data.telegram_id
         elif data.player_address:
@@ -7101,7 +7054,7 @@ async def schedule_limit_reset_notification(data: ScheduleNotification, backgrou
             raise HTTPException(status_code=400, detail="Telegram ID or player address required")
 
         await db.scheduled_notifications.insert_one(notification_data)
-        background_tasks.add_task(send_scheduled_notification, notification_data["id"])
+        notification_dispatcher.schedule(notification_data["due_at"])
         return {"success": True, "notification_id": notification_data["id"]}
     except HTTPException:
         raise
@@ -7111,182 +7064,32 @@ async def schedule_limit_reset_notification(data: ScheduleNotification, backgrou
 
 
 # ── Delivery (now supports BOTH Telegram and Web Push) ────────────────────────
-async def send_scheduled_notification(notification_id: str):
-    """Send a single scheduled notification immediately if its target time has
-    elapsed. Idempotent — marks `sent: True` after success."""
+async def send_telegram_notification(chat_id: int, text: str) -> bool:
+    """Send a scheduled notification over Telegram. Returns False if the
+    send failed and should be retried; a missing bot token counts as done."""
+    if not telegram_sender.configured:
+        return True
     try:
-        notification = await db.scheduled_notifications.find_one({"id": notification_id})
-        if not notification or notification.get("sent"):
-            return
-
-        # Compute whether this notification's target time has elapsed.
-        now = datetime.now(timezone.utc)
-
-        def parse_dt(value):
-            if isinstance(value, str):
-                dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
-                if dt.tzinfo is None:
-                    dt = dt.replace(tzinfo=timezone.utc)
-                return dt
-            if hasattr(value, "tzinfo") and value.tzinfo is None:
-                return value.replace(tzinfo=timezone.utc)
-            return value
-
-        should_send = False
-        if notification["type"] == "treat_ready" and notification.get("ready_time"):
-            should_send = now >= parse_dt(notification["ready_time"])
-        elif notification["type"] == "limit_reset" and notification.get("reset_time"):
-            should_send = now >= parse_dt(notification["reset_time"])
-
-        if not should_send:
-            return  # processor loop will pick it up later
-
-        # Build message text.
-        if notification["type"] == "treat_ready":
-            title = "🍖 Treat Ready!"
-            body = (
-                f"Your {notification.get('treat_name', 'treat')} is ready to collect — "
-                f"head to the lab before it gets cold!"
-            )
-        else:
-            title = "🔄 Daily Limit Reset"
-            body = "You can create more treats now. Time to brew!"
-
-        # ── Telegram delivery ───────────────────────────────────────────────
-        if notification.get("telegram_id"):
-            sub = await db.notification_subscriptions.find_one({
-                "telegram_id": notification["telegram_id"],
-                "active": True,
-            })
-            if not sub:
-                await db.scheduled_notifications.update_one(
-                    {"id": notification_id},
-                    {"$set": {"sent": True, "skipped_reason": "subscription_inactive"}},
-                )
-                return
-
-            if notification["type"] == "treat_ready" and not sub.get("treat_ready", True):
-                await db.scheduled_notifications.update_one(
-                    {"id": notification_id},
-                    {"$set": {"sent": True, "skipped_reason": "preference_disabled"}},
-                )
-                return
-            if notification["type"] == "limit_reset" and not sub.get("limit_reset", True):
-                await db.scheduled_notifications.update_one(
-                    {"id": notification_id},
-                    {"$set": {"sent": True, "skipped_reason": "preference_disabled"}},
-                )
-                return
-
-            bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
-            if bot_token:
-                try:
-                    bot = Bot(token=bot_token)
-                    await bot.send_message(chat_id=notification["telegram_id"], text=f"{title}\n\n{body}")
-                    logger.info(f"📬 Telegram delivered: {notification_id}")
-                except Exception as e:
-                    logger.warning(f"Telegram send failed for {notification.get('telegram_id')}: {e}")
-                    return  # don't mark sent, retry later
-
-        # ── Web push delivery ───────────────────────────────────────────────
-        elif notification.get("player_address"):
-            sub = await db.notification_subscriptions.find_one({
-                "player_address": notification["player_address"],
-                "type": "web",
-                "active": True,
-            })
-            if not sub:
-                await db.scheduled_notifications.update_one(
-                    {"id": notification_id},
-                    {"$set": {"sent": True, "skipped_reason": "subscription_inactive"}},
-                )
-                return
-
-            if notification["type"] == "treat_ready" and not sub.get("treat_ready", True):
-                await db.scheduled_notifications.update_one(
-                    {"id": notification_id},
-                    {"$set": {"sent": True, "skipped_reason": "preference_disabled"}},
-                )
-                return
-            if notification["type"] == "limit_reset" and not sub.get("limit_reset", True):
-                await db.scheduled_notifications.update_one(
-                    {"id": notification_id},
-                    {"$set": {"sent": True, "skipped_reason": "preference_disabled"}},
-                )
-                return
-
-            subscription_info = sub.get("subscription")
-            if not subscription_info:
-                # In-tab only fallback — there's no PushSubscription, so nothing
-                # to send while the tab is closed. Mark sent.
-                await db.scheduled_notifications.update_one(
-                    {"id": notification_id},
-                    {"$set": {"sent": True, "skipped_reason": "no_push_subscription"}},
-                )
-                return
-
-            ok = await send_web_push(
-                subscription_info,
-                title=title,
-                body=body,
-                url="/lab",
-            )
-            if not ok:
-                # Mark subscription inactive on expired/invalid endpoint
-                await db.notification_subscriptions.update_one(
-                    {"_id": sub["_id"]},
-                    {"$set": {"active": False, "deactivated_reason": "push_failed"}},
-                )
-                await db.scheduled_notifications.update_one(
-                    {"id": notification_id},
-                    {"$set": {"sent": True, "skipped_reason": "push_failed"}},
-                )
-                return
-            logger.info(f"📬 Web push delivered: {notification_id}")
-
-        # Mark sent.
-        await db.scheduled_notifications.update_one(
-            {"id": notification_id},
-            {"$set": {"sent": True, "sent_at": datetime.now(timezone.utc)}},
-        )
-
+        await telegram_sender.send(chat_id, text)
+        return True
     except Exception as e:
-        logger.error(f"Error sending scheduled notification {notification_id}: {e}")
-
+        logger.warning(f"Telegram send failed for {chat_id}: {e}")
+        return False
 
-async def notification_processor_loop():
-    """Background loop that checks for pending notifications every 30 seconds."""
-    logger.info("🔔 Notification processor loop started (Telegram + Web Push)")
 
-    while True:
-        try:
-            now = datetime.now(timezone.utc)
+notification_dispatcher = NotificationDispatcher(
+    db, send_telegram=send_telegram_notification, send_web_push=send_web_push
+)
 
-            pending = await db.scheduled_notifications.find({"sent": False}).to_list(200)
 
-            for notif in pending:
-                try:
-                    target_str = notif.get("ready_time") if notif.get("type") == "treat_ready" else notif.get("reset_time")
-                    if not target_str:
-                        continue
-                    if isinstance(target_str, str):
-                        target = datetime.fromisoformat(target_str.replace("Z", "+00:00"))
-                        if target.tzinfo is None:
-                            target = target.replace(tzinfo=timezone.utc)
-                    else:
-                        target = target_str
-                        if hasattr(target, "tzinfo") and target.tzinfo is None:
-                            target = target.replace(tzinfo=timezone.utc)
+async def notify_treats_ready(treats: List[dict]):
+    """Brew completion sweep listener: the treat-ready notifications for
+    these treats are due now, so don't let the dispatcher sleep on them."""
+    if treats:
+        notification_dispatcher.wake()
 
-                    if now >= target:
-                        await send_scheduled_notification(notif["id"])
-                except Exception as e:
-                    logger.warning(f"Error processing notification {notif.get('id')}: {e}")
 
-        except Exception as e:
-            logger.error(f"Error in notification processor loop: {e}")
-
-        await asyncio.sleep(30)
+brew_stream.add_ready_listener(notify_treats_ready)
 
 
 # ============================================
@@ -7341,6 +7144,7 @@ async def register_guest_player(request: GuestRegisterRequest):
         }
         
         await db.players.insert_one(player_data)
+        await player_identity.bind(player_data)
         
         logger.info(f"New guest player registered: {username} ({guest_id})")
         
@@ -8500,6 +8304,7 @@ async def update_auto_mixer_window(request: AutoMixerWindowUpdateRequest):
         )
         
         updated_sub = await db.auto_mixer_subscriptions.find_one({"id": request.subscription_id}, {"_id": 0})
+        auto_mix_scheduler.track(updated_sub)
         
         return {"subscription": updated_sub, "message": "Window updated successfully"}
         
@@ -8526,6 +8331,7 @@ async def cancel_auto_mixer_subscription(subscription_id: str, player_address: s
             {"id": subscription_id},
             {"$set": {"status": "cancelled", "updated_at": datetime.now(timezone.utc)}}
         )
+        auto_mix_scheduler.drop(subscription_id)
         
         return {"message": "Subscription cancelled successfully"}
         
@@ -8960,6 +8766,16 @@ async def get_auto_mixer_detailed_stats(player_address: str):
 
 
 
+auto_mixer_engine = AutoMixerEngine(
+    db, anti_cheat_system, ingredient_system, game_engine,
+    on_treats_inserted=after_treats_insert,
+)
+# Background auto-mixing: mixes each subscription when it next becomes
+# eligible (4 per 6h window + streak bonuses, max 16 per 24h, same limits as
+# manual play) and expires subscriptions past their end date
+auto_mix_scheduler = AutoMixScheduler(auto_mixer_engine)
+
+
 @api_router.post("/auto-mixer/trigger-now")
 async def trigger_auto_mixer_now():
     """
@@ -8969,195 +8785,13 @@ async def trigger_auto_mixer_now():
     try:
         now = datetime.now(timezone.utc)
         current_hour = now.hour
-        results = []
         
         logger.info(f"🤖 Manual trigger at {now.strftime('%H:%M:%S')} UTC (hour: {current_hour})")
         
-        # Find active subscriptions — manual date filtering for string/datetime compatibility
-        all_active_subs = await db.auto_mixer_subscriptions.find({
-            "status": "active"
-        }).to_list(1000)
-        
-        active_subs = []
-        expired_ids = []
+        active_subs = await auto_mixer_engine.load_active_subscriptions(now)
+        logger.info(f"🤖 Found {len(active_subs)} active subscriptions")
         
-        for sub in all_active_subs:
-            sub_end = sub.get("subscription_end")
-            if sub_end:
-                try:
-                    sub_end = parse_utc_datetime(sub_end)
-                except Exception:
-                    continue
-                if sub_end <= now:
-                    expired_ids.append(sub["id"])
-                    continue
-                active_subs.append(sub)
-            else:
-                active_subs.append(sub)
-        
-        # Expire any detected expired subscriptions
-        if expired_ids:
-            await db.auto_mixer_subscriptions.update_many(
-                {"id": {"$in": expired_ids}},
-                {"$set": {"status": "expired", "updated_at": now}}
-            )
-        
-        logger.info(f"🤖 Found {len(active_subs)} active subscriptions ({len(expired_ids)} expired)")
-        
-        for sub in active_subs:
-            try:
-                start_hour = sub.get("window_start_hour", 0)
-                end_hour = sub.get("window_end_hour", 6)
-                player_address = sub.get("player_address", "Unknown")
-                
-                # Check if current hour is within the window
-                in_window = False
-                if start_hour < end_hour:
-                    in_window = start_hour <= current_hour < end_hour
-                else:  # Window crosses midnight
-                    in_window = current_hour >= start_hour or current_hour < end_hour
-                
-                if not in_window:
-                    results.append({
-                        "player": player_address[:20] + "...",
-                        "status": "skipped",
-                        "reason": f"Outside window ({start_hour}:00-{end_hour}:00, current: {current_hour}:00)"
-                    })
-                    continue
-                
-                # CHECK GAME TREAT LIMITS
-                treat_status = await anti_cheat_system.get_daily_treat_status(player_address)
-                can_create = treat_status.get("can_create_treat", False)
-                remaining = treat_status.get("remaining_treats", 0)
-                window_limit = treat_status.get("window_limit", 4)
-                treats_in_window = treat_status.get("treats_in_window", 0)
-                streak_bonus = treat_status.get("streak_bonus", {})
-                
-                if not can_create or remaining <= 0:
-                    results.append({
-                        "player": player_address[:20] + "...",
-                        "status": "skipped",
-                        "reason": f"At treat limit ({treats_in_window}/{window_limit} in window, {remaining} remaining)"
-                    })
-                    continue
-                
-                # Get player
-                player = await db.players.find_one({"address": player_address})
-                
-                if not player:
-                    results.append({
-                        "player": player_address[:20] + "...",
-                        "status": "error",
-                        "reason": "Player not found in database"
-                    })
-                    continue
-                
-                player_level = player.get("level", 1)
-                character_bonuses = player.get("character_bonuses", {})
-                rare_chance_bonus = character_bonuses.get("rare_chance_bonus", 0.0)
-                
-                # Get available ingredients for player level
-                available_ingredients = ingredient_system.get_unlocked_ingredients(player_level)
-                
-                if len(available_ingredients) < 2:
-                    results.append({
-                        "player": player_address[:20] + "...",
-                        "status": "error",
-                        "reason": f"Not enough ingredients (level {player_level})"
-                    })
-                    continue
-                
-                # Select random ingredients (2-4) with full shuffle for variety
-                all_ingredient_ids = [ing.id for ing in available_ingredients]
-                random.shuffle(all_ingredient_ids)
-                num_ingredients = random.randint(2, min(4, len(all_ingredient_ids)))
-                selected_ingredients = all_ingredient_ids[:num_ingredients]
-                
-                # Create the treat using the game engine with character bonuses
-                treat_result = game_engine.calculate_treat_outcome(
-                    ingredients=selected_ingredients,
-                    player_level=player_level,
-                    player_address=player_address,
-                    rare_chance_bonus=rare_chance_bonus
-                )
-                
-                rarity = treat_result.get("rarity", "Common")
-                points = treat_result.get("points_reward", 10)
-                xp = treat_result.get("xp_reward", 5)
-                
-                # Name treat based on rarity and ingredients
-                treat_name = f"{rarity} Auto-Treat"
-                
-                # Save the treat
-                treat_id = str(uuid.uuid4())
-                treat_doc = {
-                    "id": treat_id,
-                    "name": treat_name,
-                    "creator_address": player_address,
-                    "ingredients": selected_ingredients,
-                    "rarity": rarity,
-                    "rarity_emoji": treat_result.get("rarity_emoji", ""),
-                    "rarity_color": treat_result.get("rarity_color", ""),
-                    "flavor": treat_result.get("flavor", "Savory"),
-                    "created_at": now,
-                    "ready_at": now,
-                    "image": treat_result.get("image", ""),
-                    "brewing_status": "ready",
-                    "points_reward": points,
-                    "xp_reward": xp,
-                    "auto_mixed": True,
-                    "collected": False
-                }
-                
-                await db.treats.insert_one(treat_doc)
-                
-                # Record the auto-mix in history
-                await db.auto_mix_history.insert_one({
-                    "id": str(uuid.uuid4()),
-                    "subscription_id": sub["id"],
-                    "player_address": player_address,
-                    "treat_id": treat_id,
-                    "treat_name": treat_name,
-                    "treat_rarity": rarity,
-                    "points_earned": points,
-                    "xp_earned": xp,
-                    "ingredients": selected_ingredients,
-                    "created_at": now
-                })
-                
-                # Update subscription stats
-                await db.auto_mixer_subscriptions.update_one(
-                    {"id": sub["id"]},
-                    {"$set": {"last_auto_mix": now}, "$inc": {"total_auto_mixes": 1}}
-                )
-                
-                # Update player streak
-                try:
-                    await anti_cheat_system.update_player_streak(player_address)
-                except:
-                    pass
-                
-                results.append({
-                    "player": player_address[:20] + "...",
-                    "status": "success",
-                    "treat_name": treat_name,
-                    "rarity": rarity,
-                    "points": points,
-                    "xp": xp,
-                    "ingredients": selected_ingredients,
-                    "treats_in_window": treats_in_window + 1,
-                    "window_limit": window_limit
-                })
-                
-                logger.info(f"Manual trigger mix: '{treat_name}' ({rarity}, {points}pts) for {player_address[:20]}...")
-                
-            except Exception as e:
-                results.append({
-                    "player": sub.get("player_address", "unknown")[:20] + "...",
-                    "status": "error",
-                    "reason": str(e)
-                })
-                logger.error(f"🤖 ❌ Error: {str(e)}")
+        results = await auto_mixer_engine.run_pass(active_subs, now)
         
         return {
             "triggered_at": now.isoformat(),
@@ -9173,207 +8807,6 @@ async def trigger_auto_mixer_now():
 
 
 
-# Auto-mixer background task
-async def auto_mixer_processor_loop():
-    """
-    Background loop that processes auto-mixes for active subscribers.
-    
-    RESPECTS GAME RULES:
-    - 4 treats per 6-hour window (base) + streak bonuses
-    - Max 16 treats per 24 hours
-    - Uses the same treat creation limits as manual play
-    - Automatically expires subscriptions past their end date
-    """
-    logger.info("🤖 Auto-mixer processor started (respects game treat limits)")
-    
-    while True:
-        try:
-            now = datetime.now(timezone.utc)
-            current_hour = now.hour
-            
-            logger.info(f"🤖 Auto-mixer checking at {now.strftime('%H:%M:%S')} UTC (hour: {current_hour})")
-            
-            # Step 1: Fetch ALL subscriptions with status "active" and filter manually
-            # (subscription_end may be stored as string or datetime, so MongoDB $gt is unreliable)
-            all_active_subs = await db.auto_mixer_subscriptions.find({
-                "status": "active"
-            }).to_list(1000)
-            
-            active_subs = []
-            expired_ids = []
-            
-            for sub in all_active_subs:
-                sub_end = sub.get("subscription_end")
-                if sub_end:
-                    try:
-                        sub_end = parse_utc_datetime(sub_end)
-                    except Exception:
-                        logger.warning(f"🤖 Could not parse subscription_end for {sub.get('player_address', '?')}: {sub_end}")
-                        continue
-                    if sub_end <= now:
-                        # Subscription has expired — mark for update
-                        expired_ids.append(sub["id"])
-                        logger.info(f"🤖 Subscription expired for {sub.get('player_address', '?')[:15]}... (ended {sub_end.isoformat()})")
-                        continue
-                    active_subs.append(sub)
-                else:
-                    active_subs.append(sub)
-            
-            # Step 2: Bulk-expire all detected expired subscriptions
-            if expired_ids:
-                result = await db.auto_mixer_subscriptions.update_many(
-                    {"id": {"$in": expired_ids}},
-                    {"$set": {"status": "expired", "updated_at": now}}
-                )
-                logger.info(f"🤖 Expired {result.modified_count} subscription(s)")
-            
-            logger.info(f"🤖 Found {len(active_subs)} truly active subscriptions ({len(expired_ids)} just expired)")
-            
-            for sub in active_subs:
-                try:
-                    start_hour = sub.get("window_start_hour", 0)
-                    end_hour = sub.get("window_end_hour", 6)
-                    player_address = sub.get("player_address", "Unknown")
-                    
-                    # Check if current hour is within the subscription window
-                    in_window = False
-                    if start_hour < end_hour:
-                        in_window = start_hour <= current_hour < end_hour
-                    else:  # Window crosses midnight
-                        in_window = current_hour >= start_hour or current_hour < end_hour
-                    
-                    if not in_window:
-                        logger.info(f"🤖 {player_address[:15]}... outside subscription window ({start_hour}:00-{end_hour}:00)")
-                        continue
-                    
-                    # CHECK GAME TREAT LIMITS using anti_cheat_system
-                    treat_status = await anti_cheat_system.get_daily_treat_status(player_address)
-                    
-                    can_create = treat_status.get("can_create_treat", False)
-                    remaining = treat_status.get("remaining_treats", 0)
-                    window_limit = treat_status.get("window_limit", 4)
-                    treats_in_window = treat_status.get("treats_in_window", 0)
-                    streak_bonus = treat_status.get("streak_bonus", {})
-                    
-                    logger.info(f"🤖 {player_address[:15]}... treats: {treats_in_window}/{window_limit}, remaining: {remaining}, can_create: {can_create}")
-                    
-                    if not can_create or remaining <= 0:
-                        logger.info(f"🤖 {player_address[:15]}... at treat limit, skipping")
-                        continue
-                    
-                    # Get player info
-                    player = await db.players.find_one({"address": player_address})
-                    if not player:
-                        logger.warning(f"Auto-mixer: Player not found: {player_address}")
-                        continue
-                    
-                    player_level = player.get("level", 1)
-                    
-                    # Check player's character bonus (Rex gives rare chance boost)
-                    character_bonuses = player.get("character_bonuses", {})
-                    rare_chance_bonus = character_bonuses.get("rare_chance_bonus", 0.0)
-                    
-                    # Get available ingredients for player level
-                    available_ingredients = ingredient_system.get_unlocked_ingredients(player_level)
-                    
-                    if len(available_ingredients) < 2:
-                        logger.warning(f"Auto-mixer: {player_address[:15]}... not enough ingredients (level {player_level})")
-                        continue
-                    
-                    # Select random ingredients (2-4) with variety
-                    # Shuffle the full list for maximum randomness each cycle
-                    all_ingredient_ids = [ing.id for ing in available_ingredients]
-                    random.shuffle(all_ingredient_ids)
-                    num_ingredients = random.randint(2, min(4, len(all_ingredient_ids)))
-                    selected_ingredients = all_ingredient_ids[:num_ingredients]
-                    
-                    # Create the treat using the game engine with character bonuses
-                    treat_result = game_engine.calculate_treat_outcome(
-                        ingredients=selected_ingredients,
-                        player_level=player_level,
-                        player_address=player_address,
-                        rare_chance_bonus=rare_chance_bonus
-                    )
-                    
-                    rarity = treat_result.get("rarity", "Common")
-                    base_points = treat_result.get("points_reward", 10)
-                    base_xp = treat_result.get("xp_reward", 5)
-                    
-                    # Apply streak XP multiplier
-                    xp_multiplier = streak_bonus.get("xp_multiplier", 1.0)
-                    xp = int(base_xp * xp_multiplier)
-                    points = base_points
-                    
-                    # Name treat based on rarity and ingredients
-                    treat_name = f"{rarity} Auto-Treat"
-                    
-                    # Save the treat (ready to collect)
-                    treat_id = str(uuid.uuid4())
-                    treat_doc = {
-                        "id": treat_id,
-                        "name": treat_name,
-                        "creator_address": player_address,
-                        "ingredients": selected_ingredients,
-                        "rarity": rarity,
-                        "rarity_emoji": treat_result.get("rarity_emoji", ""),
-                        "rarity_color": treat_result.get("rarity_color", ""),
-                        "flavor": treat_result.get("flavor", "Savory"),
-                        "created_at": now,
-                        "ready_at": now,
-                        "image": treat_result.get("image", ""),
-                        "brewing_status": "ready",
-                        "points_reward": points,
-                        "xp_reward": xp,
-                        "auto_mixed": True,
-                        "collected": False
-                    }
-                    
-                    await db.treats.insert_one(treat_doc)
-                    
-                    # Record in auto-mix history
-                    await db.auto_mix_history.insert_one({
-                        "id": str(uuid.uuid4()),
-                        "subscription_id": sub["id"],
-                        "player_address": player_address,
-                        "treat_id": treat_id,
-                        "treat_name": treat_name,
-                        "treat_rarity": rarity,
-                        "points_earned": points,
-                        "xp_earned": xp,
-                        "ingredients": selected_ingredients,
-                        "created_at": now
-                    })
-                    
-                    # Update subscription stats
-                    await db.auto_mixer_subscriptions.update_one(
-                        {"id": sub["id"]},
-                        {"$set": {"last_auto_mix": now}, "$inc": {"total_auto_mixes": 1}}
-                    )
-                    
-                    # Update player streak (same as manual play)
-                    try:
-                        await anti_cheat_system.update_player_streak(player_address)
-                    except:
-                        pass
-                    
-                    logger.info(f"🤖 ✅ Created '{treat_name}' for {player_address[:15]}... ({treats_in_window + 1}/{window_limit} in window)")
-                    
-                except Exception as e:
-                    logger.error(f"🤖 ❌ Error for {sub.get('player_address', 'unknown')[:15]}...: {str(e)}")
-                    import traceback
-                    traceback.print_exc()
-                    continue
-                    
-        except Exception as e:
-            logger.error(f"🤖 ❌ Error in auto-mixer loop: {str(e)}")
-            import traceback
-            traceback.print_exc()
-        
-        # Check every 30 minutes (respects game limits, so no need to check frequently)
-        logger.info("🤖 Auto-mixer sleeping for 30 minutes...")
-        await asyncio.sleep(1800)
-
-
 # =====================================================
 # SPIN THE WHEEL SYSTEM
 # =====================================================
@@ -9509,6 +8942,7 @@ async def spin_the_wheel(data: dict):
                 {"address": player.get("address", player_address)},
                 {"$inc": {"points": selected_prize["value"], "total_points_collected": selected_prize["value"]}}
             )
+            await refresh_leaderboard_entry(player.get("address", player_address))
         reward_applied = True
         reward_details = {"points_awarded": selected_prize["value"]}
 
@@ -9587,8 +9021,9 @@ async def spin_the_wheel(data: dict):
             "emoji": selected_prize.get("emoji", "star"),
             "points_reward": selected_prize["value"] if selected_prize["type"] == "points" else 0,
             "xp_reward": 0,
-            "created_at": now.isoformat(),
+            "created_at": now,
         })
+        response_cache.invalidate("activity_recent")
     except Exception as _feed_err:
         logger.warning(f"Activity feed write failed (spin): {_feed_err}")
 
@@ -9666,6 +9101,7 @@ async def _lab_surge_resolve_stale_run(player_address: str):
             {"address": player.get("address", player_address)},
             {"$inc": {"points": LAB_SURGE_FLOOR_POINTS, "total_points_collected": LAB_SURGE_FLOOR_POINTS}}
         )
+        await refresh_leaderboard_entry(player.get("address", player_address))
     await db.lab_surge_runs.update_one(
         {"_id": stale["_id"]},
         {"$set": {"status": "crashed", "resolved_at": datetime.now(timezone.utc),
@@ -9804,6 +9240,7 @@ async def lab_surge_peek(data: dict):
                 {"address": player.get("address", run["player_address"])},
                 {"$inc": {"points": LAB_SURGE_FLOOR_POINTS, "total_points_collected": LAB_SURGE_FLOOR_POINTS}}
             )
+            await refresh_leaderboard_entry(player.get("address", run["player_address"]))
         await db.lab_surge_runs.update_one(
             {"run_id": run_id},
             {"$set": {"status": "crashed", "resolved_at": now, "points_awarded": LAB_SURGE_FLOOR_POINTS}}
@@ -9847,6 +9284,7 @@ async def lab_surge_cashout(data: dict):
                 {"address": player.get("address", run["player_address"])},
                 {"$inc": {"points": points_awarded, "total_points_collected": points_awarded}}
             )
+            await refresh_leaderboard_entry(player.get("address", run["player_address"]))
         await db.lab_surge_runs.update_one(
             {"run_id": run_id},
             {"$set": {"status": "crashed", "resolved_at": now, "points_awarded": points_awarded}}
@@ -9859,6 +9297,7 @@ async def lab_surge_cashout(data: dict):
             {"address": player.get("address", run["player_address"])},
             {"$inc": {"points": points_awarded, "total_points_collected": points_awarded}}
         )
+        await refresh_leaderboard_entry(player.get("address", run["player_address"]))
     await db.lab_surge_runs.update_one(
         {"run_id": run_id},
         {"$set": {
@@ -9884,8 +9323,9 @@ async def lab_surge_cashout(data: dict):
             "emoji": "chart",
             "points_reward": points_awarded,
             "xp_reward": 0,
-            "created_at": now.isoformat(),
+            "created_at": now,
         })
+        response_cache.invalidate("activity_recent")
     except Exception as _feed_err:
         logger.warning(f"Activity feed write failed (lab_surge): {_feed_err}")
 
@@ -10098,7 +9538,7 @@ async def lab_feed_ingestion_cycle() -> int:
             inserted += 1
 
     logger.info(f"[LabFeed] Ingestion cycle complete: {len(all_posts)} matched across all sources, {inserted} new")
-    _lab_feed_cache["expires_at"] = 0  # invalidate the list cache so new posts show up immediately
+    response_cache.invalidate("lab_feed")  # so new posts show up immediately
     return inserted
 
 
@@ -10113,27 +9553,17 @@ async def lab_feed_ingestion_loop():
         await asyncio.sleep(600)
 
 
-# Simple in-memory cache for the list endpoint: the underlying data only
-# actually changes once per ingestion cycle, so there's no need to hit
-# Mongo on every single request in between.
-_lab_feed_cache: Dict = {"key": None, "data": None, "expires_at": 0}
+# The underlying data only actually changes once per ingestion cycle, so
+# there's no need to hit Mongo on every single request in between.
 LAB_FEED_CACHE_TTL_SECONDS = 60
 
 
 @api_router.get("/lab-feed")
+@response_cache.cached("lab_feed", ttl=LAB_FEED_CACHE_TTL_SECONDS, maxsize=64)
 async def get_lab_feed(limit: int = 20, page: int = 1):
     limit = max(1, min(limit, 50))
     page = max(1, page)
     skip = (page - 1) * limit
-    cache_key = f"{limit}:{page}"
-    now = datetime.now(timezone.utc).timestamp()
-
-    if (
-        _lab_feed_cache["data"] is not None
-        and _lab_feed_cache["key"] == cache_key
-        and now < _lab_feed_cache["expires_at"]
-    ):
-        return _lab_feed_cache["data"]
 
     total = await db.lab_feed_posts.count_documents({})
     cursor = db.lab_feed_posts.find({}, {"_id": 0}).sort("published_at", -1).skip(skip).limit(limit)
@@ -10146,7 +9576,6 @@ async def get_lab_feed(limit: int = 20, page: int = 1):
         "total": total,
         "has_more": skip + len(posts) < total,
     }
-    _lab_feed_cache.update({"key": cache_key, "data": response, "expires_at": now + LAB_FEED_CACHE_TTL_SECONDS})
     return response
 
 
@@ -10290,9 +9719,10 @@ from services import arena_system  # noqa: E402
 
 
 @api_router.get("/arena/current")
+@response_cache.cached("arena_current", ttl=3, maxsize=1)
 async def arena_current():
     arena = await arena_system.get_or_create_current_arena(db)
-    heat = await arena_system.get_or_rotate_heat_event(db)
+    heat = arena_system.get_current_heat_event()
     leaderboard = await arena_system.get_leaderboard(db, limit=20)
     return {
         "arena": arena,
@@ -10307,6 +9737,12 @@ async def arena_leaderboard(limit: int = 50):
     return await arena_system.get_leaderboard(db, limit=min(limit, 100))
 
 
+@api_router.get("/arena/standing/{address}")
+async def arena_standing(address: str, radius: int = 5):
+    address = await _canonical_address(address)
+    return await arena_system.get_player_standing(db, address, radius=max(0, min(radius, 25)))
+
+
 async def _canonical_address(addr: str) -> str:
     """Resolve any caller-supplied address (e.g. lowercase `tg_<id>`,
     uppercase `TG_<id>`, or a wallet) to the address actually stored on the
@@ -10336,6 +9772,7 @@ async def arena_join(payload: dict):
         result = await arena_system.join_arena(db, addr, nickname)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    response_cache.invalidate("arena_current")
     return result
 
 
@@ -10361,8 +9798,19 @@ async def arena_chat_post(payload: dict):
 
 
 @api_router.get("/arena/heat")
-async def arena_heat():
-    return await arena_system.get_or_rotate_heat_event(db)
+async def arena_heat(upcoming: int = 0):
+    return arena_system.get_current_heat_event(upcoming=max(0, min(upcoming, 48)))
+
+
+@api_router.get("/arena/heat/schedule")
+async def arena_heat_schedule(response: Response):
+    """The whole arena day's heat events — fixed for the day, so clients
+    and proxies may cache it until day_ends_at."""
+    schedule = arena_system.get_heat_schedule_for_day()
+    max_age = max(0, int((datetime.fromisoformat(schedule["day_ends_at"])
+                          - datetime.now(timezone.utc)).total_seconds()))
+    response.headers["Cache-Control"] = f"public, max-age={max_age}"
+    return schedule
 
 
 @api_router.post("/arena/predict")
@@ -10587,6 +10035,7 @@ async def open_lab_crate(crate_id: str, body: dict):
     # Grant points
     if points_total > 0 and player_filter:
         await db.players.update_one(player_filter, {"$inc": {"points": points_total}})
+        await refresh_leaderboard_entry((player or {}).get("address") or player_address)
 
     # Grant extra lives
     if lives_total > 0 and player_filter:
@@ -11047,6 +10496,7 @@ async def lab_open_crate(crate_id: str, body: dict):
 
     if points_total > 0 and player_filter:
         await db.players.update_one(player_filter, {"$inc": {"points": points_total}})
+        await refresh_leaderboard_entry((player or {}).get("address") or player_address)
     if lives_total > 0 and player_filter:
         await db.players.update_one(player_filter, {"$inc": {"extra_treats_balance": lives_total}})
     if cosmetics:
@@ -11321,6 +10771,7 @@ async def open_mega_crate(crate_id: str, body: dict):
 
     if points_total > 0 and player_filter:
         await db.players.update_one(player_filter, {"$inc": {"points": points_total}})
+        await refresh_leaderboard_entry((player or {}).get("address") or player_address)
     if lives_total > 0 and player_filter:
         await db.players.update_one(player_filter, {"$inc": {"extra_treats_balance": lives_total}})
 
@@ -11493,7 +10944,7 @@ async def create_lab_note(body: dict):
     await _require_lab_approval(address)
 
     player = await find_player_by_address(address)
-    now = datetime.now(timezone.utc).isoformat()
+    now = datetime.now(timezone.utc)
     note = {
         "id": str(uuid.uuid4()),
         "author_address": address,
@@ -11541,6 +10992,8 @@ async def list_lab_notes(tab: str = "new", player_address: str = None, limit: in
     notes = await cursor.to_list(limit + 1)
     has_more = len(notes) > limit
     notes = notes[:limit]
+    for n in notes:
+        n["created_at"] = datetime_fields.iso_utc(n.get("created_at"))
 
     if player_address and notes:
         note_ids = [n["id"] for n in notes]
@@ -11975,6 +11428,8 @@ async def lab_notes_profile_full(address: str, viewer_address: str = None):
     posts = await db.lab_notes.find(
         {"author_address": {"$regex": f"^{re.escape(address)}$", "$options": "i"}}, {"_id": 0}
     ).sort("created_at", -1).limit(50).to_list(50)
+    for n in posts:
+        n["created_at"] = datetime_fields.iso_utc(n.get("created_at"))
 
     followers_count = await db.lab_follows.count_documents(
         {"following_address": {"$regex": f"^{re.escape(address)}$", "$options": "i"}}
@@ -12072,6 +11527,14 @@ async def startup_event():
         )
         await db.lab_feed_interactions.create_index([("player_address", 1), ("day", 1)])
         await ensure_lab_feed_social_indexes(db)
+        await leaderboard_view.ensure_indexes(db)
+        await datetime_fields.ensure_indexes(db)
+        await notification_dispatcher.ensure_indexes()
+        await player_identity.ensure_indexes()
+        await points_system.ensure_indexes()
+        await season_manager.ensure_indexes()
+        await anti_cheat_system.ensure_indexes()
+        await brew_stream.ensure_indexes()
         logger.info("DB indexes created/verified")
     except Exception as e:
         logger.error(f"Failed to create indexes: {e}")
@@ -12088,13 +11551,16 @@ async def startup_event():
         asyncio.create_task(kernel_scheduler_loop())
         logger.info("🎯 Kernel of Wow background scheduler started")
         
-        # Start the notification processor loop
-        asyncio.create_task(notification_processor_loop())
-        logger.info("🔔 Notification processor started")
+        # Start the notification dispatcher
+        asyncio.create_task(notification_dispatcher.run_loop())
+        logger.info("🔔 Notification dispatcher started")
         
-        # Start the auto-mixer processor loop
-        asyncio.create_task(auto_mixer_processor_loop())
-        logger.info("🤖 Auto-mixer processor started")
+        # One-time rewrite of legacy ISO-string timestamps as BSON dates
+        asyncio.create_task(datetime_fields.run_startup_migration(db))
+
+        # Start the auto-mix scheduler
+        asyncio.create_task(auto_mix_scheduler.run_loop())
+        logger.info("🤖 Auto-mix scheduler started")
 
         asyncio.create_task(lab_feed_ingestion_loop())
         logger.info("📰 Lab Feed ingestion scheduled (every 10 minutes)")
@@ -12106,6 +11572,22 @@ async def startup_event():
         except Exception as _heat_sched_err:
             logger.error(f"🔥 Heat scheduler failed to start: {_heat_sched_err}")
 
+        # Write buffered arena score credits every few hundred ms
+        asyncio.create_task(arena_system.run_score_flush_loop(db))
+
+        # Rebuild the materialized leaderboard now and reconcile it periodically
+        asyncio.create_task(leaderboard_view.run_reconcile_loop(db))
+        logger.info("🏆 Leaderboard reconcile loop started")
+
+        # Flip brewing treats to ready on time (server-side, read-only GETs),
+        # notify their owners and push it to SSE subscribers
+        asyncio.create_task(brew_stream.run_timer_loop())
+        logger.info("⏲️ Brew completion sweep started")
+
+        # Backfill season_daily_rollups, then compact each finished day nightly
+        asyncio.create_task(season_manager.run_rollup_compaction_loop())
+        logger.info("📅 Season rollup compaction scheduled")
+
         # Start the Lab Launcher on-chain indexer (no-ops safely if the
         # DOGEOS_RPC_URL / LAB_LAUNCHER_*_ADDRESS env vars aren't set yet)
         asyncio.create_task(lab_launcher_indexer.run_forever())
@@ -12125,6 +11607,12 @@ async def startup_event():
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    try:
+        await arena_system.flush_arena_scores(db)
+    except Exception as e:
+        logger.warning(f"Arena score flush on shutdown failed: {e}")
+    await telegram_sender.close()
+    web_push_sender.close()
     client.close()
     logger.info("Database connection closed")
 
@@ -6,14 +6,23 @@ Includes streak bonus system for daily players
 """
 
 import asyncio
+import math
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from dataclasses import dataclass
 import logging
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+
+from services.treat_rate_window import TreatRateWindow
 
 logger = logging.getLogger(__name__)
 
+# Marks a prefetched_* argument the caller didn't supply (None is a real
+# answer for some lookups, e.g. "not blocked")
+_NOT_PREFETCHED = object()
+
 # Treat limit constants - NEW SYSTEM
 WINDOW_TREAT_LIMIT = 4  # Base limit per 6-hour window
 WINDOW_HOURS = 6  # Hours per window
@@ -21,6 +30,18 @@ MAX_DAILY_TREATS = 16  # Maximum treats per 24 hours (4 windows x 4 treats)
 EXTRA_LIFE_TREATS = 3  # Additional treats per extra life purchase
 EXTRA_LIFE_COST_LAB = 5000  # Cost in $LAB tokens (not active yet)
 
+# Risk scoring - a per-player counter that decays exponentially; with a 24h
+# time constant a steady violation rate scores the same as a 24h sum.
+SEVERITY_WEIGHTS = {"low": 1, "medium": 5, "high": 15}
+RISK_DECAY_SECONDS = 24 * 3600
+RISK_HIGH_THRESHOLD = 50
+RISK_MEDIUM_THRESHOLD = 20
+RISK_DOC_TTL_SECONDS = 7 * 24 * 3600  # score has decayed below 0.1% by then
+
+# How stale the in-process block list may get before it is reloaded (blocks
+# made on this process apply immediately; other workers' within this bound)
+BLOCK_LIST_REFRESH_SECONDS = 30
+
 # Streak bonus constants
 STREAK_BONUSES = {
     1: {"bonus_treats": 0, "xp_multiplier": 1.0, "brewing_reduction": 0, "title": "New Chef"},
@@ -66,6 +87,48 @@ class AntiCheatSystem:
         
         # Player activity cache
         self.player_cache = {}
+        # Creation timestamps + ingredients per player for the limit checks
+        self.rate_window = TreatRateWindow(db)
+        # Active block records by address, mirrored from blocked_players
+        self._blocked: Dict[str, Dict] = {}
+        self._blocked_loaded_at: Optional[float] = None
+        self._blocked_lock = asyncio.Lock()
+
+    async def ensure_indexes(self):
+        await self.rate_window.ensure_indexes()
+        await self.db.player_risk_scores.create_index(
+            "updated_at", expireAfterSeconds=RISK_DOC_TTL_SECONDS
+        )
+
+    async def _blocked_records(self) -> Dict[str, Dict]:
+        """The active block list, reloaded at most every
+        BLOCK_LIST_REFRESH_SECONDS."""
+        if self._blocked_is_fresh():
+            return self._blocked
+        async with self._blocked_lock:
+            if not self._blocked_is_fresh():
+                docs = await self.db.blocked_players.find(
+                    {"is_active": True}, {"_id": 0}
+                ).to_list(None)
+                self._blocked = {d["player_address"]: d for d in docs if d.get("player_address")}
+                self._blocked_loaded_at = time.monotonic()
+        return self._blocked
+
+    def _blocked_is_fresh(self) -> bool:
+        return (self._blocked_loaded_at is not None
+                and time.monotonic() - self._blocked_loaded_at < BLOCK_LIST_REFRESH_SECONDS)
+
+    async def record_treat_creation(self, player_address: str, created_at=None, ingredients: List[str] = None):
+        """Feed a new treat into the player's sliding window. Call after every
+        treat insert."""
+        await self.rate_window.record(player_address, created_at, ingredients)
+
+    async def record_treat_creations(self, treats: List[Dict]):
+        """record_treat_creation() for a batch of inserted treat docs."""
+        await self.rate_window.record_many([
+            (t.get("creator_address"), t.get("created_at"), t.get("ingredients"))
+            for t in treats
+        ])
 
     async def is_player_blocked(self, player_address: str) -> Optional[Dict]:
         """Check whether a player is currently blocked from gated actions
@@ -73,9 +136,7 @@ class AntiCheatSystem:
         block record if blocked, otherwise None."""
         if not player_address:
             return None
-        return await self.db.blocked_players.find_one(
-            {"player_address": player_address, "is_active": True}
-        )
+        return (await self._blocked_records()).get(player_address)
 
     async def block_player(self, player_address: str, reason: str, blocked_by: str = "system") -> Dict:
         """Block a player address. Upserts, so re-blocking an already
@@ -89,21 +150,26 @@ class AntiCheatSystem:
             "blocked_at": now,
             "is_active": True,
         }
-        await self.db.blocked_players.update_one(
-            {"player_address": player_address},
-            {"$set": record},
-            upsert=True,
-        )
+        # Under the lock so a concurrent block-list reload can't drop it
+        async with self._blocked_lock:
+            await self.db.blocked_players.update_one(
+                {"player_address": player_address},
+                {"$set": record},
+                upsert=True,
+            )
+            self._blocked[player_address] = record
         logger.warning(f"🚫 Player blocked: {player_address} - {reason}")
         return record
 
     async def unblock_player(self, player_address: str) -> bool:
         """Lift a block on a player address. Returns True if a block was
         actually lifted, False if the player wasn't blocked."""
-        result = await self.db.blocked_players.update_one(
-            {"player_address": player_address, "is_active": True},
-            {"$set": {"is_active": False, "unblocked_at": datetime.utcnow()}}
-        )
+        async with self._blocked_lock:
+            result = await self.db.blocked_players.update_one(
+                {"player_address": player_address, "is_active": True},
+                {"$set": {"is_active": False, "unblocked_at": datetime.utcnow()}}
+            )
+            self._blocked.pop(player_address, None)
         if result.modified_count:
             logger.info(f"✅ Player unblocked: {player_address}")
         return result.modified_count > 0
@@ -111,10 +177,7 @@ class AntiCheatSystem:
     async def get_blocked_addresses(self) -> set:
         """Return the set of currently-blocked player addresses/identifiers.
         Used to filter eligibility pools such as Kernel of Wow selection."""
-        docs = await self.db.blocked_players.find(
-            {"is_active": True}, {"player_address": 1}
-        ).to_list(10000)
-        return {d["player_address"] for d in docs if d.get("player_address")}
+        return set(await self._blocked_records())
 
     async def get_daily_treat_status(self, player_address: str, prefetched_player=None, prefetched_treats_24h=None) -> Dict:
         """
@@ -126,16 +189,12 @@ class AntiCheatSystem:
         """
         now = datetime.utcnow()
         
-        # Use prefetched treats or fetch from DB
-        if prefetched_treats_24h is not None:
-            treats_last_24h = prefetched_treats_24h
-            cutoff_6h = now - timedelta(hours=WINDOW_HOURS)
-            treats_last_6h = [t for t in treats_last_24h if t.get("created_at", now) >= cutoff_6h]
-        else:
-            treats_last_24h, treats_last_6h = await asyncio.gather(
-                self._get_recent_treats(player_address, hours=24),
-                self._get_recent_treats(player_address, hours=WINDOW_HOURS)
-            )
+        # Use prefetched treats or the player's sliding window
+        treats_last_24h = prefetched_treats_24h
+        if treats_last_24h is None:
+            treats_last_24h = await self.rate_window.recent(player_address, hours=24)
+        cutoff_6h = now - timedelta(hours=WINDOW_HOURS)
+        treats_last_6h = [t for t in treats_last_24h if t.get("created_at", now) >= cutoff_6h]
         
         treats_in_window = len(treats_last_6h)
         treats_today = len(treats_last_24h)
@@ -252,32 +311,16 @@ class AntiCheatSystem:
             "streak_active": streak_active
         }
     
-    async def update_player_streak(self, player_address: str, prefetched_player=None) -> Dict:
+    def compute_streak_update(self, player) -> tuple:
         """
-        Update player's streak when they play (create a treat)
-        Returns the updated streak info with bonuses.
-        Accepts prefetched player to avoid duplicate DB call.
+        Work out the streak change for a player creating a treat now,
+        without writing it. Returns (streak_result, fields_to_set).
         """
-        player = prefetched_player
-        if player is None:
-            player = await self.db.players.find_one({"address": player_address})
         now = datetime.utcnow()
         today = now.date()
         
         if not player:
             # Create new player streak record
-            await self.db.players.update_one(
-                {"address": player_address},
-                {
-                    "$set": {
-                        "current_streak": 1,
-                        "longest_streak": 1,
-                        "last_play_date": now,
-                        "streak_started_at": now
-                    }
-                },
-                upsert=True
-            )
             streak_bonus = get_streak_bonus(1)
             return {
                 "current_streak": 1,
@@ -285,6 +328,11 @@ class AntiCheatSystem:
                 "streak_bonus": streak_bonus,
                 "streak_increased": True,
                 "message": "Welcome! Your streak begins! 🔥"
+            }, {
+                "current_streak": 1,
+                "longest_streak": 1,
+                "last_play_date": now,
+                "streak_started_at": now
             }
         
         last_play_date = player.get("last_play_date")
@@ -325,18 +373,6 @@ class AntiCheatSystem:
             streak_increased = True
             message = "Welcome! Your streak begins! 🔥"
         
-        # Update database
-        await self.db.players.update_one(
-            {"address": player_address},
-            {
-                "$set": {
-                    "current_streak": current_streak,
-                    "longest_streak": longest_streak,
-                    "last_play_date": now
-                }
-            }
-        )
-        
         streak_bonus = get_streak_bonus(current_streak)
         
         return {
@@ -345,8 +381,30 @@ class AntiCheatSystem:
             "streak_bonus": streak_bonus,
             "streak_increased": streak_increased,
             "message": message
+        }, {
+            "current_streak": current_streak,
+            "longest_streak": longest_streak,
+            "last_play_date": now
         }
     
+    async def update_player_streak(self, player_address: str, prefetched_player=None) -> Dict:
+        """
+        Update player's streak when they play (create a treat)
+        Returns the updated streak info with bonuses.
+        Accepts prefetched player to avoid duplicate DB call.
+        """
+        player = prefetched_player
+        if player is None:
+            player = await self.db.players.find_one({"address": player_address})
+        
+        streak_result, streak_fields = self.compute_streak_update(player)
+        await self.db.players.update_one(
+            {"address": player_address},
+            {"$set": streak_fields},
+            upsert=not player
+        )
+        return streak_result
+    
     async def purchase_extra_life(self, player_address: str) -> Dict:
         """
         Purchase an extra life for 5000 $LAB (placeholder - not functional yet)
@@ -365,6 +423,20 @@ class AntiCheatSystem:
             "current_status": status
         }
     
+    def needs_extra_treat(self, player, treats_24h: List[Dict]) -> bool:
+        """True when this creation is over the base window limit and has to
+        spend one of the player's purchased extra treats."""
+        now = datetime.utcnow()
+        cutoff_6h = now - timedelta(hours=WINDOW_HOURS)
+        treats_in_window = sum(1 for t in treats_24h if t.get("created_at", now) >= cutoff_6h)
+        
+        streak_info = self._compute_streak_from_player(player)
+        streak_bonus = get_streak_bonus(streak_info["current_streak"])
+        base_window_limit = WINDOW_TREAT_LIMIT + streak_bonus["bonus_treats"]
+        
+        extra_balance = player.get("extra_treats_balance", 0) if player else 0
+        return treats_in_window >= base_window_limit and extra_balance > 0
+    
     async def consume_extra_treat_if_needed(self, player_address: str, prefetched_player=None, prefetched_treats_24h=None) -> Dict:
         """
         Check if player needs to use an extra treat for this creation.
@@ -372,46 +444,37 @@ class AntiCheatSystem:
         Returns: {"consumed": bool, "remaining_balance": int}
         Accepts prefetched data to avoid duplicate DB calls.
         """
-        now = datetime.utcnow()
+        # Use prefetched treats or the player's sliding window
+        treats = prefetched_treats_24h
+        if treats is None:
+            treats = await self.rate_window.recent(player_address, hours=WINDOW_HOURS)
         
-        # Use prefetched treats or fetch from DB
-        if prefetched_treats_24h is not None:
-            cutoff_6h = now - timedelta(hours=WINDOW_HOURS)
-            treats_last_6h = [t for t in prefetched_treats_24h if t.get("created_at", now) >= cutoff_6h]
-        else:
-            treats_last_6h = await self._get_recent_treats(player_address, hours=WINDOW_HOURS)
-        treats_in_window = len(treats_last_6h)
-        
-        # Get streak from player data directly
         player = prefetched_player
         if player is None:
             player = await self.db.players.find_one({"address": player_address})
-        streak_info = self._compute_streak_from_player(player)
-        streak_bonus = get_streak_bonus(streak_info["current_streak"])
-        base_window_limit = WINDOW_TREAT_LIMIT + streak_bonus["bonus_treats"]
         
-        # Check if over base limit
-        if treats_in_window >= base_window_limit:
-            extra_balance = player.get("extra_treats_balance", 0) if player else 0
-            
-            if extra_balance > 0:
-                await self.db.players.update_one(
-                    {"address": player_address},
-                    {"$inc": {"extra_treats_balance": -1}}
-                )
-                return {"consumed": True, "remaining_balance": extra_balance - 1}
+        if self.needs_extra_treat(player, treats):
+            await self.db.players.update_one(
+                {"address": player_address},
+                {"$inc": {"extra_treats_balance": -1}}
+            )
+            return {"consumed": True, "remaining_balance": player.get("extra_treats_balance", 0) - 1}
         
         return {"consumed": False, "remaining_balance": 0}
     
-    async def validate_treat_creation(self, player_address: str, treat_data: Dict, prefetched_player=None, prefetched_treats_24h=None) -> Dict:
+    async def validate_treat_creation(self, player_address: str, treat_data: Dict, prefetched_player=None, prefetched_treats_24h=None,
+                                      prefetched_block_record=_NOT_PREFETCHED) -> Dict:
         """
         Validate treat creation for anti-cheat
         Returns: {"valid": bool, "reason": str, "severity": str}
-        Accepts prefetched data to avoid duplicate DB calls.
+        Accepts prefetched data (including the is_player_blocked() result)
+        to avoid duplicate DB calls.
         """
         # Check 0: Player is blocked — reject immediately, before any
         # other work (window limits, rate checks, DB fetches for treats).
-        block_record = await self.is_player_blocked(player_address)
+        block_record = prefetched_block_record
+        if block_record is _NOT_PREFETCHED:
+            block_record = await self.is_player_blocked(player_address)
         if block_record:
             return {
                 "valid": False,
@@ -426,12 +489,11 @@ class AntiCheatSystem:
 
         now = datetime.utcnow()
         
-        # Use prefetched treats or fetch from DB
-        if prefetched_treats_24h is not None:
-            cutoff_1h = now - timedelta(hours=1)
-            recent_treats = [t for t in prefetched_treats_24h if t.get("created_at", now) >= cutoff_1h]
-        else:
-            recent_treats = await self._get_recent_treats(player_address, hours=1)
+        # Use prefetched treats or the player's sliding window
+        if prefetched_treats_24h is None:
+            prefetched_treats_24h = await self.rate_window.recent(player_address, hours=24)
+        cutoff_1h = now - timedelta(hours=1)
+        recent_treats = [t for t in prefetched_treats_24h if t.get("created_at", now) >= cutoff_1h]
         
         violations = []
         
@@ -509,7 +571,7 @@ class AntiCheatSystem:
         
         # Log violations
         if violations:
-            await self._log_suspicious_activity(player_address, violations)
+            risk = await self._log_suspicious_activity(player_address, violations)
 
             # Auto-block repeat offenders: if this player's 24h risk score
             # is now "high" (>=50, e.g. 4+ high-severity violations),
@@ -517,7 +579,6 @@ class AntiCheatSystem:
             # rejection that a script can just keep retrying against.
             # get_player_risk_score() already existed but wasn't wired to
             # any consequence — this closes that gap.
-            risk = await self.get_player_risk_score(player_address)
             if risk["risk_level"] == "high":
                 await self.block_player(
                     player_address,
@@ -627,33 +688,34 @@ class AntiCheatSystem:
     
     async def get_player_risk_score(self, player_address: str) -> Dict:
         """
-        Calculate overall risk score for a player based on historical activity
+        Current risk score for a player, read from their decaying counter
         """
-        
-        # Get all suspicious activities for player in last 24 hours
-        recent_activities = await self.db.suspicious_activities.find({
-            "player_address": player_address,
-            "timestamp": {"$gte": datetime.utcnow() - timedelta(hours=24)}
-        }).to_list(100)
-        
-        risk_score = 0
-        severity_weights = {"low": 1, "medium": 5, "high": 15}
-        
-        for activity in recent_activities:
-            risk_score += severity_weights.get(activity.get("severity", "low"), 1)
+        counter = await self.db.player_risk_scores.find_one({"_id": player_address})
+        return self._risk_summary(player_address, counter, datetime.utcnow())
+
+    def _risk_summary(self, player_address: str, counter: Optional[Dict], now: datetime) -> Dict:
+        """Decay a player_risk_scores doc to `now` and grade it."""
+        risk_score, violations, last_violation = 0.0, 0.0, None
+        if counter:
+            elapsed = max(0.0, (now - counter["updated_at"]).total_seconds())
+            decay = math.exp(-elapsed / RISK_DECAY_SECONDS)
+            risk_score = counter.get("score", 0) * decay
+            violations = counter.get("violations", 0) * decay
+            last_violation = counter.get("last_violation")
+        risk_score = round(risk_score, 2)
         
         risk_level = "low"
-        if risk_score >= 50:
+        if risk_score >= RISK_HIGH_THRESHOLD:
             risk_level = "high"
-        elif risk_score >= 20:
+        elif risk_score >= RISK_MEDIUM_THRESHOLD:
             risk_level = "medium"
         
         return {
             "player_address": player_address,
             "risk_score": risk_score,
             "risk_level": risk_level,
-            "recent_violations": len(recent_activities),
-            "last_violation": recent_activities[0]["timestamp"] if recent_activities else None
+            "recent_violations": int(round(violations)),
+            "last_violation": last_violation
         }
     
     async def _get_recent_treats(self, player_address: str, hours: int = 1) -> List[Dict]:
@@ -713,19 +775,42 @@ class AntiCheatSystem:
         
         return int(base_xp * level_multiplier * max_rarity_bonus)
     
-    async def _log_suspicious_activity(self, player_address: str, violations: List[Dict]):
-        """Log suspicious activity to database"""
+    async def _log_suspicious_activity(self, player_address: str, violations: List[Dict]) -> Dict:
+        """Log suspicious activity to database and fold it into the player's
+        risk counter. Returns the updated risk score."""
+        now = datetime.utcnow()
+        activities = [{
+            "player_address": player_address,
+            "activity_type": violation["type"],
+            "timestamp": now,
+            "details": violation["details"],
+            "severity": violation["severity"]
+        } for violation in violations]
+        weight = sum(SEVERITY_WEIGHTS.get(v["severity"], 1) for v in violations)
+
+        # Decay the stored counter to `now` and add this batch in one atomic
+        # pipeline update, so concurrent workers never lose an increment
+        decay = {"$exp": {"$divide": [
+            {"$subtract": [{"$ifNull": ["$updated_at", now]}, now]},
+            RISK_DECAY_SECONDS * 1000,
+        ]}}
+        _, counter = await asyncio.gather(
+            self.db.suspicious_activities.insert_many(activities),
+            self.db.player_risk_scores.find_one_and_update(
+                {"_id": player_address},
+                [{"$set": {
+                    "score": {"$add": [{"$multiply": [{"$ifNull": ["$score", 0]}, decay]}, weight]},
+                    "violations": {"$add": [{"$multiply": [{"$ifNull": ["$violations", 0]}, decay]}, len(violations)]},
+                    "updated_at": now,
+                    "last_violation": now,
+                }}],
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            ),
+        )
         for violation in violations:
-            activity = {
-                "player_address": player_address,
-                "activity_type": violation["type"],
-                "timestamp": datetime.utcnow(),
-                "details": violation["details"],
-                "severity": violation["severity"]
-            }
-            
-            await self.db.suspicious_activities.insert_one(activity)
             logger.warning(f"Suspicious activity detected: {player_address} - {violation['type']}")
+        return self._risk_summary(player_address, counter, now)
     
     async def cleanup_old_logs(self, days: int = 7):
         """Clean up old suspicious activity logs"""
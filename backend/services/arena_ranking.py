@@ -0,0 +1,78 @@
+"""
+DogeFood Lab — in-process ranking of the active arena
+Entries kept sorted by (-points, player_address) so top, rank and
+neighbour lookups are answered from memory; arena_entries stays durable.
+"""
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+
+def _key(entry: Dict) -> Tuple[int, str]:
+    return (-int(entry.get("points") or 0), entry["player_address"])
+
+
+class ArenaRanking:
+    def __init__(self):
+        self.arena_id: Optional[str] = None
+        self.arena: Optional[Dict] = None
+        self._entries: Dict[str, Dict] = {}
+        self._order: List[Tuple[int, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def reset(self, arena: Optional[Dict], entries: List[Dict]) -> None:
+        """Replace everything with `arena` and its full list of entries."""
+        self.arena_id = arena["id"] if arena else None
+        self.arena = arena
+        self._entries = {e["player_address"]: dict(e) for e in entries}
+        self._order = sorted(_key(e) for e in self._entries.values())
+
+    def upsert(self, entry: Dict) -> None:
+        """Insert an entry or replace it with a fresher copy from the DB."""
+        addr = entry["player_address"]
+        old = self._entries.get(addr)
+        if old is not None:
+            self._remove_key(_key(old))
+        self._entries[addr] = dict(entry)
+        insort(self._order, _key(entry))
+
+    def apply_credit(self, player_address: str, points: int, win_streak: int, last_active_at: str) -> None:
+        """Mirror a score credit; players without an entry are ignored, as the
+        arena_entries update would be."""
+        entry = self._entries.get(player_address)
+        if entry is None:
+            return
+        self._remove_key(_key(entry))
+        entry["points"] = int(entry.get("points") or 0) + points
+        if win_streak:
+            entry["win_streak"] = int(entry.get("win_streak") or 0) + win_streak
+        entry["last_active_at"] = last_active_at
+        insort(self._order, _key(entry))
+
+    def _remove_key(self, key: Tuple[int, str]) -> None:
+        idx = bisect_left(self._order, key)
+        if idx < len(self._order) and self._order[idx] == key:
+            del self._order[idx]
+
+    def _ranked(self, start: int, stop: int) -> List[Dict]:
+        return [
+            {**self._entries[addr], "rank": start + i + 1}
+            for i, (_, addr) in enumerate(self._order[start:stop])
+        ]
+
+    def top(self, limit: int) -> List[Dict]:
+        return self._ranked(0, limit)
+
+    def rank_of(self, player_address: str) -> Optional[int]:
+        entry = self._entries.get(player_address)
+        if entry is None:
+            return None
+        return bisect_left(self._order, _key(entry)) + 1
+
+    def around(self, player_address: str, radius: int = 5) -> List[Dict]:
+        """The player's entry and up to `radius` entries either side."""
+        rank = self.rank_of(player_address)
+        if rank is None:
+            return []
+        return self._ranked(max(0, rank - 1 - radius), rank + radius)
@@ -4,10 +4,21 @@ DogeFood Lab — Lab Arena System (Phase 1)
 and "Heat Events". No streaming yet (Phase 2).
 """
 from datetime import datetime, timedelta, timezone
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
+import asyncio
+import logging
 import uuid
 import random
 import re
+import time
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from services import leaderboard_view, response_cache
+from services.arena_ranking import ArenaRanking
+
+logger = logging.getLogger(__name__)
 
 ENTRY_FEE_POINTS      = 50
 ARENA_DURATION_HOURS  = 24
@@ -33,6 +44,17 @@ HEAT_EVENTS = [
     {"id": "idle_calm",   "name": "Calm Phase",     "blurb": "Standard rates — strategize",    "color": "#94a3b8", "intensity": "low"},
 ]
 HEAT_EVENT_DURATION_MIN = 30
+# What each heat event does: rare-chance bonus and brewing-time factor at
+# brew time, points multiplier at collect time
+HEAT_RARE_CHANCE_BONUS   = {"lab_surge": 0.10, "crit_state": 0.20}
+HEAT_TIMER_FACTOR        = {"overclock": 0.50}
+HEAT_COLLECT_POINTS_MULT = {"golden_hour": 2, "crit_state": 1.5}
+# Character + heat rare-chance bonus never exceeds this
+RARE_CHANCE_BONUS_CAP    = 0.60
+# How long the in-process active-arena snapshot is trusted before the next
+# caller re-reads it. The heat scheduler refreshes it on every pass, so this
+# only matters for changes made by another worker.
+ACTIVE_ARENA_TTL_SECONDS = 15
 
 _BANNED_PATTERNS = [re.compile(r"\b(spam|scam|hack)\b", re.IGNORECASE)]
 
@@ -65,13 +87,54 @@ def _parse_dt(val) -> datetime:
         return datetime.min.replace(tzinfo=timezone.utc)
 
 
+# ─── Active arena snapshot ──────────────────────────────────────────────────
+# Treat creation and collection need the active arena id on every call. It
+# only changes at the daily rollover, so it is held in process instead of
+# read from arena_sessions each time.
+
+_ACTIVE_PROJECTION = {"_id": 0, "id": 1, "ends_at": 1}
+_active_arena: Dict = {"arena": None, "loaded_at": 0.0}
+
+
+def _remember_active_arena(arena: Optional[dict]) -> None:
+    """Record the active arena (or None) as of now."""
+    snapshot = None
+    if arena:
+        snapshot = {k: arena.get(k) for k in _ACTIVE_PROJECTION if k != "_id"}
+    _active_arena.update({"arena": snapshot, "loaded_at": time.monotonic()})
+
+
+def _forget_active_arena() -> None:
+    _active_arena.update({"arena": None, "loaded_at": 0.0})
+
+
+def _active_arena_is_fresh() -> bool:
+    if time.monotonic() - _active_arena["loaded_at"] > ACTIVE_ARENA_TTL_SECONDS:
+        return False
+    arena = _active_arena["arena"]
+    if arena is None:
+        return True
+    return _parse_dt(arena.get("ends_at")) > _utcnow()
+
+
+async def _get_active_arena(db) -> Optional[dict]:
+    """Active arena id / ends_at, re-read at most every
+    ACTIVE_ARENA_TTL_SECONDS (sooner once the arena expires)."""
+    if not _active_arena_is_fresh():
+        arena = await db.arena_sessions.find_one({"status": "active"}, _ACTIVE_PROJECTION)
+        _remember_active_arena(arena)
+    return _active_arena["arena"]
+
+
 # ─── Arena lifecycle ────────────────────────────────────────────────────────
 
 async def get_or_create_current_arena(db) -> dict:
-    """Returns the active arena document, settling and rolling over if expired.
+    """Returns the active arena document, rolling over if expired.
 
     Uses an atomic findOneAndUpdate to claim the settle lock so concurrent
-    requests cannot double-settle the same arena.
+    requests cannot double-settle the same arena. Settlement itself runs in
+    the background; the request that noticed the rollover only pays for
+    creating the next arena.
     """
     now = _utcnow()
 
@@ -81,18 +144,19 @@ async def get_or_create_current_arena(db) -> dict:
     if active:
         ends_at = _parse_dt(active.get("ends_at"))
         if ends_at > now:
+            _remember_active_arena(active)
             return active   # still running — fast path
 
         # Expired: atomically claim the settle lock by flipping status to
         # "settling".  Only the request that wins this update proceeds.
         claimed = await db.arena_sessions.find_one_and_update(
             {"id": active["id"], "status": "active"},
-            {"$set": {"status": "settling"}},
+            {"$set": {"status": "settling", "settle_claimed_at": now}},
             return_document=True,
         )
         if claimed:
-            # We won the race — do the settle
-            await settle_arena(db, active["id"])
+            # We won the race — settle off the request path
+            _settle_in_background(db, active["id"])
         else:
             # Another request is already settling — just wait and fall through
             # to create a new arena below (find_one will return None or settling doc)
@@ -113,45 +177,101 @@ async def get_or_create_current_arena(db) -> dict:
         "status":               "active",
         "prize_pool":           0,
         "entries_count":        0,
-        "heat_event":           _pick_heat_event(started),
-        "heat_event_started_at": started.isoformat(),
     }
     await db.arena_sessions.insert_one(dict(arena))
     arena.pop("_id", None)
+    _remember_active_arena(arena)
     return arena
 
 
-async def settle_arena(db, arena_id: str) -> dict:
-    """
-    Finalize an arena:
-      1. Distribute the actual prize_pool by percentage split (not hardcoded amounts)
-      2. Settle pending predictions: rank-1 winner's predictors get 3× payout
-      3. Mark arena as 'settled' with ISO timestamp
+# ─── Settlement ─────────────────────────────────────────────────────────────
+# Settlement is planned once and then applied in steps, each recorded on a
+# journal doc in arena_settlements (keyed by arena id):
+#
+#   plan         rewards, mystery winners, prediction outcomes and feed
+#                entries, fixed before anything is written so a resumed
+#                settle pays exactly what the first attempt would have
+#   credits      one $inc per player in a single bulk_write; each op is
+#                guarded by the arena id on the player doc, so replaying it
+#                after a crash skips the players already paid
+#   predictions  one bulk_write of status updates (pending rows only)
+#   feed         one insert_many of the feed entries not already written
+#
+# An arena left in "settling" (crash, redeploy) is re-claimed once its
+# settle_claimed_at is older than SETTLE_LEASE_SECONDS and picked up where
+# its journal stopped.
+
+SETTLE_LEASE_SECONDS = 300
+# Arena ids remembered on each player doc for the credit guard. Only the
+# arena being settled is ever checked, so a handful is plenty.
+SETTLED_ARENA_IDS_KEPT = 5
+
+_settle_tasks: set = set()
+
+
+def _settle_in_background(db, arena_id: str) -> None:
+    task = asyncio.create_task(_run_settlement(db, arena_id))
+    _settle_tasks.add(task)
+    task.add_done_callback(_settle_tasks.discard)
+
+
+async def _run_settlement(db, arena_id: str) -> None:
+    try:
+        await settle_arena(db, arena_id)
+        logger.info(f"🏟️ Arena {arena_id} settled")
+    except Exception as exc:
+        logger.warning(f"🏟️ Arena {arena_id} settlement failed (will resume after lease): {exc}")
 
-    The race condition is handled upstream in get_or_create_current_arena via
-    the atomic 'settling' status flip — by the time we get here we are the
-    only coroutine running this for this arena_id.
-    """
-    arena = await db.arena_sessions.find_one(
-        {"id": arena_id, "status": "settling"}, {"_id": 0}
-    )
-    if not arena:
-        # Already settled or doesn't exist
-        return {}
 
+async def resume_stuck_settlements(db) -> int:
+    """Re-claim and finish arenas whose settlement lease expired. Returns
+    how many were resumed."""
+    resumed = 0
+    while True:
+        now = _utcnow()
+        claimed = await db.arena_sessions.find_one_and_update(
+            {"status": "settling", "$or": [
+                {"settle_claimed_at": None},
+                {"settle_claimed_at": {"$lt": now - timedelta(seconds=SETTLE_LEASE_SECONDS)}},
+            ]},
+            {"$set": {"settle_claimed_at": now}},
+            projection={"_id": 0, "id": 1},
+        )
+        if not claimed:
+            return resumed
+        logger.info(f"🏟️ Resuming settlement of arena {claimed['id']}")
+        await settle_arena(db, claimed["id"])
+        resumed += 1
+
+
+def _feed_entry(**fields) -> dict:
+    return {
+        "id":            str(uuid.uuid4()),
+        "xp_reward":     0,
+        "rarity":        None,
+        "created_at":    _utcnow(),
+        **fields,
+    }
+
+
+async def _plan_settlement(db, arena: dict) -> dict:
+    """Work out everything settle_arena will write, without writing it."""
+    arena_id   = arena["id"]
     prize_pool = int(arena.get("prize_pool", 0))
 
+    # Same order as ArenaRanking, so ties are paid the rank /arena/standing showed
     entries = await db.arena_entries.find(
-        {"arena_id": arena_id}, {"_id": 0}
-    ).sort("points", -1).to_list(length=10000)
+        {"arena_id": arena_id}, {"_id": 0, "player_address": 1, "nickname": 1}
+    ).sort([("points", -1), ("player_address", 1)]).to_list(length=10000)
 
-    rewards = []
+    rewards: List[dict] = []
+    predictions: List[dict] = []
+    feed: List[dict] = []
 
     if entries:
         # ── Ranked rewards from prize pool ────────────────────────────────
-        for idx, entry in enumerate(entries):
+        for idx, entry in enumerate(entries[:RANKS_FOR_INGREDIENTS_MAX]):
             rank = idx + 1
-            addr = entry["player_address"]
             reward_pts = 0
             reward_kind = "points"
 
@@ -164,12 +284,8 @@ async def settle_arena(db, arena_id: str) -> dict:
                 reward_kind = "points+ingredient"
 
             if reward_pts > 0:
-                await db.players.update_one(
-                    {"address": addr},
-                    {"$inc": {"points": reward_pts}}
-                )
                 rewards.append({
-                    "address":  addr,
+                    "address":  entry["player_address"],
                     "nickname": entry.get("nickname") or "Anonymous",
                     "rank":     rank,
                     "points":   reward_pts,
@@ -183,10 +299,6 @@ async def settle_arena(db, arena_id: str) -> dict:
             mystery_count = max(1, len(lower_players) // 10)
             mystery_per   = max(1, mystery_pool_pts // mystery_count)
             for winner in random.sample(lower_players, min(mystery_count, len(lower_players))):
-                await db.players.update_one(
-                    {"address": winner["player_address"]},
-                    {"$inc": {"points": mystery_per}}
-                )
                 rewards.append({
                     "address":  winner["player_address"],
                     "nickname": winner.get("nickname") or "Anonymous",
@@ -195,77 +307,174 @@ async def settle_arena(db, arena_id: str) -> dict:
                     "kind":     "mystery",
                 })
 
-        # ── Settle predictions ────────────────────────────────────────────
+        # ── Prediction outcomes: rank-1 winner's predictors get 3× ────────
         winner_addr = entries[0]["player_address"]
-        preds = await db.arena_predictions.find(
-            {"arena_id": arena_id, "status": "pending"}, {"_id": 0}
-        ).to_list(length=10000)
-
-        for p in preds:
-            won    = p["target_address"] == winner_addr
-            payout = p["cost"] * 3 if won else 0
-            if payout:
-                await db.players.update_one(
-                    {"address": p["predictor_address"]},
-                    {"$inc": {"points": payout}}
-                )
-                # Activity feed — prediction win
-                try:
-                    _pred_player = await db.players.find_one(
-                        {"address": p["predictor_address"]}, {"_id": 0, "nickname": 1}
-                    )
-                    _pred_nick = (_pred_player or {}).get("nickname") or "Anonymous"
-                    await db.activity_feed.insert_one({
-                        "id":              str(uuid.uuid4()),
-                        "activity_type":   "arena_prediction",
-                        "type":            "arena_prediction",
-                        "player_address":  p["predictor_address"],
-                        "player_nickname": _pred_nick,
-                        "treat_name":      f"🔮 Prediction Win +{payout} pts",
-                        "prize_label":     f"Prediction Win +{payout} pts",
-                        "points_reward":   payout,
-                        "xp_reward":       0,
-                        "rarity":          None,
-                        "emoji":           "crystal_ball",
-                        "created_at":      _utcnow().isoformat(),
-                    })
-                except Exception:
-                    pass
-
-            await db.arena_predictions.update_one(
-                {"id": p["id"]},
-                {"$set": {
-                    "status":      "won" if won else "lost",
-                    "payout":      payout,
-                    "settled_at":  _utcnow().isoformat(),
-                }}
-            )
+        async for p in db.arena_predictions.find(
+            {"arena_id": arena_id, "status": "pending"},
+            {"_id": 0, "id": 1, "predictor_address": 1, "target_address": 1, "cost": 1},
+        ):
+            won = p["target_address"] == winner_addr
+            predictions.append({
+                "id":                p["id"],
+                "predictor_address": p["predictor_address"],
+                "won":               won,
+                "payout":            p["cost"] * 3 if won else 0,
+            })
+
+        # ── Activity feed — prediction wins, nicknames in one query ───────
+        paid_preds = [p for p in predictions if p["payout"]]
+        nicknames = {}
+        if paid_preds:
+            async for pl in db.players.find(
+                {"address": {"$in": list({p["predictor_address"] for p in paid_preds})}},
+                {"_id": 0, "address": 1, "nickname": 1},
+            ):
+                nicknames[pl["address"]] = pl.get("nickname")
+        for p in paid_preds:
+            feed.append(_feed_entry(
+                activity_type="arena_prediction",
+                type="arena_prediction",
+                player_address=p["predictor_address"],
+                player_nickname=nicknames.get(p["predictor_address"]) or "Anonymous",
+                treat_name=f"🔮 Prediction Win +{p['payout']} pts",
+                prize_label=f"Prediction Win +{p['payout']} pts",
+                points_reward=p["payout"],
+                emoji="crystal_ball",
+            ))
 
         # ── Activity feed — single summary entry for the whole settlement ──
         # Writing one entry per ranked player floods the feed every cycle.
         # Instead write one summary showing the winner and total rewarded.
+        if rewards:
+            winner_reward = next((r for r in rewards if r.get("rank") == 1), rewards[0])
+            winner_nick   = winner_reward.get("nickname") or "Anonymous"
+            feed.append(_feed_entry(
+                activity_type="arena_settled",
+                type="arena_settled",
+                player_address=winner_reward["address"],
+                player_nickname=winner_nick,
+                treat_name=f"🏆 Arena Settled — {winner_nick} wins!",
+                prize_label=f"Arena Winner +{winner_reward['points']} pts",
+                points_reward=winner_reward["points"],
+                emoji="trophy",
+                participants=len(entries),
+                total_rewarded=sum(r["points"] for r in rewards),
+            ))
+
+    # One $inc per player: rank / mystery reward plus any prediction payout
+    credits: Dict[str, int] = {}
+    for r in rewards:
+        credits[r["address"]] = credits.get(r["address"], 0) + r["points"]
+    for p in predictions:
+        if p["payout"]:
+            credits[p["predictor_address"]] = credits.get(p["predictor_address"], 0) + p["payout"]
+
+    return {
+        "_id":            arena_id,
+        "arena_id":       arena_id,
+        "prize_pool":     prize_pool,
+        "winner_address": entries[0]["player_address"] if entries else None,
+        "rewards":        rewards,
+        "credits":        [[addr, pts] for addr, pts in credits.items()],
+        "predictions":    predictions,
+        "feed":           feed,
+        "steps":          {"credits": False, "predictions": False, "feed": False},
+        "created_at":     _utcnow(),
+    }
+
+
+async def _load_or_plan_settlement(db, arena: dict) -> dict:
+    journal = await db.arena_settlements.find_one({"_id": arena["id"]})
+    if journal:
+        return journal
+    plan = await _plan_settlement(db, arena)
+    try:
+        await db.arena_settlements.insert_one(plan)
+        return plan
+    except DuplicateKeyError:
+        # Another worker planned it first — follow its plan
+        return await db.arena_settlements.find_one({"_id": arena["id"]})
+
+
+async def _mark_step(db, arena_id: str, step: str) -> None:
+    await db.arena_settlements.update_one({"_id": arena_id}, {"$set": {f"steps.{step}": True}})
+
+
+async def settle_arena(db, arena_id: str) -> dict:
+    """
+    Finalize an arena:
+      1. Distribute the actual prize_pool by percentage split (not hardcoded amounts)
+      2. Settle pending predictions: rank-1 winner's predictors get 3× payout
+      3. Mark arena as 'settled' with ISO timestamp
+
+    The race condition is handled upstream via the atomic 'settling' status
+    flip (get_or_create_current_arena, resume_stuck_settlements). Every step
+    is safe to replay, so a settle interrupted part-way can simply be run
+    again.
+    """
+    arena = await db.arena_sessions.find_one(
+        {"id": arena_id, "status": "settling"}, {"_id": 0}
+    )
+    if not arena:
+        # Already settled or doesn't exist
+        return {}
+
+    # Rank on every credit this process has buffered for the arena
+    await flush_arena_scores(db)
+    journal = await _load_or_plan_settlement(db, arena)
+    steps   = journal.get("steps", {})
+
+    if not steps.get("credits"):
+        ops = [
+            UpdateOne(
+                {"address": addr, "settled_arena_ids": {"$ne": arena_id}},
+                {
+                    "$inc":  {"points": pts},
+                    "$push": {"settled_arena_ids": {"$each": [arena_id], "$slice": -SETTLED_ARENA_IDS_KEPT}},
+                },
+            )
+            for addr, pts in journal["credits"]
+        ]
+        if ops:
+            await db.players.bulk_write(ops, ordered=False)
+        await _mark_step(db, arena_id, "credits")
+
+    if not steps.get("predictions"):
+        settled_at = _utcnow().isoformat()
+        ops = [
+            UpdateOne(
+                {"id": p["id"], "status": "pending"},
+                {"$set": {
+                    "status":      "won" if p["won"] else "lost",
+                    "payout":      p["payout"],
+                    "settled_at":  settled_at,
+                }},
+            )
+            for p in journal["predictions"]
+        ]
+        if ops:
+            await db.arena_predictions.bulk_write(ops, ordered=False)
+        await _mark_step(db, arena_id, "predictions")
+
+    if not steps.get("feed"):
         try:
-            if rewards:
-                winner_reward = next((r for r in rewards if r.get("rank") == 1), rewards[0])
-                total_rewarded = sum(r["points"] for r in rewards)
-                await db.activity_feed.insert_one({
-                    "id":              str(uuid.uuid4()),
-                    "activity_type":   "arena_settled",
-                    "type":            "arena_settled",
-                    "player_address":  winner_reward["address"],
-                    "player_nickname": winner_reward.get("nickname") or "Anonymous",
-                    "treat_name":      f"🏆 Arena Settled — {winner_reward.get('nickname') or 'Anonymous'} wins!",
-                    "prize_label":     f"Arena Winner +{winner_reward['points']} pts",
-                    "points_reward":   winner_reward["points"],
-                    "xp_reward":       0,
-                    "rarity":          None,
-                    "emoji":           "trophy",
-                    "participants":    len(entries),
-                    "total_rewarded":  total_rewarded,
-                    "created_at":      _utcnow().isoformat(),
-                })
-        except Exception:
-            pass
+            feed = journal["feed"]
+            if feed:
+                written = {
+                    d["id"] async for d in db.activity_feed.find(
+                        {"id": {"$in": [f["id"] for f in feed]}}, {"_id": 0, "id": 1}
+                    )
+                }
+                missing = [f for f in feed if f["id"] not in written]
+                if missing:
+                    await db.activity_feed.insert_many(missing, ordered=False)
+            await _mark_step(db, arena_id, "feed")
+        except Exception as exc:
+            logger.warning(f"🏟️ Arena {arena_id} feed entries skipped: {exc}")
+
+    # ── Push the credited points onto the materialized leaderboard ────────
+    if journal["credits"]:
+        await leaderboard_view.sync_players(db, [addr for addr, _ in journal["credits"]])
 
     # ── Mark settled ──────────────────────────────────────────────────────
     await db.arena_sessions.update_one(
@@ -273,11 +482,16 @@ async def settle_arena(db, arena_id: str) -> dict:
         {"$set": {
             "status":         "settled",
             "settled_at":     _utcnow().isoformat(),
-            "winner_address": entries[0]["player_address"] if entries else None,
-            "final_rewards":  rewards,
-            "prize_pool_paid": prize_pool,
+            "winner_address": journal.get("winner_address"),
+            "final_rewards":  journal["rewards"],
+            "prize_pool_paid": journal["prize_pool"],
         }}
     )
+    await db.arena_settlements.update_one(
+        {"_id": arena_id}, {"$set": {"completed_at": _utcnow()}}
+    )
+    _forget_active_arena()
+    response_cache.invalidate("arena_current", "activity_recent")
     result = await db.arena_sessions.find_one({"id": arena_id}, {"_id": 0})
     return result or {}
 
@@ -291,7 +505,7 @@ async def join_arena(db, player_address: str, nickname: Optional[str]) -> dict:
 
     arena = await get_or_create_current_arena(db)
     existing = await db.arena_entries.find_one(
-        {"arena_id": arena["id"], "player_address": player_address}, {"_id": 0}
+        {"arena_id": arena["id"], "player_address": player_address}, _ENTRY_PROJECTION
     )
     if existing:
         return {"arena": arena, "entry": existing, "already_joined": True}
@@ -306,6 +520,7 @@ async def join_arena(db, player_address: str, nickname: Optional[str]) -> dict:
         {"address": player_address},
         {"$inc": {"points": -ENTRY_FEE_POINTS}}
     )
+    await leaderboard_view.sync_players(db, [player_address])
 
     entry = {
         "id":            str(uuid.uuid4()),
@@ -327,31 +542,216 @@ async def join_arena(db, player_address: str, nickname: Optional[str]) -> dict:
     )
 
     arena = await db.arena_sessions.find_one({"id": arena["id"]}, {"_id": 0})
+    if arena and _ranking.arena_id == arena["id"]:
+        _ranking.arena = arena
+        _ranking.upsert(entry)
     return {"arena": arena, "entry": entry, "already_joined": False}
 
 
+# ─── Score credit buffer ────────────────────────────────────────────────────
+# Every treat collect credits arena score. Instead of an arena_entries write
+# on the collect request, credits are merged per (arena, player) in process
+# and flushed as one bulk_write every SCORE_FLUSH_INTERVAL_SECONDS, or sooner
+# once SCORE_FLUSH_MAX_EVENTS credits are pending. The arena leaderboard
+# trails collects by at most about the flush interval. The buffer is flushed
+# on shutdown and before an arena is settled.
+#
+# The $inc writes aren't idempotent, so each flush batch carries an id that
+# every entry it touches records in score_flush_ids (same guard as
+# settled_arena_ids on players). A batch that fails is held and retried as-is
+# under the same id, so a write that already landed is skipped, never
+# applied twice; new credits keep collecting in the buffer meanwhile.
+
+SCORE_FLUSH_INTERVAL_SECONDS = 0.25
+SCORE_FLUSH_MAX_EVENTS       = 500
+SCORE_FLUSH_IDS_KEPT         = 50
+# Retries for credits the server rejected outright (BulkWriteError
+# writeErrors) before they are dropped; connection errors retry forever
+SCORE_FLUSH_MAX_ATTEMPTS     = 20
+
+# arena_entries reads: hide the flush bookkeeping
+_ENTRY_PROJECTION = {"_id": 0, "score_flush_ids": 0}
+
+_score_buffer: Dict[tuple, dict] = {}
+_score_failed_batch: Optional[Tuple[str, Dict[tuple, dict], int]] = None  # (flush id, batch, attempts)
+_score_buffer_events = 0
+_score_flush_wakeup  = asyncio.Event()
+_score_flush_lock    = asyncio.Lock()
+
+
+def _buffer_score(key: tuple, points: int, win_streak: int, last_active_at: str, events: int = 1) -> None:
+    global _score_buffer_events
+    pending = _score_buffer.get(key)
+    if pending is None:
+        _score_buffer[key] = {"points": points, "win_streak": win_streak, "last_active_at": last_active_at}
+    else:
+        pending["points"]     += points
+        pending["win_streak"] += win_streak
+        pending["last_active_at"] = max(pending["last_active_at"], last_active_at)
+    _score_buffer_events += events
+    if _score_buffer_events >= SCORE_FLUSH_MAX_EVENTS:
+        _score_flush_wakeup.set()
+
+
 async def credit_arena_score(db, player_address: str, points_delta: int, treat_rarity: Optional[str] = None) -> None:
-    """Called by treat collection flow to credit arena score."""
-    arena = await db.arena_sessions.find_one({"status": "active"}, {"_id": 0})
+    """Called by treat collection flow to credit arena score. Buffered —
+    see flush_arena_scores."""
+    arena = await _get_active_arena(db)
     if not arena:
         return
-    update = {"$inc": {"points": points_delta}, "$set": {"last_active_at": _utcnow().isoformat()}}
-    if treat_rarity and treat_rarity.lower() in ("legendary", "mythic"):
-        update["$inc"]["win_streak"] = 1
-    await db.arena_entries.update_one(
-        {"arena_id": arena["id"], "player_address": player_address},
-        update
-    )
+    win_streak = 1 if treat_rarity and treat_rarity.lower() in ("legendary", "mythic") else 0
+    now_iso = _utcnow().isoformat()
+    _buffer_score((arena["id"], player_address), points_delta, win_streak, now_iso)
+    if _ranking.arena_id == arena["id"]:
+        _ranking.apply_credit(player_address, points_delta, win_streak, now_iso)
+
+
+async def _write_score_batch(db, flush_id: str, batch: Dict[tuple, dict]) -> None:
+    ops = []
+    for (arena_id, addr), delta in batch.items():
+        update = {
+            "$inc":  {"points": delta["points"]},
+            "$set":  {"last_active_at": delta["last_active_at"]},
+            "$push": {"score_flush_ids": {"$each": [flush_id], "$slice": -SCORE_FLUSH_IDS_KEPT}},
+        }
+        if delta["win_streak"]:
+            update["$inc"]["win_streak"] = delta["win_streak"]
+        ops.append(UpdateOne(
+            {"arena_id": arena_id, "player_address": addr, "score_flush_ids": {"$ne": flush_id}}, update
+        ))
+    await db.arena_entries.bulk_write(ops, ordered=False)
+
+
+async def flush_arena_scores(db) -> int:
+    """Write all buffered score credits. Returns how many entries were
+    written; a batch whose write failed is retried, under the same flush
+    id, before anything newer."""
+    global _score_buffer, _score_buffer_events, _score_failed_batch
+    async with _score_flush_lock:
+        written = 0
+        while True:
+            if _score_failed_batch is not None:
+                flush_id, batch, attempts = _score_failed_batch
+            elif _score_buffer:
+                flush_id, batch, attempts = str(uuid.uuid4()), _score_buffer, 0
+                _score_buffer, _score_buffer_events = {}, 0
+            else:
+                return written
+            try:
+                await _write_score_batch(db, flush_id, batch)
+            except BulkWriteError as exc:
+                keys = list(batch)
+                errors = exc.details.get("writeErrors", [])
+                if errors and not exc.details.get("writeConcernErrors"):
+                    # Everything else in the batch landed
+                    written += len(batch) - len(errors)
+                    batch = {keys[e["index"]]: batch[keys[e["index"]]] for e in errors}
+                    attempts += 1
+                if attempts >= SCORE_FLUSH_MAX_ATTEMPTS:
+                    _score_failed_batch = None
+                    logger.error(f"🏟️ Dropped {len(batch)} arena score credits after {attempts} attempts: {exc}")
+                    continue
+                _score_failed_batch = (flush_id, batch, attempts)
+                logger.warning(f"🏟️ {len(batch)} arena score credits failed, held for retry: {exc}")
+                return written
+            except Exception as exc:
+                _score_failed_batch = (flush_id, batch, attempts)
+                logger.warning(f"🏟️ Arena score flush failed, holding {len(batch)} credits for retry: {exc}")
+                return written
+            _score_failed_batch = None
+            written += len(batch)
+
+
+async def run_score_flush_loop(db):
+    """Background task started at server boot. Also seeds the in-process
+    ranking and keeps it in step with other workers' writes."""
+    logger.info("🏟️ Arena score flush loop started")
+    try:
+        arena = await db.arena_sessions.find_one({"status": "active"}, {"_id": 0})
+        if arena:
+            await _seed_ranking(db, arena)
+    except Exception as exc:
+        logger.warning(f"🏟️ Arena ranking seed failed (will load on first read): {exc}")
+    while True:
+        try:
+            try:
+                await asyncio.wait_for(_score_flush_wakeup.wait(), timeout=SCORE_FLUSH_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            _score_flush_wakeup.clear()
+            await flush_arena_scores(db)
+            if time.monotonic() - _ranking_sync["at"] >= RANKING_RESYNC_SECONDS:
+                await _resync_ranking(db)
+        except asyncio.CancelledError:
+            break
+        except Exception as exc:
+            logger.warning(f"🏟️ Arena score flush loop error: {exc}")
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                break
 
 
-async def get_leaderboard(db, limit: int = 50) -> dict:
+# ─── Ranking ────────────────────────────────────────────────────────────────
+# Leaderboard reads are served from an in-process ArenaRanking of the active
+# arena (services/arena_ranking.py). It is seeded from arena_entries, takes
+# this process's credits as they are buffered, and every
+# RANKING_RESYNC_SECONDS re-reads the rows any worker touched since the last
+# resync (by last_active_at, which joins and credits both set).
+
+RANKING_RESYNC_SECONDS = 5
+# Slack on the last_active_at cut-off for clock skew between workers and
+# credits buffered a moment before they were flushed
+RANKING_RESYNC_OVERLAP_SECONDS = 5
+
+_ranking = ArenaRanking()
+_ranking_sync: Dict = {"at": 0.0, "since": ""}
+
+
+async def _seed_ranking(db, arena: dict) -> None:
+    since   = (_utcnow() - timedelta(seconds=RANKING_RESYNC_OVERLAP_SECONDS)).isoformat()
+    entries = await db.arena_entries.find({"arena_id": arena["id"]}, _ENTRY_PROJECTION).to_list(length=None)
+    _ranking.reset(arena, entries)
+    _ranking_sync.update({"at": time.monotonic(), "since": since})
+
+
+async def _resync_ranking(db) -> None:
+    arena_id = _ranking.arena_id
+    if not arena_id:
+        _ranking_sync["at"] = time.monotonic()
+        return
+    since = (_utcnow() - timedelta(seconds=RANKING_RESYNC_OVERLAP_SECONDS)).isoformat()
+    arena = await db.arena_sessions.find_one({"id": arena_id}, {"_id": 0})
+    async for entry in db.arena_entries.find(
+        {"arena_id": arena_id, "last_active_at": {"$gte": _ranking_sync["since"]}}, _ENTRY_PROJECTION
+    ):
+        if _ranking.arena_id == arena_id:
+            _ranking.upsert(entry)
+    if arena and _ranking.arena_id == arena_id:
+        _ranking.arena = arena
+    _ranking_sync.update({"at": time.monotonic(), "since": since})
+
+
+async def _ranked_arena(db) -> dict:
+    """The active arena, with _ranking holding its entries. Only touches
+    arena_sessions when the arena changed or has expired."""
+    snapshot = await _get_active_arena(db)
+    if (
+        snapshot
+        and snapshot["id"] == _ranking.arena_id
+        and _parse_dt(snapshot.get("ends_at")) > _utcnow()
+    ):
+        return _ranking.arena
     arena = await get_or_create_current_arena(db)
-    cursor = db.arena_entries.find(
-        {"arena_id": arena["id"]}, {"_id": 0}
-    ).sort("points", -1).limit(limit)
-    entries = await cursor.to_list(length=limit)
-    ranked  = [{**e, "rank": idx + 1} for idx, e in enumerate(entries)]
-    top     = ranked[0] if ranked else None
+    if arena["id"] != _ranking.arena_id:
+        await _seed_ranking(db, arena)
+    return _ranking.arena
+
+
+async def get_leaderboard(db, limit: int = 50) -> dict:
+    arena  = await _ranked_arena(db)
+    ranked = _ranking.top(limit)
+    top    = ranked[0] if ranked else None
     return {
         "arena":   arena,
         "top":     top,
@@ -360,97 +760,125 @@ async def get_leaderboard(db, limit: int = 50) -> dict:
     }
 
 
+async def get_player_standing(db, player_address: str, radius: int = 5) -> dict:
+    """A player's arena rank and the entries around it (rank None if they
+    haven't joined)."""
+    await _ranked_arena(db)
+    return {
+        "arena_id": _ranking.arena_id,
+        "rank":     _ranking.rank_of(player_address),
+        "total":    len(_ranking),
+        "around":   _ranking.around(player_address, radius),
+        "now":      _utcnow().isoformat(),
+    }
+
+
 # ─── Heat events ────────────────────────────────────────────────────────────
+# The heat event is a pure function of wall-clock time: the day is cut into
+# HEAT_EVENT_DURATION_MIN slots aligned to the epoch (so to the arena's
+# midnight start too), and each slot's event is drawn from a Random seeded
+# with the slot number. Any worker, and any client holding the published
+# schedule, computes the same calendar without reading or writing
+# arena_sessions.
+
+HEAT_SLOT_SECONDS = HEAT_EVENT_DURATION_MIN * 60
+
 
 def _pick_heat_event(seed_dt: datetime) -> dict:
-    rng = random.Random(int(seed_dt.timestamp()) // (HEAT_EVENT_DURATION_MIN * 60))
+    rng = random.Random(int(seed_dt.timestamp()) // HEAT_SLOT_SECONDS)
     return rng.choice(HEAT_EVENTS)
 
 
-async def get_or_rotate_heat_event(db) -> dict:
-    arena = await get_or_create_current_arena(db)
-    started = _parse_dt(arena.get("heat_event_started_at") or arena["started_at"])
-    elapsed_min = (_utcnow() - started).total_seconds() / 60.0
-    if elapsed_min >= HEAT_EVENT_DURATION_MIN:
-        new_event = _pick_heat_event(_utcnow())
-        new_start = _utcnow()
-        await db.arena_sessions.update_one(
-            {"id": arena["id"]},
-            {"$set": {"heat_event": new_event, "heat_event_started_at": new_start.isoformat()}}
-        )
-        arena["heat_event"]            = new_event
-        arena["heat_event_started_at"] = new_start.isoformat()
-        started                        = new_start
+def _heat_slot(slot: int) -> dict:
+    started = datetime.fromtimestamp(slot * HEAT_SLOT_SECONDS, tz=timezone.utc)
     return {
-        "event":        arena["heat_event"],
-        "started_at":   started.isoformat() if hasattr(started, "isoformat") else str(started),
+        "event":        _pick_heat_event(started),
+        "started_at":   started.isoformat(),
+        "ends_at":      (started + timedelta(seconds=HEAT_SLOT_SECONDS)).isoformat(),
         "duration_min": HEAT_EVENT_DURATION_MIN,
     }
 
 
+def heat_event_at(at: Optional[datetime] = None) -> dict:
+    """The heat event running at `at` (default now)."""
+    at = at or _utcnow()
+    return _heat_slot(int(at.timestamp()) // HEAT_SLOT_SECONDS)
+
+
+def heat_schedule(start: datetime, count: int) -> List[dict]:
+    """`count` consecutive heat events, the first being the one running at `start`."""
+    first = int(start.timestamp()) // HEAT_SLOT_SECONDS
+    return [_heat_slot(slot) for slot in range(first, first + count)]
+
+
+def get_current_heat_event(upcoming: int = 0) -> dict:
+    """Current heat event, plus the next `upcoming` ones."""
+    current = heat_event_at()
+    if upcoming > 0:
+        current["upcoming"] = heat_schedule(_parse_dt(current["ends_at"]), upcoming)
+    return current
+
+
+def get_heat_schedule_for_day() -> dict:
+    """Every heat event of the current arena day, for clients to cache until
+    `day_ends_at`."""
+    day_start = _current_window_start()
+    day_end   = day_start + timedelta(hours=ARENA_DURATION_HOURS)
+    return {
+        "day_started_at": day_start.isoformat(),
+        "day_ends_at":    day_end.isoformat(),
+        "duration_min":   HEAT_EVENT_DURATION_MIN,
+        "events":         heat_schedule(day_start, ARENA_DURATION_HOURS * 3600 // HEAT_SLOT_SECONDS),
+    }
+
+
 async def get_active_heat_event_id(db) -> str:
     """
     Returns the current heat event id string (e.g. 'golden_hour', 'crit_state').
     Used by treat creation and collect endpoints to apply live modifiers.
-    Returns 'idle_calm' if no active arena or heat event found.
+    Returns 'idle_calm' if there is no active arena.
+    Served from the in-process arena snapshot and the heat calendar.
     """
     try:
-        arena = await db.arena_sessions.find_one({"status": "active"}, {"_id": 0, "heat_event": 1})
-        if arena and arena.get("heat_event"):
-            return arena["heat_event"].get("id", "idle_calm")
+        if await _get_active_arena(db):
+            return heat_event_at()["event"]["id"]
     except Exception:
         pass
     return "idle_calm"
 
 
-# ─── Background heat event scheduler ────────────────────────────────────────
+# ─── Background arena scheduler ─────────────────────────────────────────────
 
 async def run_heat_event_scheduler(db):
     """
     Background task started at server boot.
-    Rotates heat events every 30 minutes on a real wall-clock schedule,
-    completely independent of user traffic / arena page visits.
+    Resumes stalled settlements, keeps the active-arena snapshot fresh and
+    drops the cached /arena/current payload at each heat slot boundary.
+    Heat events themselves come from the calendar and are never stored.
     """
-    import asyncio
-    import logging
-    logger = logging.getLogger("heat_scheduler")
     logger.info("🔥 Heat event scheduler starting")
+    last_slot = None
 
     while True:
         try:
-            arena = await db.arena_sessions.find_one(
-                {"status": "active"},
-                {"_id": 0, "id": 1, "heat_event_started_at": 1, "heat_event": 1}
-            )
-            if arena:
-                started = _parse_dt(arena.get("heat_event_started_at"))
-                elapsed_min = (_utcnow() - started).total_seconds() / 60.0
-                remaining_sec = max(0, (HEAT_EVENT_DURATION_MIN - elapsed_min) * 60)
-
-                if remaining_sec < 10:
-                    # Time to rotate to a new random event
-                    new_event = _pick_heat_event(_utcnow())
-                    new_start = _utcnow()
-                    await db.arena_sessions.update_one(
-                        {"id": arena["id"]},
-                        {"$set": {
-                            "heat_event":            new_event,
-                            "heat_event_started_at": new_start.isoformat(),
-                        }}
-                    )
-                    logger.info(
-                        f"🔥 Heat event rotated → {new_event['name']} "
-                        f"(id={new_event['id']}) next rotation in {HEAT_EVENT_DURATION_MIN}min"
-                    )
-                    # Sleep the full duration before checking again
-                    await asyncio.sleep(HEAT_EVENT_DURATION_MIN * 60)
-                else:
-                    # Sleep until just before the next rotation
-                    sleep_time = min(remaining_sec - 5, 60)
-                    await asyncio.sleep(max(sleep_time, 10))
-            else:
-                # No active arena — check again in 60 seconds
-                await asyncio.sleep(60)
+            try:
+                await resume_stuck_settlements(db)
+            except Exception as exc:
+                logger.warning(f"🏟️ Settlement resume failed (will retry next pass): {exc}")
+
+            arena = await db.arena_sessions.find_one({"status": "active"}, _ACTIVE_PROJECTION)
+            _remember_active_arena(arena)
+
+            now_ts = _utcnow().timestamp()
+            slot   = int(now_ts) // HEAT_SLOT_SECONDS
+            if slot != last_slot:
+                if last_slot is not None:
+                    event = heat_event_at()["event"]
+                    logger.info(f"🔥 Heat event now {event['name']} (id={event['id']})")
+                    response_cache.invalidate("arena_current")
+                last_slot = slot
+            # Wake at the next slot boundary, and at least once a minute
+            await asyncio.sleep(min(60.0, (slot + 1) * HEAT_SLOT_SECONDS - now_ts + 0.5))
 
         except asyncio.CancelledError:
             logger.info("🔥 Heat event scheduler stopped")
@@ -541,6 +969,7 @@ async def place_prediction(db, predictor_address: str, target_address: str) -> d
         {"address": predictor_address},
         {"$inc": {"points": -PREDICTION_COST}}
     )
+    await leaderboard_view.sync_players(db, [predictor_address])
 
     pred = {
         "id":                str(uuid.uuid4()),
@@ -0,0 +1,412 @@
+"""
+DogeFood Lab — auto-mixer pass engine
+AutoMixerEngine mixes subscriptions in concurrent batches with bulk writes;
+AutoMixScheduler keeps a heap of when each subscription is next due.
+"""
+import asyncio
+import heapq
+import logging
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from services.datetime_fields import to_datetime
+from services.treat_game_engine import RARITY_CONFIG, TreatRarity
+
+logger = logging.getLogger(__name__)
+
+AUTO_MIX_BATCH_SIZE = 100  # players per batch
+AUTO_MIX_DB_CONCURRENCY = 8  # database calls in flight per pass
+AUTO_MIX_SPACING_SECONDS = 1800  # gap between one subscription's mixes
+AUTO_MIX_RESYNC_SECONDS = 900
+
+
+def in_mix_window(sub: Dict, hour: int) -> bool:
+    """Whether `hour` (UTC) falls in the subscription's mixing window."""
+    start_hour = sub.get("window_start_hour", 0)
+    end_hour = sub.get("window_end_hour", 6)
+    if start_hour < end_hour:
+        return start_hour <= hour < end_hour
+    # Window crosses midnight
+    return hour >= start_hour or hour < end_hour
+
+
+def next_eligible_at(sub: Dict, earliest: datetime) -> datetime:
+    """First time at or after `earliest` inside the subscription's window."""
+    if in_mix_window(sub, earliest.hour):
+        return earliest
+    opens = earliest.replace(hour=sub.get("window_start_hour", 0), minute=0, second=0, microsecond=0)
+    if opens <= earliest:
+        opens += timedelta(days=1)
+    return opens
+
+
+def _short(address: str) -> str:
+    return address[:20] + "..."
+
+
+class AutoMixerEngine:
+    def __init__(self, db, anti_cheat, ingredient_system, game_engine,
+                 on_treats_inserted: Optional[Callable[[List[Dict]], Awaitable[None]]] = None,
+                 batch_size: int = AUTO_MIX_BATCH_SIZE,
+                 db_concurrency: int = AUTO_MIX_DB_CONCURRENCY):
+        self.db = db
+        self.anti_cheat = anti_cheat
+        self.ingredient_system = ingredient_system
+        self.game_engine = game_engine
+        self.on_treats_inserted = on_treats_inserted
+        self.batch_size = batch_size
+        self._db_slots = asyncio.Semaphore(db_concurrency)
+
+    async def _db(self, make_call: Callable[[], Awaitable]):
+        async with self._db_slots:
+            return await make_call()
+
+    async def load_active_subscriptions(self, now: datetime, ids: Optional[List[str]] = None) -> List[Dict]:
+        """Active subscriptions (optionally just `ids`), expiring any whose
+        subscription_end has passed."""
+        scope = {"status": "active"}
+        if ids is not None:
+            scope["id"] = {"$in": ids}
+
+        expired = await self.db.auto_mixer_subscriptions.update_many(
+            {**scope, "subscription_end": {"$lte": now}},
+            {"$set": {"status": "expired", "updated_at": now}}
+        )
+        if expired.modified_count:
+            logger.info(f"🤖 Expired {expired.modified_count} subscription(s)")
+
+        # subscription_end is always a BSON date (services/datetime_fields),
+        # so the window check runs inside Mongo; no end date means open-ended
+        return await self.db.auto_mixer_subscriptions.find({
+            **scope,
+            "$or": [{"subscription_end": {"$gt": now}}, {"subscription_end": None}],
+        }).to_list(None)
+
+    async def run_pass(self, subs: List[Dict], now: datetime) -> List[Dict]:
+        """Mix one treat per in-window subscription that is under its treat
+        limits. Returns one result row per subscription, in input order:
+        {"player", "status": "success" | "skipped" | "error", ...}."""
+        results: List[Optional[Dict]] = [None] * len(subs)
+        by_player: Dict[str, List[int]] = {}
+        for index, sub in enumerate(subs):
+            if not in_mix_window(sub, now.hour):
+                start_hour = sub.get("window_start_hour", 0)
+                end_hour = sub.get("window_end_hour", 6)
+                results[index] = {
+                    "player": _short(sub.get("player_address", "Unknown")),
+                    "status": "skipped",
+                    "reason": f"Outside window ({start_hour}:00-{end_hour}:00, current: {now.hour}:00)"
+                }
+                continue
+            by_player.setdefault(sub.get("player_address", "Unknown"), []).append(index)
+
+        players = list(by_player)
+        batches = [players[i:i + self.batch_size] for i in range(0, len(players), self.batch_size)]
+        await asyncio.gather(*(
+            self._run_batch({p: by_player[p] for p in batch}, subs, results, now)
+            for batch in batches
+        ))
+        return results
+
+    async def _run_batch(self, indexes_by_player: Dict[str, List[int]], subs: List[Dict],
+                         results: List[Optional[Dict]], now: datetime) -> None:
+        addresses = list(indexes_by_player)
+        try:
+            player_docs, windows = await asyncio.gather(
+                self._db(lambda: self.db.players.find({"address": {"$in": addresses}}).to_list(None)),
+                self._db(lambda: self.anti_cheat.rate_window.recent_many(addresses, hours=24)),
+            )
+        except Exception as e:
+            logger.error(f"🤖 ❌ Auto-mix prefetch failed for {len(addresses)} players: {e}")
+            for indexes in indexes_by_player.values():
+                for index in indexes:
+                    results[index] = {"player": _short(subs[index].get("player_address", "unknown")),
+                                      "status": "error", "reason": str(e)}
+            return
+        players = {p["address"]: p for p in player_docs}
+
+        treats, history, sub_ops, streaks = [], [], [], {}
+        planned: List[Tuple[int, Dict]] = []
+        for address, indexes in indexes_by_player.items():
+            for index in indexes:
+                try:
+                    result = await self._mix_one(subs[index], players.get(address), windows.get(address, []),
+                                                 now, sub_ops, streaks)
+                except Exception as e:
+                    logger.error(f"🤖 ❌ Error for {address[:15]}...: {e}")
+                    result = {"player": _short(address), "status": "error", "reason": str(e)}
+                if result["status"] == "planned":
+                    planned.append((index, result))
+                else:
+                    results[index] = result
+
+        # Outcomes for the whole batch in one engine call; each treat gets
+        # its own millisecond so a player's repeat recipes still roll apart
+        base_ms = int(now.timestamp() * 1000)
+        outcomes = self.game_engine.calculate_treat_outcomes_batch([
+            {**plan["outcome_request"], "timestamp": base_ms + i} for i, (_, plan) in enumerate(planned)
+        ])
+        created = []  # result indexes to roll back if the flush fails
+        for (index, plan), outcome in zip(planned, outcomes):
+            results[index] = self._finish_mix(subs[index], plan, outcome, now, treats, history)
+            created.append(index)
+
+        if not treats:
+            return
+        try:
+            await asyncio.gather(
+                self._db(lambda: self.db.treats.insert_many(treats, ordered=False)),
+                self._db(lambda: self.db.auto_mix_history.insert_many(history, ordered=False)),
+                self._db(lambda: self.db.auto_mixer_subscriptions.bulk_write(sub_ops, ordered=False)),
+            )
+        except Exception as e:
+            logger.error(f"🤖 ❌ Auto-mix flush failed for {len(treats)} treats: {e}")
+            for index in created:
+                results[index] = {**results[index], "status": "error", "reason": str(e)}
+            return
+
+        # Streaks and the shared post-insert bookkeeping are best effort,
+        # as they were for the one-at-a-time loop
+        followups = [self._db(lambda: self.db.players.bulk_write([
+            UpdateOne({"address": address}, {"$set": fields}) for address, fields in streaks.items()
+        ], ordered=False))]
+        if self.on_treats_inserted:
+            followups.append(self._db(lambda: self.on_treats_inserted(treats)))
+        for outcome in await asyncio.gather(*followups, return_exceptions=True):
+            if isinstance(outcome, Exception):
+                logger.warning(f"🤖 Auto-mix follow-up write failed: {outcome}")
+
+    async def _mix_one(self, sub: Dict, player: Optional[Dict], treats_24h: List[Dict], now: datetime,
+                       sub_ops: List, streaks: Dict) -> Dict:
+        """Decide one subscription's treat in memory, queueing its
+        subscription and streak writes. Returns a skip/error result, or a
+        "planned" row whose outcome _run_batch computes with the rest of
+        the batch. Updates `player` and `treats_24h` in place so the
+        player's next subscription in this pass sees it."""
+        player_address = sub.get("player_address", "Unknown")
+        if not player:
+            logger.warning(f"Auto-mixer: Player not found: {player_address}")
+            return {"player": _short(player_address), "status": "error", "reason": "Player not found in database"}
+
+        # CHECK GAME TREAT LIMITS — all prefetched, no database calls
+        treat_status = await self.anti_cheat.get_daily_treat_status(
+            player_address, prefetched_player=player, prefetched_treats_24h=treats_24h
+        )
+        can_create = treat_status.get("can_create_treat", False)
+        remaining = treat_status.get("remaining_treats", 0)
+        window_limit = treat_status.get("window_limit", 4)
+        treats_in_window = treat_status.get("treats_in_window", 0)
+        streak_bonus = treat_status.get("streak_bonus", {})
+
+        if not can_create or remaining <= 0:
+            return {
+                "player": _short(player_address),
+                "status": "skipped",
+                "reason": f"At treat limit ({treats_in_window}/{window_limit} in window, {remaining} remaining)",
+                "time_until_reset_seconds": treat_status.get("time_until_reset_seconds", 0)
+            }
+
+        player_level = player.get("level", 1)
+        # Check player's character bonus (Rex gives rare chance boost)
+        character_bonuses = player.get("character_bonuses", {})
+        rare_chance_bonus = character_bonuses.get("rare_chance_bonus", 0.0)
+
+        # Get available ingredients for player level
+        available_ingredients = self.ingredient_system.get_unlocked_ingredients(player_level)
+        if len(available_ingredients) < 2:
+            return {
+                "player": _short(player_address),
+                "status": "error",
+                "reason": f"Not enough ingredients (level {player_level})"
+            }
+
+        # Select random ingredients (2-4) with full shuffle for variety
+        all_ingredient_ids = [ing.id for ing in available_ingredients]
+        random.shuffle(all_ingredient_ids)
+        num_ingredients = random.randint(2, min(4, len(all_ingredient_ids)))
+        selected_ingredients = all_ingredient_ids[:num_ingredients]
+
+        sub_ops.append(UpdateOne(
+            {"id": sub["id"]},
+            {"$set": {"last_auto_mix": now}, "$inc": {"total_auto_mixes": 1}}
+        ))
+
+        # Update player streak (same as manual play)
+        _, streak_fields = self.anti_cheat.compute_streak_update(player)
+        streaks[player_address] = streak_fields
+        player.update(streak_fields)
+        treats_24h.insert(0, {"created_at": now.replace(tzinfo=None), "ingredients": sorted(selected_ingredients)})
+
+        return {
+            "status": "planned",
+            # Outcome with character bonuses, from the game engine
+            "outcome_request": {
+                "ingredients": selected_ingredients,
+                "player_level": player_level,
+                "player_address": player_address,
+                "rare_chance_bonus": rare_chance_bonus,
+            },
+            "xp_multiplier": streak_bonus.get("xp_multiplier", 1.0),
+            "treats_in_window": treats_in_window,
+            "window_limit": window_limit,
+        }
+
+    def _finish_mix(self, sub: Dict, plan: Dict, outcome: Dict, now: datetime,
+                    treats: List[Dict], history: List[Dict]) -> Dict:
+        """Queue the treat and history docs for a planned mix."""
+        player_address = sub.get("player_address", "Unknown")
+        selected_ingredients = plan["outcome_request"]["ingredients"]
+        treats_in_window = plan["treats_in_window"]
+        window_limit = plan["window_limit"]
+
+        rarity = outcome["rarity"]
+        rarity_config = RARITY_CONFIG[TreatRarity(rarity)]
+        points = outcome["points_reward"]
+        # Apply streak XP multiplier
+        xp = int(outcome["xp_reward"] * plan["xp_multiplier"])
+
+        treat_name = f"{rarity} Auto-Treat"
+        treat_id = str(uuid.uuid4())
+        treats.append({
+            "id": treat_id,
+            "name": treat_name,
+            "creator_address": player_address,
+            "ingredients": selected_ingredients,
+            "rarity": rarity,
+            "rarity_emoji": rarity_config["emoji"],
+            "rarity_color": rarity_config["color"],
+            "flavor": "Savory",
+            "created_at": now,
+            "ready_at": now,
+            "image": "",
+            "brewing_status": "ready",
+            "points_reward": points,
+            "xp_reward": xp,
+            "auto_mixed": True,
+            "collected": False
+        })
+        history.append({
+            "id": str(uuid.uuid4()),
+            "subscription_id": sub["id"],
+            "player_address": player_address,
+            "treat_id": treat_id,
+            "treat_name": treat_name,
+            "treat_rarity": rarity,
+            "points_earned": points,
+            "xp_earned": xp,
+            "ingredients": selected_ingredients,
+            "created_at": now
+        })
+
+        logger.info(f"🤖 ✅ Created '{treat_name}' for {player_address[:15]}... ({treats_in_window + 1}/{window_limit} in window)")
+        return {
+            "player": _short(player_address),
+            "status": "success",
+            "treat_name": treat_name,
+            "rarity": rarity,
+            "points": points,
+            "xp": xp,
+            "ingredients": selected_ingredients,
+            "treats_in_window": treats_in_window + 1,
+            "window_limit": window_limit
+        }
+
+
+class AutoMixScheduler:
+    def __init__(self, engine: AutoMixerEngine):
+        self.engine = engine
+        self._heap: List[Tuple[float, str]] = []
+        self._due_at: Dict[str, float] = {}  # subscription id -> live heap entry
+        self._wakeup = asyncio.Event()
+
+    def schedule(self, sub: Dict, at: datetime) -> None:
+        sub_end = to_datetime(sub.get("subscription_end"))
+        if sub_end:
+            at = min(at, sub_end)
+        ts = at.timestamp()
+        self._due_at[sub["id"]] = ts
+        heapq.heappush(self._heap, (ts, sub["id"]))
+        if self._heap[0] == (ts, sub["id"]):
+            self._wakeup.set()
+
+    def track(self, sub: Dict) -> None:
+        """Call when a subscription is activated or its window changes."""
+        if sub and sub.get("status") == "active":
+            self.schedule(sub, next_eligible_at(sub, datetime.now(timezone.utc)))
+
+    def drop(self, subscription_id: str) -> None:
+        self._due_at.pop(subscription_id, None)
+
+    def _reschedule(self, sub: Dict, result: Dict, now: datetime) -> None:
+        if result["status"] == "skipped" and result.get("time_until_reset_seconds"):
+            earliest = now + timedelta(seconds=result["time_until_reset_seconds"] + 1)
+        elif result["status"] == "skipped" and result["reason"].startswith("Outside window"):
+            earliest = now
+        else:
+            # Mixed, at the daily cap, or failed — retry on the old cadence
+            earliest = now + timedelta(seconds=AUTO_MIX_SPACING_SECONDS)
+        self.schedule(sub, next_eligible_at(sub, earliest))
+
+    def _pop_due(self, now_ts: float) -> List[str]:
+        due = []
+        while self._heap and self._heap[0][0] <= now_ts:
+            ts, sub_id = heapq.heappop(self._heap)
+            if self._due_at.get(sub_id) == ts:
+                del self._due_at[sub_id]
+                due.append(sub_id)
+        return due
+
+    async def resync(self) -> None:
+        """Schedule active subscriptions this process doesn't know about."""
+        now = datetime.now(timezone.utc)
+        for sub in await self.engine.load_active_subscriptions(now):
+            if sub["id"] not in self._due_at:
+                self.schedule(sub, next_eligible_at(sub, now))
+        # Ids left over from cancelled/expired subscriptions are dropped when
+        # they come due and no longer load as active
+
+    async def run_due(self) -> List[Dict]:
+        now = datetime.now(timezone.utc)
+        due_ids = self._pop_due(now.timestamp())
+        if not due_ids:
+            return []
+        subs = await self.engine.load_active_subscriptions(now, ids=due_ids)
+        results = await self.engine.run_pass(subs, now)
+        for sub, result in zip(subs, results):
+            self._reschedule(sub, result, now)
+        created = sum(1 for r in results if r["status"] == "success")
+        logger.info(f"🤖 Auto-mix: {len(due_ids)} due, {created} created, {len(self._due_at)} scheduled")
+        return results
+
+    async def run_loop(self):
+        """Background task started at server boot."""
+        logger.info("🤖 Auto-mix scheduler started (respects game treat limits)")
+        next_resync = 0.0
+        while True:
+            try:
+                if time.monotonic() >= next_resync:
+                    await self.resync()
+                    next_resync = time.monotonic() + AUTO_MIX_RESYNC_SECONDS
+                await self.run_due()
+
+                timeout = next_resync - time.monotonic()
+                if self._heap:
+                    timeout = min(timeout, self._heap[0][0] - time.time())
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, timeout))
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"🤖 ❌ Error in auto-mix scheduler: {e}")
+                try:
+                    await asyncio.sleep(5)
+                except asyncio.CancelledError:
+                    break
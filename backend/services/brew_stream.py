@@ -0,0 +1,177 @@
+"""
+DogeFood Lab — brew completion and push-based brewing timers
+Flips due treats from brewing to ready in an indexed sweep and pushes
+treat/ready events to SSE subscribers of /api/treats/{address}/stream.
+"""
+import asyncio
+import heapq
+import json
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 100
+# Longest gap between sweeps. Treats created by another worker (or before a
+# restart) are only known to the database, so this bounds how late they flip.
+SWEEP_INTERVAL_SECONDS = 5
+SWEEP_BATCH_SIZE = 500
+KEEPALIVE_SECONDS = 15
+
+_DUE_PROJECTION = {"_id": 0, "id": 1, "creator_address": 1, "ready_at": 1, "name": 1}
+
+
+def _timestamp(value) -> Optional[float]:
+    """ready_at as a UTC epoch; naive datetimes/ISO strings are UTC."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def format_sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class BrewStreamHub:
+    def __init__(self, db):
+        self.db = db
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._timers: List[Tuple[float, str]] = []
+        self._scheduled: Set[str] = set()
+        self._wakeup = asyncio.Event()
+        self._ready_listeners: List[Callable[[List[dict]], Awaitable[None]]] = []
+
+    async def ensure_indexes(self):
+        await self.db.treats.create_index([("brewing_status", 1), ("ready_at", 1)])
+
+    def add_ready_listener(self, listener: Callable[[List[dict]], Awaitable[None]]) -> None:
+        """Register `async listener(treats)`, called with every batch of
+        treats the sweep has just flipped to ready."""
+        self._ready_listeners.append(listener)
+
+    # ── Subscribers ─────────────────────────────────────────────────────
+
+    def subscribe(self, address: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.setdefault(address, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, address: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(address)
+        if not queues:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[address]
+
+    def publish(self, address: str, event: str, data: dict) -> None:
+        for queue in list(self._subscribers.get(address, ())):
+            try:
+                queue.put_nowait((event, data))
+            except asyncio.QueueFull:
+                # A client this far behind will resync from a fresh snapshot
+                logger.warning(f"Brew stream queue full for {address}, dropping {event}")
+
+    # ── Timers ──────────────────────────────────────────────────────────
+
+    def schedule(self, treat_id: str, ready_at) -> None:
+        ts = _timestamp(ready_at)
+        if ts is None or not treat_id or treat_id in self._scheduled:
+            return
+        self._scheduled.add(treat_id)
+        heapq.heappush(self._timers, (ts, treat_id))
+        if self._timers[0][1] == treat_id:
+            self._wakeup.set()
+
+    def schedule_treats(self, treats: List[dict]) -> None:
+        for treat in treats:
+            if treat.get("brewing_status") == "brewing":
+                self.schedule(treat.get("id"), treat.get("ready_at"))
+
+    def treat_created(self, treat: dict) -> None:
+        """Call after a treat insert: pushes it to live subscribers and arms
+        its ready timer."""
+        address = treat.get("creator_address")
+        if not address:
+            return
+        self.schedule_treats([treat])
+        self.publish(address, "treat", {k: v for k, v in treat.items() if k != "_id"})
+
+    async def sweep_ready(self) -> int:
+        """Flip every brewing treat whose ready_at has passed. Returns the
+        number of treats flipped."""
+        now = time.time()
+        while self._timers and self._timers[0][0] <= now:
+            self._scheduled.discard(heapq.heappop(self._timers)[1])
+
+        flipped = 0
+        while True:
+            due = await self.db.treats.find(
+                {"brewing_status": "brewing", "ready_at": {"$lte": datetime.now(timezone.utc)}},
+                _DUE_PROJECTION,
+            ).limit(SWEEP_BATCH_SIZE).to_list(SWEEP_BATCH_SIZE)
+            if not due:
+                return flipped
+
+            # Tag the flip so that, with several workers sweeping, each
+            # treat's listeners run in exactly one of them
+            sweep_id = str(uuid.uuid4())
+            result = await self.db.treats.update_many(
+                {"id": {"$in": [t["id"] for t in due]}, "brewing_status": "brewing"},
+                {"$set": {"brewing_status": "ready", "ready_sweep_id": sweep_id}},
+            )
+            flipped += result.modified_count
+            for treat in due:
+                self.publish(treat.get("creator_address"), "ready", {
+                    "treat_id": treat["id"],
+                    "ready_at": treat.get("ready_at"),
+                })
+            if result.modified_count and self._ready_listeners:
+                claimed_ids = set(await self.db.treats.distinct(
+                    "id", {"id": {"$in": [t["id"] for t in due]}, "ready_sweep_id": sweep_id}
+                ))
+                claimed = [t for t in due if t["id"] in claimed_ids]
+                for listener in self._ready_listeners:
+                    try:
+                        await listener(claimed)
+                    except Exception as exc:
+                        logger.warning(f"⏲️ Ready listener failed: {exc}")
+            if len(due) < SWEEP_BATCH_SIZE:
+                return flipped
+
+    async def run_timer_loop(self):
+        """Background task started at server boot: sweep when the next known
+        timer is due, and at least every SWEEP_INTERVAL_SECONDS."""
+        logger.info("⏲️ Brew completion sweep starting")
+        while True:
+            try:
+                timeout = SWEEP_INTERVAL_SECONDS
+                if self._timers:
+                    timeout = min(timeout, max(0.0, self._timers[0][0] - time.time()))
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                    continue  # an earlier timer was scheduled — recompute the wait
+                except asyncio.TimeoutError:
+                    pass
+                await self.sweep_ready()
+            except asyncio.CancelledError:
+                break
+            except Exception as exc:
+                logger.warning(f"⏲️ Brew completion sweep error (will retry): {exc}")
+                try:
+                    await asyncio.sleep(1)
+                except asyncio.CancelledError:
+                    break
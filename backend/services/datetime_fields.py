@@ -0,0 +1,109 @@
+"""
+DogeFood Lab — stored datetime normalization
+TEMPORAL_FIELDS are always stored as BSON dates; migrate() rewrites legacy
+ISO strings in bulk and iso_utc() formats them for API output.
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+TEMPORAL_FIELDS: Dict[str, List[str]] = {
+    "players": ["last_active", "created_at"],
+    "treats": ["created_at", "ready_at", "collected_at"],
+    "auto_mixer_subscriptions": [
+        "subscription_start", "subscription_end", "activated_at",
+        "last_auto_mix", "created_at", "updated_at",
+    ],
+    "activity_feed": ["created_at"],
+    "lab_notes": ["created_at"],
+    "spin_wheel_history": ["spun_at"],
+}
+
+TEMPORAL_INDEXES: Dict[str, List[list]] = {
+    "treats": [[("collected_at", 1)]],
+    "auto_mixer_subscriptions": [[("status", 1), ("subscription_end", 1)]],
+    "activity_feed": [[("created_at", -1)]],
+    "lab_notes": [[("created_at", -1)]],
+    "spin_wheel_history": [[("player_address", 1), ("spun_at", -1)]],
+}
+
+MIGRATION_BATCH_SIZE = 500
+MIGRATION_STATE_ID = "datetime_fields_v1"
+
+
+def to_datetime(value) -> Optional[datetime]:
+    """A stored timestamp (ISO string or datetime) as an aware UTC datetime,
+    or None if it can't be read as one."""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def iso_utc(value) -> Optional[str]:
+    """Serialize a stored timestamp as ISO 8601 with its UTC offset."""
+    parsed = to_datetime(value)
+    if parsed is None:
+        return None if value is None else str(value)
+    return parsed.isoformat()
+
+
+async def ensure_indexes(db):
+    for collection, indexes in TEMPORAL_INDEXES.items():
+        for keys in indexes:
+            await db[collection].create_index(keys)
+
+
+async def migrate(db, dry_run: bool = False) -> Dict[str, Dict[str, int]]:
+    """Rewrite every string value in TEMPORAL_FIELDS as a BSON date.
+    Idempotent. Returns {collection: {field: converted, field + ":unparseable": n}}."""
+    report: Dict[str, Dict[str, int]] = {}
+    for collection, fields in TEMPORAL_FIELDS.items():
+        for field in fields:
+            converted, unparseable, ops = 0, 0, []
+            cursor = db[collection].find({field: {"$type": "string"}}, {field: 1})
+            async for doc in cursor:
+                parsed = to_datetime(doc.get(field))
+                if parsed is None:
+                    unparseable += 1
+                    continue
+                converted += 1
+                ops.append(UpdateOne({"_id": doc["_id"], field: doc[field]}, {"$set": {field: parsed}}))
+                if len(ops) >= MIGRATION_BATCH_SIZE:
+                    if not dry_run:
+                        await db[collection].bulk_write(ops, ordered=False)
+                    ops = []
+            if ops and not dry_run:
+                await db[collection].bulk_write(ops, ordered=False)
+            if converted or unparseable:
+                counts = report.setdefault(collection, {})
+                counts[field] = converted
+                if unparseable:
+                    counts[f"{field}:unparseable"] = unparseable
+                logger.info(f"🕒 {collection}.{field}: {converted} string dates converted"
+                            + (f", {unparseable} unparseable" if unparseable else ""))
+    return report
+
+
+async def run_startup_migration(db):
+    """Run migrate() once per database; later boots skip the scans."""
+    state = await db.migrations.find_one({"_id": MIGRATION_STATE_ID})
+    if state:
+        return
+    report = await migrate(db)
+    await db.migrations.update_one(
+        {"_id": MIGRATION_STATE_ID},
+        {"$set": {"completed_at": datetime.now(timezone.utc), "report": report}},
+        upsert=True,
+    )
+    logger.info(f"🕒 Datetime normalization complete: {report or 'nothing to convert'}")
@@ -2,9 +2,14 @@
 DogeFood Lab — SEASON 2 Ingredient System
 50 ingredients across 5 tiers: Starter / Rare / Epic / Legendary / Mythic
 Backend crafting engine remains untouched; only the catalog data is replaced.
+IngredientSystem indexes the static catalog once, at construction.
 """
 
-from typing import Dict, List, Optional
+import json
+import math
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 from enum import Enum
 from dataclasses import dataclass
 
@@ -226,38 +231,115 @@ CATEGORY_STYLES = {
 }
 
 
+RECIPE_PROFILE_CACHE_SIZE = 4096
+
+# Bit per SpecialEffect, in declaration order, for RecipeProfile.effects_mask
+EFFECT_BITS = {effect: 1 << i for i, effect in enumerate(SpecialEffect)}
+
+
+@dataclass(frozen=True)
+class RecipeProfile:
+    """Everything the recipe checks need, from one pass over the ingredients."""
+    count: int
+    weight_sum: float
+    effects_mask: int
+    has_mythic_catalyst: bool
+    has_legendary_gate: bool
+
+
+def _dumps(content) -> bytes:
+    # Same encoding as FastAPI's JSONResponse, so pre-serialized bodies are
+    # byte-for-byte what the endpoint used to return
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def _ingredient_json(ing: Ingredient) -> dict:
+    return {
+        "id": ing.id,
+        "name": ing.name,
+        "category": ing.category.value,
+        "rarity_weight": ing.rarity_weight,
+        "description": ing.description,
+        "special_effect": ing.special_effect.value,
+        "unlock_level": ing.unlock_level,
+        "emoji": ing.emoji,
+        "color": ing.color,
+    }
+
+
 class IngredientSystem:
     def __init__(self):
         self.ingredients = INGREDIENTS_CATALOG
         self.category_styles = CATEGORY_STYLES
 
+        # Level index: ingredients by unlock_level (catalog order within a
+        # level) and the parallel list of levels to bisect on
+        self._by_level: List[Ingredient] = sorted(self.ingredients.values(), key=lambda ing: ing.unlock_level)
+        self._levels: List[int] = [ing.unlock_level for ing in self._by_level]
+        self._by_category: Dict[IngredientCategory, List[Ingredient]] = {cat: [] for cat in IngredientCategory}
+        for ing in self.ingredients.values():
+            self._by_category[ing.category].append(ing)
+
+        self._rows: List[dict] = [_ingredient_json(ing) for ing in self._by_level]
+        # Pre-serialized bodies, indexed by how many ingredients are unlocked
+        self._rows_json: List[bytes] = [_dumps(self._rows[:n]) for n in range(len(self._rows) + 1)]
+        self._unlocked_json: List[bytes] = [
+            _dumps(self._unlocked_overview(n)) for n in range(len(self._rows) + 1)
+        ]
+
+        self._profile = lru_cache(maxsize=RECIPE_PROFILE_CACHE_SIZE)(self._build_profile)
+
+    def _unlocked_count(self, player_level: int) -> int:
+        return bisect_right(self._levels, player_level)
+
     def get_ingredient(self, ingredient_id: str) -> Optional[Ingredient]:
         return self.ingredients.get(ingredient_id)
 
     def get_ingredients_by_category(self, category: IngredientCategory) -> List[Ingredient]:
-        return [ing for ing in self.ingredients.values() if ing.category == category]
+        return list(self._by_category.get(category, ()))
 
     def get_unlocked_ingredients(self, player_level: int) -> List[Ingredient]:
-        return [ing for ing in self.ingredients.values() if ing.unlock_level <= player_level]
+        return self._by_level[:self._unlocked_count(player_level)]
 
     def get_locked_ingredients(self, player_level: int) -> List[Ingredient]:
-        return [ing for ing in self.ingredients.values() if ing.unlock_level > player_level]
+        return self._by_level[self._unlocked_count(player_level):]
 
     def get_ingredients_for_level_range(self, min_level: int, max_level: int) -> List[Ingredient]:
-        return [
-            ing for ing in self.ingredients.values()
-            if min_level <= ing.unlock_level <= max_level
-        ]
+        return self._by_level[bisect_left(self._levels, min_level):bisect_right(self._levels, max_level)]
 
-    def calculate_rarity_modifier(self, ingredients: List[str]) -> float:
-        total_weight = 0.0
-        for ing_id in ingredients:
-            ing = self.get_ingredient(ing_id)
+    def _build_profile(self, key: Tuple[str, ...]) -> RecipeProfile:
+        weights = []
+        mask = 0
+        for ing_id in key:
+            ing = self.ingredients.get(ing_id)
             if ing:
-                total_weight += ing.rarity_weight
-        return total_weight / len(ingredients) if ingredients else 1.0
+                weights.append(ing.rarity_weight)
+                mask |= EFFECT_BITS[ing.special_effect]
+        return RecipeProfile(
+            count=len(key),
+            # fsum: exact, so the memoized sum can't depend on recipe order
+            weight_sum=math.fsum(weights),
+            effects_mask=mask & ~EFFECT_BITS[SpecialEffect.NONE],
+            has_mythic_catalyst=bool(mask & EFFECT_BITS[SpecialEffect.MYTHIC_REQUIRED]),
+            has_legendary_gate=bool(mask & EFFECT_BITS[SpecialEffect.LEGENDARY_GATE]),
+        )
+
+    def recipe_profile(self, ingredients: List[str]) -> RecipeProfile:
+        """Weight sum, effects bitmask and gate flags for a recipe; memoized
+        per sorted ingredient tuple, so ingredient order doesn't matter."""
+        return self._profile(tuple(sorted(ingredients)))
+
+    def calculate_rarity_modifier(self, ingredients: List[str]) -> float:
+        if not ingredients:
+            return 1.0
+        profile = self.recipe_profile(ingredients)
+        return profile.weight_sum / profile.count
 
     def get_special_effects(self, ingredients: List[str]) -> List[SpecialEffect]:
+        # The profile answers "none at all"; the list itself keeps recipe order
+        if not self.recipe_profile(ingredients).effects_mask:
+            return []
         effects = []
         for ing_id in ingredients:
             ing = self.get_ingredient(ing_id)
@@ -266,18 +348,10 @@ class IngredientSystem:
         return effects
 
     def has_mythic_catalyst(self, ingredients: List[str]) -> bool:
-        for ing_id in ingredients:
-            ing = self.get_ingredient(ing_id)
-            if ing and ing.special_effect == SpecialEffect.MYTHIC_REQUIRED:
-                return True
-        return False
+        return self.recipe_profile(ingredients).has_mythic_catalyst
 
     def has_legendary_gate(self, ingredients: List[str]) -> bool:
-        for ing_id in ingredients:
-            ing = self.get_ingredient(ing_id)
-            if ing and ing.special_effect == SpecialEffect.LEGENDARY_GATE:
-                return True
-        return False
+        return self.recipe_profile(ingredients).has_legendary_gate
 
     def can_create_rarity(self, ingredients: List[str], target_rarity: str) -> bool:
         count = len(ingredients)
@@ -299,37 +373,73 @@ class IngredientSystem:
         return True
 
     def get_all_ingredients_json(self) -> List[dict]:
-        return [
-            {
-                "id": ing.id,
-                "name": ing.name,
-                "category": ing.category.value,
-                "rarity_weight": ing.rarity_weight,
-                "description": ing.description,
-                "special_effect": ing.special_effect.value,
-                "unlock_level": ing.unlock_level,
-                "emoji": ing.emoji,
-                "color": ing.color,
-            }
-            for ing in self.ingredients.values()
-        ]
+        return [_ingredient_json(ing) for ing in self.ingredients.values()]
 
     def export_ingredients_for_frontend(self, max_level: int) -> List[dict]:
         """Ingredients unlocked at or before max_level, formatted for the frontend."""
-        return [
-            {
+        return [dict(row) for row in self._rows[:self._unlocked_count(max_level)]]
+
+    def export_ingredients_json(self, max_level: int, **fields) -> bytes:
+        """JSON body {"ingredients": export_ingredients_for_frontend(max_level),
+        **fields}, with the ingredient list spliced in pre-serialized."""
+        body = b'{"ingredients":' + self._rows_json[self._unlocked_count(max_level)]
+        return body + (b"," + _dumps(fields)[1:] if fields else b"}")
+
+    def _unlocked_overview(self, unlocked_count: int) -> dict:
+        unlocked = self._by_level[:unlocked_count]
+        locked = self._by_level[unlocked_count:]
+
+        unlocked_by_category: Dict[str, List[dict]] = {}
+        for ing in unlocked:
+            unlocked_by_category.setdefault(ing.category.value, []).append({
                 "id": ing.id,
                 "name": ing.name,
-                "category": ing.category.value,
-                "rarity_weight": ing.rarity_weight,
+                "emoji": ing.emoji,
                 "description": ing.description,
                 "special_effect": ing.special_effect.value,
-                "unlock_level": ing.unlock_level,
-                "emoji": ing.emoji,
+                "rarity_weight": ing.rarity_weight,
                 "color": ing.color,
-            }
-            for ing in self.get_unlocked_ingredients(max_level)
-        ]
+                "unlock_level": ing.unlock_level,
+            })
+
+        # Next 3 unlock levels
+        next_unlocks = []
+        for level in sorted(set(ing.unlock_level for ing in locked))[:3]:
+            next_unlocks.append({
+                "level": level,
+                "ingredients": [
+                    {"id": ing.id, "name": ing.name, "emoji": ing.emoji, "category": ing.category.value}
+                    for ing in locked if ing.unlock_level == level
+                ],
+            })
+
+        return {
+            "unlocked_count": len(unlocked),
+            "locked_count": len(locked),
+            "unlocked_by_category": unlocked_by_category,
+            "ingredients": [
+                {
+                    "id": ing.id,
+                    "name": ing.name,
+                    "category": ing.category.value,
+                    "emoji": ing.emoji,
+                    "description": ing.description,
+                    "special_effect": ing.special_effect.value,
+                    "rarity_weight": ing.rarity_weight,
+                    "color": ing.color,
+                    "unlock_level": ing.unlock_level,
+                }
+                for ing in unlocked
+            ],
+            "next_unlocks": next_unlocks,
+            "categories": self.get_category_info(),
+        }
+
+    def unlocked_overview_json(self, player_level: int) -> bytes:
+        """JSON body for /ingredients/unlocked/{player_level}, pre-serialized
+        per unlock count with player_level spliced in front."""
+        body = self._unlocked_json[self._unlocked_count(player_level)]
+        return _dumps({"player_level": player_level})[:-1] + b"," + body[1:]
 
     def get_category_info(self) -> List[dict]:
         return [
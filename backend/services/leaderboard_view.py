@@ -0,0 +1,346 @@
+"""
+DogeFood Lab — materialized leaderboard (leaderboard_entries)
+One pre-ranked row per player identity (Telegram docs collapsed onto
+"tg_<id>"), kept current by sync_player() after every points write and
+rebuilt from players + treats by the periodic reconcile.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from services import response_cache
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_INTERVAL_SECONDS = 15 * 60
+REBUILD_BATCH_SIZE = 1000
+DUPLICATE_KEY = 11000
+
+# Fields copied from the player doc onto the leaderboard row
+_PLAYER_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "address": 1,
+    "nickname": 1,
+    "telegram_first_name": 1,
+    "telegram_id": 1,
+    "guest_id": 1,
+    "points": 1,
+    "level": 1,
+    "created_treats": 1,
+    "last_active": 1,
+    "is_nft_holder": 1,
+    "is_dogeonews_holder": 1,
+    "is_vip": 1,
+    "selected_character": 1,
+    "vip_bonus_claimed": 1,
+}
+
+_EXCLUDED_ADDRESSES = (None, "", "GUEST_USER")
+
+
+async def ensure_indexes(db):
+    """Call once at startup, alongside the app's other create_index calls."""
+    await db.leaderboard_entries.create_index("key", unique=True)
+    await db.leaderboard_entries.create_index(
+        [("has_collected", 1), ("vip_only", 1), ("points", -1), ("level", -1), ("key", 1)]
+    )
+
+
+# ─── Identity helpers ───────────────────────────────────────────────────────
+
+def identity_key(player: dict) -> Optional[str]:
+    """Collapse every historical Telegram doc shape onto one key; wallet and
+    guest players are keyed by their address (already a stable id)."""
+    tg_id = player.get("telegram_id")
+    if tg_id is not None:
+        try:
+            return f"tg_{int(tg_id)}"
+        except (ValueError, TypeError):
+            pass
+    addr = player.get("address") or ""
+    if addr.lower().startswith("tg_"):
+        return f"tg_{addr[3:]}"
+    return addr or None
+
+
+def _creator_key(creator_address: str) -> Optional[str]:
+    if not creator_address or creator_address in _EXCLUDED_ADDRESSES:
+        return None
+    if creator_address.lower().startswith("tg_"):
+        return f"tg_{creator_address[3:]}"
+    return creator_address
+
+
+def _richness(d: dict):
+    """Same canonical-doc ordering find_player_by_address uses."""
+    return (
+        int(d.get("points") or 0),
+        len(d.get("created_treats") or []),
+        str(d.get("last_active") or ""),
+    )
+
+
+def _merge_identity(docs: List[dict]) -> dict:
+    """Pick the richest doc, carrying Telegram identity fields over from the
+    others when the winner is missing them."""
+    best = dict(max(docs, key=_richness))
+    for other in docs:
+        for k in ("telegram_id", "telegram_first_name", "nickname"):
+            if not best.get(k) and other.get(k):
+                best[k] = other[k]
+    return best
+
+
+def _entry_from_player(player: dict) -> dict:
+    points = int(player.get("points") or 0)
+    return {
+        "address": player.get("address") or f"tg_{player.get('telegram_id')}",
+        "nickname": player.get("nickname") or player.get("telegram_first_name") or "Player",
+        "points": points,
+        "level": int(player.get("level") or 1),
+        "is_nft_holder": bool(player.get("is_nft_holder", False)),
+        "is_dogeonews_holder": bool(player.get("is_dogeonews_holder", False)),
+        "is_vip": bool(player.get("is_vip", False)),
+        "selected_character": player.get("selected_character"),
+        "vip_only": bool(player.get("vip_bonus_claimed")) and points <= 500,
+    }
+
+
+async def _load_identity_docs(db, address: str) -> List[dict]:
+    """Every player doc belonging to the same identity as `address`."""
+    tg_id_str = None
+    docs = []
+    if address.lower().startswith("tg_"):
+        tg_id_str = address[3:]
+    else:
+        doc = await db.players.find_one({"address": address}, _PLAYER_PROJECTION)
+        if not doc:
+            return []
+        docs.append(doc)
+        if doc.get("telegram_id") is None:
+            return docs
+        tg_id_str = str(doc["telegram_id"])
+
+    or_clauses = [
+        {"address": f"TG_{tg_id_str}"},
+        {"address": f"tg_{tg_id_str}"},
+    ]
+    try:
+        or_clauses.append({"telegram_id": int(tg_id_str)})
+    except (ValueError, TypeError):
+        pass
+
+    seen = {d.get("id") for d in docs}
+    async for doc in db.players.find({"$or": or_clauses}, _PLAYER_PROJECTION):
+        if doc.get("id") not in seen:
+            seen.add(doc.get("id"))
+            docs.append(doc)
+    return docs
+
+
+# ─── Incremental maintenance ────────────────────────────────────────────────
+
+async def sync_player(db, address: str, collected: bool = False) -> None:
+    """Re-copy one identity's canonical player doc onto its leaderboard row.
+
+    Call after any write that changes points. Pass collected=True from the
+    treat-collect path so the row becomes eligible for the ranked list.
+    """
+    if not address or address in _EXCLUDED_ADDRESSES:
+        return
+    docs = await _load_identity_docs(db, address)
+    if not docs:
+        return
+    player = _merge_identity(docs)
+    key = identity_key(player)
+    if not key:
+        return
+
+    fields = _entry_from_player(player)
+    fields["updated_at"] = datetime.now(timezone.utc)
+    update = {"$set": fields}
+    if collected:
+        fields["has_collected"] = True
+    else:
+        update["$setOnInsert"] = {"has_collected": False}
+    await db.leaderboard_entries.update_one({"key": key}, update, upsert=True)
+
+
+async def sync_players(db, addresses: Iterable[str]) -> None:
+    """sync_player() for a batch of addresses (e.g. arena settlement)."""
+    for addr in dict.fromkeys(a for a in addresses if a):
+        try:
+            await sync_player(db, addr)
+        except Exception as exc:
+            logger.warning(f"Leaderboard sync skipped for {addr}: {exc}")
+
+
+async def _write_rebuild_batch(db, ops: List[UpdateOne]) -> int:
+    try:
+        await db.leaderboard_entries.bulk_write(ops, ordered=False)
+        return len(ops)
+    except BulkWriteError as exc:
+        errors = exc.details.get("writeErrors", [])
+        if any(e.get("code") != DUPLICATE_KEY for e in errors):
+            raise
+        return len(ops) - len(errors)
+
+
+async def rebuild(db) -> int:
+    """Recompute every row from players + treats. Returns rows written.
+
+    This is the only place the old treats.distinct() scan still happens,
+    and it runs off the request path. Rows sync_player() touched after the
+    snapshot started are newer than it, so they are neither overwritten
+    nor deleted.
+    """
+    now = datetime.now(timezone.utc)
+    collected_keys = {
+        _creator_key(a)
+        for a in await db.treats.distinct(
+            "creator_address",
+            {"brewing_status": "collected",
+             "creator_address": {"$nin": list(_EXCLUDED_ADDRESSES)}},
+        )
+    }
+    collected_keys.discard(None)
+
+    grouped = {}
+    cursor = db.players.find(
+        {"$or": [
+            {"address": {"$nin": list(_EXCLUDED_ADDRESSES)}},
+            {"telegram_id": {"$exists": True, "$ne": None}},
+        ]},
+        _PLAYER_PROJECTION,
+    )
+    async for doc in cursor:
+        key = identity_key(doc)
+        if key:
+            grouped.setdefault(key, []).append(doc)
+
+    run_id = str(uuid.uuid4())
+    ops = []
+    written = 0
+    for key, docs in grouped.items():
+        fields = _entry_from_player(_merge_identity(docs))
+        has_collected = key in collected_keys or any(
+            _creator_key(d.get("address")) in collected_keys for d in docs
+        )
+        fields.update({
+            "has_collected": has_collected,
+            "rebuild_id": run_id,
+            "updated_at": now,
+        })
+        # A row synced since `now` doesn't match, and its upsert fails on the
+        # unique key — skipped, the synced values are fresher than ours
+        ops.append(UpdateOne({"key": key, "updated_at": {"$lt": now}}, {"$set": fields}, upsert=True))
+        if len(ops) >= REBUILD_BATCH_SIZE:
+            written += await _write_rebuild_batch(db, ops)
+            ops = []
+    if ops:
+        written += await _write_rebuild_batch(db, ops)
+
+    # Drop rows for identities that no longer exist (deleted/merged players),
+    # keeping any sync_player() created while the rebuild ran
+    await db.leaderboard_entries.delete_many({"rebuild_id": {"$ne": run_id}, "updated_at": {"$lt": now}})
+    response_cache.invalidate("leaderboard")
+    logger.info(f"🏆 Leaderboard view rebuilt: {written} entries ({len(collected_keys)} collectors)")
+    return written
+
+
+# ─── Read path ──────────────────────────────────────────────────────────────
+
+_READ_PROJECTION = {"_id": 0, "rebuild_id": 0, "updated_at": 0}
+# Full display order. `key` breaks points/level ties so a player's rank is
+# the same whether it comes from get_top(), get_rank() or get_around().
+_SORT = [("points", -1), ("level", -1), ("key", 1)]
+_RANKED = {"has_collected": True, "vip_only": False}
+# Season just started — no treats collected yet, show all registered players
+_SEASON_START = {"vip_only": False}
+
+
+async def _ranked_filter(db) -> dict:
+    if await db.leaderboard_entries.find_one({"has_collected": True}, {"_id": 1}):
+        return _RANKED
+    return _SEASON_START
+
+
+async def get_top(db, limit: int, skip: int = 0) -> List[dict]:
+    """Rows in display order. One indexed range read on the hot path; the
+    empty-season fallback and first-boot rebuild only run when the ranked
+    range comes back empty."""
+    rows = await db.leaderboard_entries.find(
+        _RANKED, _READ_PROJECTION
+    ).sort(_SORT).skip(skip).limit(limit).to_list(limit)
+    if rows:
+        return rows
+
+    if await db.leaderboard_entries.estimated_document_count() == 0:
+        if await rebuild(db):
+            return await get_top(db, limit, skip)
+        return []
+
+    if await _ranked_filter(db) is _RANKED:
+        return []
+    return await db.leaderboard_entries.find(
+        _SEASON_START, _READ_PROJECTION
+    ).sort(_SORT).skip(skip).limit(limit).to_list(limit)
+
+
+async def get_entry(db, player: dict) -> Optional[dict]:
+    key = identity_key(player)
+    if not key:
+        return None
+    return await db.leaderboard_entries.find_one({"key": key}, _READ_PROJECTION)
+
+
+async def get_rank(db, entry: dict) -> Optional[int]:
+    """1-based display rank of a leaderboard row, or None if the row isn't
+    shown on the leaderboard at all. A single covered $count over the
+    (has_collected, vip_only, points, level, key) index — cost depends on
+    the row's position, never on re-ranking the whole board."""
+    ranked = await _ranked_filter(db)
+    if any(entry.get(k) != v for k, v in ranked.items()):
+        return None
+    points, level, key = entry.get("points", 0), entry.get("level", 1), entry["key"]
+    ahead = await db.leaderboard_entries.count_documents({
+        **ranked,
+        "$or": [
+            {"points": {"$gt": points}},
+            {"points": points, "level": {"$gt": level}},
+            {"points": points, "level": level, "key": {"$lt": key}},
+        ],
+    })
+    return ahead + 1
+
+
+async def get_around(db, rank: int, radius: int = 5) -> List[dict]:
+    """Rows from rank-radius to rank+radius, each tagged with its rank."""
+    first = max(1, rank - radius)
+    rows = await get_top(db, limit=rank + radius - first + 1, skip=first - 1)
+    return [{**row, "rank": first + i} for i, row in enumerate(rows)]
+
+
+# ─── Background reconcile ───────────────────────────────────────────────────
+
+async def run_reconcile_loop(db):
+    """Background task started at server boot: full rebuild now, then every
+    RECONCILE_INTERVAL_SECONDS."""
+    logger.info("🏆 Leaderboard reconcile loop starting")
+    while True:
+        try:
+            await rebuild(db)
+        except asyncio.CancelledError:
+            break
+        except Exception as exc:
+            logger.warning(f"🏆 Leaderboard rebuild failed (will retry): {exc}")
+        try:
+            await asyncio.sleep(RECONCILE_INTERVAL_SECONDS)
+        except asyncio.CancelledError:
+            break
@@ -0,0 +1,180 @@
+"""
+DogeFood Lab — pooled, rate-limited Telegram and Web Push senders
+TelegramSender keeps one Bot behind a global and per-chat rate limit;
+WebPushSender runs pushes on a dedicated thread pool.
+"""
+import asyncio
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, Optional
+
+import requests
+from pywebpush import WebPushException, webpush
+from requests.adapters import HTTPAdapter
+from telegram import Bot
+from telegram.error import RetryAfter
+from telegram.request import HTTPXRequest
+
+logger = logging.getLogger(__name__)
+
+# Telegram Bot API: ~30 messages/second overall, ~1 message/second per chat
+TELEGRAM_GLOBAL_RATE = 25
+TELEGRAM_BURST = 25
+TELEGRAM_PER_CHAT_INTERVAL = 1.0
+TELEGRAM_POOL_SIZE = 32
+TELEGRAM_MAX_RETRIES = 2
+
+WEB_PUSH_CONCURRENCY = 16
+WEB_PUSH_TIMEOUT_SECONDS = 10
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float) -> None:
+        """Hand out nothing for `seconds` (server asked us to back off)."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0
+
+    async def acquire(self) -> None:
+        # Waiters queue on the lock, so tokens are granted first come first served
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def _retry_after_seconds(exc: RetryAfter) -> float:
+    retry_after = exc.retry_after
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+
+class TelegramSender:
+    def __init__(self, token: Optional[str]):
+        self.token = token
+        self._bot: Optional[Bot] = None
+        self._bot_lock = asyncio.Lock()
+        self._bucket = TokenBucket(TELEGRAM_GLOBAL_RATE, TELEGRAM_BURST)
+        self._next_chat_slot: Dict[int, float] = {}
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.token)
+
+    async def _get_bot(self) -> Bot:
+        if self._bot is None:
+            async with self._bot_lock:
+                if self._bot is None:
+                    bot = Bot(
+                        token=self.token,
+                        request=HTTPXRequest(connection_pool_size=TELEGRAM_POOL_SIZE),
+                    )
+                    await bot.initialize()
+                    self._bot = bot
+        return self._bot
+
+    async def _wait_for_chat(self, chat_id: int) -> None:
+        now = time.monotonic()
+        slot = max(now, self._next_chat_slot.get(chat_id, 0.0))
+        self._next_chat_slot[chat_id] = slot + TELEGRAM_PER_CHAT_INTERVAL
+        if len(self._next_chat_slot) > 10_000:
+            self._next_chat_slot = {c: t for c, t in self._next_chat_slot.items() if t > now}
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def send(self, chat_id: int, text: str) -> None:
+        """Send one message, waiting for rate-limit capacity. Raises the
+        Telegram error if it still fails (e.g. Forbidden: the user never
+        /start'd the bot)."""
+        bot = await self._get_bot()
+        await self._wait_for_chat(chat_id)
+        for attempt in range(TELEGRAM_MAX_RETRIES + 1):
+            await self._bucket.acquire()
+            try:
+                await bot.send_message(chat_id=chat_id, text=text)
+                return
+            except RetryAfter as e:
+                wait = _retry_after_seconds(e)
+                logger.warning(f"Telegram flood control: backing off {wait:.0f}s")
+                self._bucket.pause(wait)
+                if attempt == TELEGRAM_MAX_RETRIES:
+                    raise
+
+    async def close(self) -> None:
+        if self._bot is not None:
+            await self._bot.shutdown()
+            self._bot = None
+
+
+class WebPushSender:
+    def __init__(self, vapid_private_key: str, vapid_subject: str,
+                 concurrency: int = WEB_PUSH_CONCURRENCY):
+        self.vapid_private_key = vapid_private_key
+        self.vapid_subject = vapid_subject
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        self._session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="webpush")
+
+    def _send_sync(self, subscription_info: dict, payload: str) -> None:
+        webpush(
+            subscription_info=subscription_info,
+            data=payload,
+            vapid_private_key=self.vapid_private_key,
+            vapid_claims={"sub": self.vapid_subject},
+            timeout=WEB_PUSH_TIMEOUT_SECONDS,
+            requests_session=self._session,
+        )
+
+    async def send(self, subscription_info: dict, title: str, body: str,
+                   url: str = "/", icon: str = "/dogefood-logo.png") -> bool:
+        """Returns False if the subscription is expired / invalid so the
+        caller can mark it inactive."""
+        if not self.vapid_private_key:
+            logger.warning("VAPID_PRIVATE_KEY not configured — skipping web push")
+            return False
+        if not subscription_info or not subscription_info.get("endpoint"):
+            return False
+        payload = json.dumps({"title": title, "body": body, "url": url, "icon": icon})
+        try:
+            # pywebpush is synchronous — run it on our own pool so we don't block
+            await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._send_sync, subscription_info, payload
+            )
+            return True
+        except WebPushException as e:
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            if status in (404, 410):
+                # Subscription gone — caller should mark inactive.
+                logger.info(f"Web push subscription expired (status {status})")
+                return False
+            logger.warning(f"WebPushException: {e}")
+            return False
+        except Exception as e:
+            logger.error(f"send_web_push unexpected error: {e}")
+            return False
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+        self._session.close()
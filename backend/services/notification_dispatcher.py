@@ -0,0 +1,239 @@
+"""
+DogeFood Lab — scheduled notification dispatcher (treat ready / limit reset)
+Sleeps until the earliest due_at, claims due rows in batches and delivers
+them through the injected Telegram / Web Push senders.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from services.datetime_fields import to_datetime
+
+logger = logging.getLogger(__name__)
+
+DISPATCH_BATCH_SIZE = 500
+DISPATCH_CONCURRENCY = 20
+MAX_IDLE_SECONDS = 30
+CLAIM_LEASE_SECONDS = 300
+RETRY_DELAY_SECONDS = 30
+
+_RELEASE_CLAIM = {"claim_id": "", "claimed_at": ""}
+
+
+def due_at_for(notification: Dict) -> Optional[datetime]:
+    """When a scheduled notification should go out (ready_time for treat
+    ready, reset_time for limit reset)."""
+    if notification.get("type") == "treat_ready":
+        return to_datetime(notification.get("ready_time"))
+    return to_datetime(notification.get("reset_time"))
+
+
+def _message(notification: Dict) -> Tuple[str, str]:
+    if notification["type"] == "treat_ready":
+        return "🍖 Treat Ready!", (
+            f"Your {notification.get('treat_name', 'treat')} is ready to collect — "
+            f"head to the lab before it gets cold!"
+        )
+    return "🔄 Daily Limit Reset", "You can create more treats now. Time to brew!"
+
+
+class NotificationDispatcher:
+    """Senders are injected so server.py keeps owning the clients:
+    send_telegram(chat_id, text) returns False to retry later,
+    send_web_push(subscription, title, body, url) False when the endpoint
+    is gone."""
+
+    def __init__(self, db,
+                 send_telegram: Callable[[int, str], Awaitable[bool]],
+                 send_web_push: Callable[..., Awaitable[bool]]):
+        self.db = db
+        self.send_telegram = send_telegram
+        self.send_web_push = send_web_push
+        self._wakeup = asyncio.Event()
+        self._sleep_until: Optional[datetime] = None
+        self._send_slots = asyncio.Semaphore(DISPATCH_CONCURRENCY)
+
+    async def ensure_indexes(self):
+        await self.db.scheduled_notifications.create_index([("sent", 1), ("due_at", 1)])
+        await self.db.scheduled_notifications.create_index("claim_id", sparse=True)
+
+    async def backfill_due_at(self) -> int:
+        """Give unsent rows without a due time (written before due_at
+        existed, or with an unparseable target time) one, or retire them."""
+        ops = []
+        async for notif in self.db.scheduled_notifications.find(
+            {"sent": False, "due_at": None},
+            {"_id": 1, "type": 1, "ready_time": 1, "reset_time": 1},
+        ):
+            due_at = due_at_for(notif)
+            if due_at is None:
+                ops.append(UpdateOne({"_id": notif["_id"]},
+                                     {"$set": {"sent": True, "skipped_reason": "invalid_target_time"}}))
+            else:
+                ops.append(UpdateOne({"_id": notif["_id"]}, {"$set": {"due_at": due_at}}))
+        if ops:
+            await self.db.scheduled_notifications.bulk_write(ops, ordered=False)
+        return len(ops)
+
+    # ── Timer ───────────────────────────────────────────────────────────
+
+    def schedule(self, due_at: Optional[datetime]) -> None:
+        """Hint from a writer that a notification is due at `due_at`; wakes
+        the dispatcher early if it is sleeping past that."""
+        if due_at is None:
+            return
+        if self._sleep_until is None or due_at < self._sleep_until:
+            self._wakeup.set()
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    def _claimable(self, now: datetime) -> Dict:
+        return {
+            "sent": False,
+            "$or": [
+                {"claimed_at": None},
+                {"claimed_at": {"$lt": now - timedelta(seconds=CLAIM_LEASE_SECONDS)}},
+            ],
+        }
+
+    async def _next_due_at(self, now: datetime) -> Optional[datetime]:
+        nxt = await self.db.scheduled_notifications.find_one(
+            {**self._claimable(now), "due_at": {"$ne": None}},
+            {"_id": 0, "due_at": 1},
+            sort=[("due_at", 1)],
+        )
+        return to_datetime(nxt["due_at"]) if nxt else None
+
+    # ── Claim + deliver ─────────────────────────────────────────────────
+
+    async def _claim_due(self, now: datetime) -> List[Dict]:
+        query = {**self._claimable(now), "due_at": {"$lte": now}}
+        due = await self.db.scheduled_notifications.find(query, {"_id": 0, "id": 1}) \
+            .sort("due_at", 1).limit(DISPATCH_BATCH_SIZE).to_list(DISPATCH_BATCH_SIZE)
+        if not due:
+            return []
+        claim_id = str(uuid.uuid4())
+        await self.db.scheduled_notifications.update_many(
+            {**query, "id": {"$in": [n["id"] for n in due]}},
+            {"$set": {"claim_id": claim_id, "claimed_at": now}},
+        )
+        return await self.db.scheduled_notifications.find({"claim_id": claim_id}).to_list(None)
+
+    async def _subscriptions(self, batch: List[Dict]) -> Tuple[Dict, Dict]:
+        telegram_ids = list({n["telegram_id"] for n in batch if n.get("telegram_id")})
+        addresses = list({n["player_address"] for n in batch
+                          if not n.get("telegram_id") and n.get("player_address")})
+        telegram_subs, web_subs = {}, {}
+        if telegram_ids:
+            async for sub in self.db.notification_subscriptions.find(
+                {"telegram_id": {"$in": telegram_ids}, "active": True}
+            ):
+                telegram_subs.setdefault(sub["telegram_id"], sub)
+        if addresses:
+            async for sub in self.db.notification_subscriptions.find(
+                {"player_address": {"$in": addresses}, "type": "web", "active": True}
+            ):
+                web_subs.setdefault(sub["player_address"], sub)
+        return telegram_subs, web_subs
+
+    async def _deliver(self, notification: Dict, sub: Optional[Dict], now: datetime) -> Tuple[Dict, bool]:
+        """Send one notification. Returns (update for its row, whether its
+        web push subscription should be deactivated)."""
+        if not sub:
+            return {"$set": {"sent": True, "skipped_reason": "subscription_inactive"}}, False
+        if not sub.get(notification["type"], True):
+            return {"$set": {"sent": True, "skipped_reason": "preference_disabled"}}, False
+
+        title, body = _message(notification)
+        async with self._send_slots:
+            if notification.get("telegram_id"):
+                if not await self.send_telegram(notification["telegram_id"], f"{title}\n\n{body}"):
+                    # Leave it unsent and try again shortly
+                    return {"$set": {"due_at": now + timedelta(seconds=RETRY_DELAY_SECONDS)}}, False
+                logger.info(f"📬 Telegram delivered: {notification['id']}")
+            else:
+                subscription_info = sub.get("subscription")
+                if not subscription_info:
+                    # In-tab only fallback — there's no PushSubscription, so
+                    # nothing to send while the tab is closed
+                    return {"$set": {"sent": True, "skipped_reason": "no_push_subscription"}}, False
+                if not await self.send_web_push(subscription_info, title=title, body=body, url="/lab"):
+                    return {"$set": {"sent": True, "skipped_reason": "push_failed"}}, True
+                logger.info(f"📬 Web push delivered: {notification['id']}")
+        return {"$set": {"sent": True, "sent_at": datetime.now(timezone.utc)}}, False
+
+    async def dispatch_due(self) -> int:
+        """Claim and deliver one batch of due notifications. Returns the
+        batch size."""
+        now = datetime.now(timezone.utc)
+        batch = await self._claim_due(now)
+        if not batch:
+            return 0
+        telegram_subs, web_subs = await self._subscriptions(batch)
+
+        async def _one(notification):
+            if notification.get("telegram_id"):
+                sub = telegram_subs.get(notification["telegram_id"])
+            else:
+                sub = web_subs.get(notification.get("player_address"))
+            try:
+                return notification, sub, await self._deliver(notification, sub, now)
+            except Exception as e:
+                logger.error(f"Error sending scheduled notification {notification.get('id')}: {e}")
+                return notification, sub, ({"$set": {"due_at": now + timedelta(seconds=RETRY_DELAY_SECONDS)}}, False)
+
+        outcomes = await asyncio.gather(*(_one(n) for n in batch))
+        notification_ops, dead_subs = [], set()
+        for notification, sub, (update, deactivate) in outcomes:
+            notification_ops.append(UpdateOne({"_id": notification["_id"]}, {**update, "$unset": _RELEASE_CLAIM}))
+            if deactivate:
+                dead_subs.add(sub["_id"])
+        await self.db.scheduled_notifications.bulk_write(notification_ops, ordered=False)
+        if dead_subs:
+            # Expired/invalid push endpoint
+            await self.db.notification_subscriptions.update_many(
+                {"_id": {"$in": list(dead_subs)}},
+                {"$set": {"active": False, "deactivated_reason": "push_failed"}},
+            )
+        return len(batch)
+
+    async def run_loop(self):
+        """Background task started at server boot."""
+        logger.info("🔔 Notification dispatcher started (Telegram + Web Push)")
+        try:
+            backfilled = await self.backfill_due_at()
+            if backfilled:
+                logger.info(f"🔔 Backfilled due_at on {backfilled} pending notifications")
+        except Exception as e:
+            logger.warning(f"🔔 due_at backfill failed (will retry next boot): {e}")
+
+        while True:
+            try:
+                self._wakeup.clear()
+                while await self.dispatch_due() >= DISPATCH_BATCH_SIZE:
+                    pass  # a wave — keep draining before sleeping
+
+                now = datetime.now(timezone.utc)
+                timeout = MAX_IDLE_SECONDS
+                next_due = await self._next_due_at(now)
+                if next_due is not None:
+                    timeout = min(timeout, max(0.0, (next_due - now).total_seconds()))
+                self._sleep_until = now + timedelta(seconds=timeout)
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+                self._sleep_until = None
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in notification dispatcher: {e}")
+                try:
+                    await asyncio.sleep(5)
+                except asyncio.CancelledError:
+                    break
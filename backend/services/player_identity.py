@@ -0,0 +1,171 @@
+"""
+DogeFood Lab — canonical player identity index
+Maps every accepted address spelling (wallet, guest, tg_/TG_/telegram_id)
+to the canonical players doc, via the player_aliases collection and an
+in-process LRU. Unknown aliases fall back to the richest-doc scan.
+"""
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+ALIAS_CACHE_SIZE = 50_000
+
+
+def alias_key(address: str) -> Optional[str]:
+    """Normalise any accepted spelling of a player address to its alias."""
+    if not address:
+        return None
+    if address.lower().startswith("tg_"):
+        return f"tg_{address[3:]}"
+    return address
+
+
+def _doc_answers_to(doc: dict, key: str) -> bool:
+    if alias_key(doc.get("address") or "") == key:
+        return True
+    return doc.get("telegram_id") is not None and f"tg_{doc['telegram_id']}" == key
+
+
+def _richness(d: dict):
+    return (
+        int(d.get("points") or 0),
+        len(d.get("created_treats") or []),
+        str(d.get("last_active") or ""),
+    )
+
+
+class PlayerIdentityIndex:
+    def __init__(self, db, cache_size: int = ALIAS_CACHE_SIZE):
+        self.db = db
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, object]" = OrderedDict()
+
+    async def ensure_indexes(self):
+        await self.db.player_aliases.create_index("alias", unique=True)
+        await self.db.player_aliases.create_index("player_oid")
+
+    # ── LRU ─────────────────────────────────────────────────────────────
+
+    def _cache_get(self, key: str):
+        oid = self._cache.get(key)
+        if oid is not None:
+            self._cache.move_to_end(key)
+        return oid
+
+    def _cache_put(self, key: str, oid) -> None:
+        self._cache[key] = oid
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    # ── Lookup ──────────────────────────────────────────────────────────
+
+    async def resolve(self, address: str) -> Optional[dict]:
+        """Return the canonical player doc for any address spelling (no _id)."""
+        key = alias_key(address)
+        if not key:
+            return None
+
+        oid = self._cache_get(key)
+        if oid is None:
+            alias = await self.db.player_aliases.find_one({"alias": key}, {"_id": 0, "player_oid": 1})
+            oid = (alias or {}).get("player_oid")
+
+        if oid is not None:
+            doc = await self.db.players.find_one({"_id": oid})
+            if doc and _doc_answers_to(doc, key):
+                self._cache_put(key, oid)
+                doc.pop("_id", None)
+                return doc
+            # Deleted or re-addressed since the alias was written
+            await self.forget(key)
+
+        doc = await self._scan(address)
+        if not doc:
+            return None
+        await self._bind_key(key, doc["_id"])
+        doc.pop("_id", None)
+        return doc
+
+    async def _scan(self, address: str) -> Optional[dict]:
+        """Full lookup over every address spelling, run on an alias miss.
+
+        For Telegram users, historical code paths created up to THREE
+        separate player documents for the same user:
+          A1) {address: "tg_<id>", telegram_id: null}    (lowercase, legacy)
+          A2) {address: "TG_<id>", telegram_id: null}    (UPPERCASE, modern)
+          B ) {address: null,     telegram_id: <int>}    (Telegram-auth doc)
+        Every candidate is collected and the canonical one returned — the
+        doc with the most points (tie-breakers: most treats, most recent
+        last_active) — so all endpoints converge on the same record.
+        """
+        if not address.lower().startswith("tg_"):
+            return await self.db.players.find_one({"address": address})
+
+        tg_id_str = address[3:]
+        or_clauses = [
+            {"address": address},
+            {"address": f"TG_{tg_id_str}"},
+            {"address": f"tg_{tg_id_str}"},
+        ]
+        try:
+            or_clauses.append({"telegram_id": int(tg_id_str)})
+        except (ValueError, TypeError):
+            pass
+
+        candidates = await self.db.players.find({"$or": or_clauses}).to_list(length=10)
+        if not candidates:
+            return None
+        return max(candidates, key=_richness)
+
+    # ── Maintenance ─────────────────────────────────────────────────────
+
+    async def _bind_key(self, key: str, oid) -> None:
+        await self.db.player_aliases.update_one(
+            {"alias": key},
+            {"$set": {"player_oid": oid, "updated_at": datetime.now(timezone.utc)}},
+            upsert=True,
+        )
+        self._cache_put(key, oid)
+
+    async def bind(self, player: dict) -> None:
+        """Record the aliases of a newly inserted doc without repointing any
+        that already exist. `player` must carry its Mongo _id (insert_one
+        fills it in on the dict it was given).
+
+        Telegram aliases are dropped instead: legacy tg_/TG_ docs may hold
+        the player's progress, so the next resolve() re-runs _scan() and
+        the richest doc keeps winning over the fresh, empty one."""
+        oid = player.get("_id")
+        if oid is None:
+            return
+        keys = {alias_key(player.get("address") or "")}
+        if player.get("telegram_id") is not None:
+            keys.add(f"tg_{player['telegram_id']}")
+        keys.discard(None)
+        for key in keys:
+            try:
+                if key.startswith("tg_"):
+                    await self.forget(key)
+                    continue
+                result = await self.db.player_aliases.update_one(
+                    {"alias": key},
+                    {"$setOnInsert": {"player_oid": oid, "updated_at": datetime.now(timezone.utc)}},
+                    upsert=True,
+                )
+                if result.upserted_id is not None:
+                    self._cache_put(key, oid)
+            except Exception as exc:
+                logger.warning(f"Alias bind skipped for {key}: {exc}")
+
+    async def forget(self, *addresses: str) -> None:
+        """Drop aliases so the next lookup re-resolves them from players."""
+        keys = [k for k in {alias_key(a) for a in addresses} if k]
+        if not keys:
+            return
+        for key in keys:
+            self._cache.pop(key, None)
+        await self.db.player_aliases.delete_many({"alias": {"$in": keys}})
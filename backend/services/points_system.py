@@ -9,8 +9,11 @@ from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 import logging
 import json
+import uuid
 from motor.motor_asyncio import AsyncIOMotorClient
 
+from services import leaderboard_view
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -34,6 +37,9 @@ class RankingSnapshot:
     rank_change: int  # +/- from previous snapshot
 
 class PointsCollectionSystem:
+    SNAPSHOT_RETENTION_DAYS = 30
+    SNAPSHOT_INSERT_BATCH = 1000
+
     def __init__(self, db: AsyncIOMotorClient):
         self.db = db
         
@@ -195,6 +201,7 @@ class PointsCollectionSystem:
             {"address": player_address},
             {"$inc": {"points": points}, "$set": {"last_active": datetime.utcnow()}}
         )
+        await leaderboard_view.sync_players(self.db, [player_address])
     
     async def get_player_points_history(self, player_address: str, days: int = 30) -> List[Dict]:
         """Get player's points transaction history"""
@@ -321,26 +328,40 @@ class PointsCollectionSystem:
         
         return streak
     
-    async def generate_leaderboard_snapshot(self) -> List[RankingSnapshot]:
-        """Generate current leaderboard snapshot"""
+    async def ensure_indexes(self):
+        """Call once at startup. Snapshot headers and rows expire via TTL
+        indexes instead of a delete_many on every snapshot; the
+        points_transactions index backs the weekly-points aggregation."""
+        ttl = self.SNAPSHOT_RETENTION_DAYS * 24 * 3600
+        await self.db.leaderboard_snapshots.create_index("timestamp", expireAfterSeconds=ttl)
+        await self.db.leaderboard_snapshot_rows.create_index("timestamp", expireAfterSeconds=ttl)
+        await self.db.leaderboard_snapshot_rows.create_index([("snapshot_id", 1), ("rank", 1)])
+        # Covers the weekly-points $match in get_points_leaderboard
+        await self.db.points_transactions.create_index([("player_address", 1), ("timestamp", -1)])
+
+    async def generate_leaderboard_snapshot(self, limit: int = 100) -> List[RankingSnapshot]:
+        """Generate current leaderboard snapshot
+
+        Treat counts for every ranked player come from one $group over
+        treats (not a count_documents per player), and the snapshot is
+        stored as one small header doc plus one compact row per player in
+        leaderboard_snapshot_rows, so cost stays flat as `limit` grows into
+        the thousands.
+        """
         
         # Get all players with points
-        pipeline = [
-            {"$match": {"points": {"$gt": 0}}},
-            {"$sort": {"points": -1, "level": -1, "last_active": -1}},
-            {"$limit": 100}
-        ]
+        players = await self.db.players.find(
+            {"points": {"$gt": 0}, "address": {"$type": "string"}},
+            {"_id": 0, "address": 1, "nickname": 1, "points": 1, "level": 1, "last_active": 1}
+        ).sort([("points", -1), ("level", -1), ("last_active", -1)]).limit(limit).to_list(limit)
         
-        players = await self.db.players.aggregate(pipeline).to_list(100)
-        
-        # Get previous rankings for comparison
-        previous_rankings = await self._get_previous_rankings()
+        addresses = [p["address"] for p in players]
+        treat_counts_task = self._count_treats_by_creator(addresses)
+        previous_rankings_task = self._get_previous_rankings()
+        treat_counts, previous_rankings = await asyncio.gather(treat_counts_task, previous_rankings_task)
         
         snapshots = []
         for rank, player in enumerate(players, 1):
-            # Get treat count
-            treat_count = await self.db.treats.count_documents({"creator_address": player["address"]})
-            
             # Calculate rank change
             previous_rank = previous_rankings.get(player["address"], rank)
             rank_change = previous_rank - rank  # Positive = moved up, negative = moved down
@@ -349,9 +370,9 @@ class PointsCollectionSystem:
                 player_address=player["address"],
                 nickname=player.get("nickname"),
                 total_points=player["points"],
-                level=player["level"],
-                treats_created=treat_count,
-                last_active=player["last_active"],
+                level=player.get("level", 1),
+                treats_created=treat_counts.get(player["address"], 0),
+                last_active=player.get("last_active"),
                 rank=rank,
                 rank_change=rank_change
             )
@@ -363,34 +384,66 @@ class PointsCollectionSystem:
         
         return snapshots
     
+    async def _count_treats_by_creator(self, addresses: List[str]) -> Dict[str, int]:
+        """Treat counts for many creators in a single aggregation"""
+        if not addresses:
+            return {}
+        pipeline = [
+            {"$match": {"creator_address": {"$in": addresses}}},
+            {"$group": {"_id": "$creator_address", "count": {"$sum": 1}}}
+        ]
+        rows = await self.db.treats.aggregate(pipeline).to_list(len(addresses))
+        return {row["_id"]: row["count"] for row in rows}
+    
     async def _get_previous_rankings(self) -> Dict[str, int]:
         """Get previous leaderboard rankings for comparison"""
         
         # Get most recent snapshot (from yesterday or last available)
         previous_snapshot = await self.db.leaderboard_snapshots.find_one(
             {"timestamp": {"$lt": datetime.utcnow() - timedelta(hours=12)}},
+            {"_id": 0, "snapshot_id": 1, "rankings.player_address": 1, "rankings.rank": 1},
             sort=[("timestamp", -1)]
         )
         
         if not previous_snapshot:
             return {}
         
-        return {entry["player_address"]: entry["rank"] for entry in previous_snapshot.get("rankings", [])}
+        # Legacy snapshots embedded the full rankings array in the header
+        if previous_snapshot.get("rankings"):
+            return {entry["player_address"]: entry["rank"] for entry in previous_snapshot["rankings"]}
+        
+        rows = self.db.leaderboard_snapshot_rows.find(
+            {"snapshot_id": previous_snapshot.get("snapshot_id")},
+            {"_id": 0, "player_address": 1, "rank": 1}
+        )
+        return {row["player_address"]: row["rank"] async for row in rows}
     
     async def _save_leaderboard_snapshot(self, snapshots: List[RankingSnapshot]):
         """Save leaderboard snapshot to database"""
         
-        snapshot_doc = {
-            "timestamp": datetime.utcnow(),
-            "rankings": [asdict(snapshot) for snapshot in snapshots],
-            "total_players": len(snapshots)
-        }
-        
-        await self.db.leaderboard_snapshots.insert_one(snapshot_doc)
+        now = datetime.utcnow()
+        snapshot_id = str(uuid.uuid4())
+        
+        rows = [{
+            "snapshot_id": snapshot_id,
+            "timestamp": now,
+            "player_address": s.player_address,
+            "rank": s.rank,
+            "rank_change": s.rank_change,
+            "total_points": s.total_points,
+            "treats_created": s.treats_created,
+        } for s in snapshots]
+        for i in range(0, len(rows), self.SNAPSHOT_INSERT_BATCH):
+            await self.db.leaderboard_snapshot_rows.insert_many(
+                rows[i:i + self.SNAPSHOT_INSERT_BATCH], ordered=False
+            )
         
-        # Clean up old snapshots (keep last 30 days)
-        cutoff_date = datetime.utcnow() - timedelta(days=30)
-        await self.db.leaderboard_snapshots.delete_many({"timestamp": {"$lt": cutoff_date}})
+        # Header last, so a reader never sees a snapshot with missing rows
+        await self.db.leaderboard_snapshots.insert_one({
+            "snapshot_id": snapshot_id,
+            "timestamp": now,
+            "total_players": len(snapshots)
+        })
     
     async def get_points_leaderboard(self, limit: int = 50, nft_holders_only: bool = True) -> List[Dict]:
         """Get current points leaderboard"""
@@ -408,15 +461,15 @@ class PointsCollectionSystem:
 
         players = await self.db.players.aggregate(pipeline).to_list(safe_limit)
         
+        # Weekly totals for every ranked player in one aggregation, so the
+        # request costs two queries whatever the limit
+        weekly_totals = await self._weekly_points_by_player(
+            [p["address"] for p in players if p.get("address")]
+        )
+        
         leaderboard = []
         for rank, player in enumerate(players, 1):
-            # Get recent activity
-            recent_points = await self.db.points_transactions.find({
-                "player_address": player["address"],
-                "timestamp": {"$gte": datetime.utcnow() - timedelta(days=7)}
-            }).to_list(100)
-
-            weekly_points = sum(int((t.get("amount") or 0)) for t in recent_points)
+            weekly_points = weekly_totals.get(player["address"], 0)
             
             leaderboard.append({
                 "rank": rank,
@@ -431,6 +484,20 @@ class PointsCollectionSystem:
         
         return leaderboard
     
+    async def _weekly_points_by_player(self, addresses: List[str]) -> Dict[str, int]:
+        """Sum of points_transactions over the last 7 days, per player"""
+        if not addresses:
+            return {}
+        pipeline = [
+            {"$match": {
+                "player_address": {"$in": addresses},
+                "timestamp": {"$gte": datetime.utcnow() - timedelta(days=7)}
+            }},
+            {"$group": {"_id": "$player_address", "total": {"$sum": {"$ifNull": ["$amount", 0]}}}}
+        ]
+        rows = await self.db.points_transactions.aggregate(pipeline).to_list(len(addresses))
+        return {row["_id"]: int(row["total"]) for row in rows}
+    
     async def get_player_stats(self, player_address: str) -> Dict:
         """Get comprehensive player statistics"""
         
@@ -0,0 +1,112 @@
+"""
+DogeFood Lab — shared response cache for hot public GET endpoints
+Per-namespace TTL LRU with single-flight misses and invalidate() for
+writers. Cached results are shared between callers: treat them as read-only.
+"""
+import asyncio
+import functools
+import inspect
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAXSIZE = 128
+
+
+class _NamespaceCache:
+    def __init__(self, name: str, ttl: float, maxsize: int):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.generation = 0
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._inflight: Dict[tuple, asyncio.Task] = {}
+
+    def get(self, key):
+        hit = self._entries.get(key)
+        if hit is None:
+            return False, None
+        expires_at, value = hit
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def put(self, key, value) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+        self._inflight.clear()
+
+    async def get_or_load(self, key, loader):
+        found, value = self.get(key)
+        if found:
+            return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            generation = self.generation
+
+            async def _load():
+                try:
+                    result = await loader()
+                    if generation == self.generation:
+                        self.put(key, result)
+                    return result
+                finally:
+                    if self._inflight.get(key) is task:
+                        del self._inflight[key]
+
+            task = asyncio.ensure_future(_load())
+            self._inflight[key] = task
+        # shield: one waiter disconnecting must not cancel the shared query
+        return await asyncio.shield(task)
+
+
+_namespaces: Dict[str, _NamespaceCache] = {}
+
+
+def cached(namespace: str, ttl: float, maxsize: int = DEFAULT_MAXSIZE):
+    """Cache an async function's result per distinct argument set.
+
+    The wrapper keeps the wrapped signature, so FastAPI still sees the
+    original query parameters. Arguments must be hashable.
+    """
+    if namespace in _namespaces:
+        raise ValueError(f"Response cache namespace '{namespace}' already registered")
+    cache = _namespaces[namespace] = _NamespaceCache(namespace, ttl, maxsize)
+
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = tuple(bound.arguments.items())
+            return await cache.get_or_load(key, lambda: fn(*args, **kwargs))
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+def invalidate(*namespaces: str) -> None:
+    """Drop cached results for the given namespaces (all of them if none
+    are named). Unknown names are ignored so writers can invalidate before
+    the route module registering them has been imported."""
+    targets = namespaces or tuple(_namespaces)
+    for name in targets:
+        cache = _namespaces.get(name)
+        if cache is not None:
+            cache.clear()
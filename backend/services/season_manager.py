@@ -1,13 +1,16 @@
 """
 Season Management System
 Handles 3-month seasons, player progress tracking, and season transitions
-for the DogeFood Lab game.
+for the DogeFood Lab game. Season leaderboards and stats read per-player
+daily rollups (season_daily_rollups).
 """
 
+import asyncio
 from typing import Dict, List
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from dataclasses import dataclass
 from enum import Enum
+from pymongo import UpdateOne
 
 
 class SeasonStatus(Enum):
@@ -31,6 +34,24 @@ class Season:
     special_events: List[str] = None
 
 
+ROLLUP_DAY_FORMAT = "%Y-%m-%d"
+ROLLUP_COMPACT_CHUNK_DAYS = 7
+# Run shortly after UTC midnight so the day just finished gets compacted
+ROLLUP_COMPACT_OFFSET = timedelta(minutes=10)
+ROLLUP_RETRY_SECONDS = 60
+
+
+def _rollup_day(dt: datetime) -> str:
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return dt.strftime(ROLLUP_DAY_FORMAT)
+
+
+def _counter_key(value) -> str:
+    """Rarity / ingredient ids become sub-document keys; keep them legal."""
+    return str(value).replace(".", "_").lstrip("$") or "unknown"
+
+
 class SeasonManager:
     def __init__(self, db_connection=None):
         """
@@ -192,6 +213,205 @@ class SeasonManager:
         default_desc = f"Season {season_id} - Continue your journey to become the ultimate DogeFood creator!"
         return descriptions.get(season_id, default_desc)
     
+    # ─── Daily rollups ──────────────────────────────────────────────────
+
+    async def ensure_indexes(self):
+        await self.db.season_daily_rollups.create_index(
+            [("player_address", 1), ("day", 1)], unique=True
+        )
+        await self.db.season_daily_rollups.create_index("day")
+
+    async def record_treat(self, player_address: str, rarity: str,
+                           ingredients: List[str], created_at: datetime = None):
+        """Fold one new treat into its creator's rollup row for the day."""
+        if self.db is None or not player_address:
+            return
+        await self.db.season_daily_rollups.update_one(
+            *self._rollup_update(player_address, rarity, ingredients, created_at),
+            upsert=True,
+        )
+
+    async def record_treats(self, treats: List[Dict]):
+        """record_treat() for a batch of inserted treat docs, in one bulk write."""
+        if self.db is None:
+            return
+        ops = [
+            UpdateOne(*self._rollup_update(t.get("creator_address"), t.get("rarity"),
+                                           t.get("ingredients"), t.get("created_at")),
+                      upsert=True)
+            for t in treats if t.get("creator_address")
+        ]
+        if ops:
+            await self.db.season_daily_rollups.bulk_write(ops, ordered=False)
+
+    @staticmethod
+    def _rollup_update(player_address: str, rarity: str, ingredients: List[str],
+                       created_at: datetime = None) -> tuple:
+        if not isinstance(created_at, datetime):
+            created_at = datetime.now(timezone.utc)
+        ingredients = ingredients or []
+
+        inc = {
+            "treats_created": 1,
+            "total_ingredients": len(ingredients),
+            f"rarity_counts.{_counter_key(rarity or 'Common')}": 1,
+        }
+        for ingredient in ingredients:
+            key = f"ingredient_counts.{_counter_key(ingredient)}"
+            inc[key] = inc.get(key, 0) + 1
+
+        return (
+            {"player_address": player_address, "day": _rollup_day(created_at)},
+            {"$inc": inc, "$set": {"updated_at": datetime.now(timezone.utc)}},
+        )
+
+    async def _rollups_ready(self) -> bool:
+        """Rollups only answer queries once the first backfill has completed."""
+        state = await self.db.season_rollup_state.find_one({"_id": "compaction"})
+        return bool(state and state.get("backfilled_at"))
+
+    async def _compact_range(self, start: datetime, end: datetime) -> int:
+        """Recompute rollup rows for every day in [start, end) from treats."""
+        match = {"$match": {"created_at": {"$gte": start, "$lt": end}}}
+        day = {"$dateToString": {"format": ROLLUP_DAY_FORMAT, "date": "$created_at"}}
+
+        rarity_rows = await self.db.treats.aggregate([
+            match,
+            {"$group": {
+                "_id": {"player": "$creator_address", "day": day, "rarity": "$rarity"},
+                "count": {"$sum": 1},
+                "ingredients": {"$sum": {"$size": {"$ifNull": ["$ingredients", []]}}},
+            }},
+        ], allowDiskUse=True).to_list(None)
+        ingredient_rows = await self.db.treats.aggregate([
+            match,
+            {"$unwind": "$ingredients"},
+            {"$group": {
+                "_id": {"player": "$creator_address", "day": day, "ingredient": "$ingredients"},
+                "count": {"$sum": 1},
+            }},
+        ], allowDiskUse=True).to_list(None)
+
+        now = datetime.now(timezone.utc)
+        rollups = {}
+
+        def row(group_id):
+            key = (group_id["player"], group_id["day"])
+            if key not in rollups:
+                rollups[key] = {
+                    "player_address": key[0],
+                    "day": key[1],
+                    "treats_created": 0,
+                    "total_ingredients": 0,
+                    "rarity_counts": {},
+                    "ingredient_counts": {},
+                    "updated_at": now,
+                }
+            return rollups[key]
+
+        for item in rarity_rows:
+            if not item["_id"].get("player"):
+                continue
+            r = row(item["_id"])
+            r["treats_created"] += item["count"]
+            r["total_ingredients"] += item["ingredients"]
+            rarity = _counter_key(item["_id"].get("rarity") or "Common")
+            r["rarity_counts"][rarity] = r["rarity_counts"].get(rarity, 0) + item["count"]
+        for item in ingredient_rows:
+            if not item["_id"].get("player"):
+                continue
+            r = row(item["_id"])
+            ingredient = _counter_key(item["_id"]["ingredient"])
+            r["ingredient_counts"][ingredient] = r["ingredient_counts"].get(ingredient, 0) + item["count"]
+
+        # Compacted days are authoritative: replace whatever live increments
+        # landed on them.
+        await self.db.season_daily_rollups.delete_many({
+            "day": {"$gte": _rollup_day(start), "$lt": _rollup_day(end)}
+        })
+        if rollups:
+            await self.db.season_daily_rollups.insert_many(list(rollups.values()), ordered=False)
+        return len(rollups)
+
+    async def compact_rollups(self) -> int:
+        """Rebuild rollups for every finished (UTC) day not yet compacted.
+
+        The first call backfills from the oldest treat, recording chunk
+        progress under backfill_through so an interrupted backfill resumes
+        where it stopped; backfilled_at is only set once it reaches today.
+        Later calls only touch the days since the previous run. Returns
+        rows written.
+        """
+        if self.db is None:
+            return 0
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+
+        state = await self.db.season_rollup_state.find_one({"_id": "compaction"}) or {}
+        backfilled = bool(state.get("backfilled_at"))
+        progress_field = "compacted_through" if backfilled else "backfill_through"
+        # A state doc from before backfilled_at existed resumes from compacted_through
+        done_through = state.get(progress_field) or state.get("compacted_through")
+        if done_through:
+            start = datetime.strptime(done_through, ROLLUP_DAY_FORMAT) + timedelta(days=1)
+        else:
+            oldest = await self.db.treats.find_one(
+                {"created_at": {"$type": "date"}}, {"_id": 0, "created_at": 1},
+                sort=[("created_at", 1)],
+            )
+            start = oldest["created_at"].replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None) if oldest else today
+
+        written = 0
+        while start < today:
+            end = min(start + timedelta(days=ROLLUP_COMPACT_CHUNK_DAYS), today)
+            written += await self._compact_range(start, end)
+            start = end
+            await self.db.season_rollup_state.update_one(
+                {"_id": "compaction"},
+                {"$set": {
+                    progress_field: _rollup_day(end - timedelta(days=1)),
+                    "updated_at": datetime.now(timezone.utc),
+                }},
+                upsert=True,
+            )
+        if not backfilled:
+            # Every finished day is compacted (or there were no treats at all)
+            await self.db.season_rollup_state.update_one(
+                {"_id": "compaction"},
+                {"$set": {
+                    "compacted_through": _rollup_day(today - timedelta(days=1)),
+                    "backfilled_at": datetime.now(timezone.utc),
+                    "updated_at": datetime.now(timezone.utc),
+                }},
+                upsert=True,
+            )
+        return written
+
+    async def run_rollup_compaction_loop(self):
+        """Background task started at server boot: backfill/catch up now,
+        then compact the finished day shortly after each UTC midnight. A
+        failed run is retried after ROLLUP_RETRY_SECONDS."""
+        while True:
+            now = datetime.now(timezone.utc)
+            try:
+                written = await self.compact_rollups()
+                print(f"📅 Season rollups compacted ({written} rows)")
+                next_run = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1) + ROLLUP_COMPACT_OFFSET
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"Error compacting season rollups (retrying in {ROLLUP_RETRY_SECONDS}s): {e}")
+                next_run = now + timedelta(seconds=ROLLUP_RETRY_SECONDS)
+            try:
+                await asyncio.sleep(max(0.0, (next_run - datetime.now(timezone.utc)).total_seconds()))
+            except asyncio.CancelledError:
+                break
+
+    def _season_day_range(self, season_id: int) -> Dict:
+        start_date, end_date = self.get_season_dates(season_id)
+        return {"$gte": _rollup_day(start_date), "$lte": _rollup_day(end_date)}
+
+    # ─── Season queries ─────────────────────────────────────────────────
+
     async def get_season_leaderboard(self, season_id: int, limit: int = 50) -> List[Dict]:
         """
         Get season-specific leaderboard
@@ -206,35 +426,39 @@ class SeasonManager:
         if self.db is None:
             return []  # Mock data if no DB connection
         
-        # Get season date range
-        start_date, end_date = self.get_season_dates(season_id)
-        
-        # Query treats created during this season
-        pipeline = [
-            {
-                "$match": {
-                    "created_at": {
-                        "$gte": start_date,
-                        "$lte": end_date
-                    }
-                }
-            },
-            {
-                "$group": {
-                    "_id": "$creator_address",
-                    "treats_created": {"$sum": 1},
-                    "legendary_treats": {
-                        "$sum": {"$cond": [{"$eq": ["$rarity", "Legendary"]}, 1, 0]}
-                    },
-                    "epic_treats": {
-                        "$sum": {"$cond": [{"$eq": ["$rarity", "Epic"]}, 1, 0]}
-                    },
-                    "rare_treats": {
-                        "$sum": {"$cond": [{"$eq": ["$rarity", "Rare"]}, 1, 0]}
+        try:
+            if await self._rollups_ready():
+                pipeline = [
+                    {"$match": {"day": self._season_day_range(season_id)}},
+                    {
+                        "$group": {
+                            "_id": "$player_address",
+                            "treats_created": {"$sum": "$treats_created"},
+                            "legendary_treats": {"$sum": {"$ifNull": ["$rarity_counts.Legendary", 0]}},
+                            "epic_treats": {"$sum": {"$ifNull": ["$rarity_counts.Epic", 0]}},
+                            "rare_treats": {"$sum": {"$ifNull": ["$rarity_counts.Rare", 0]}},
+                            "total_ingredients": {"$sum": "$total_ingredients"}
+                        }
                     },
-                    "total_ingredients": {"$sum": {"$size": "$ingredients"}}
-                }
-            },
+                    *self._season_score_stages(limit)
+                ]
+                results = await self.db.season_daily_rollups.aggregate(pipeline).to_list(limit)
+            else:
+                results = await self._season_leaderboard_from_treats(season_id, limit)
+            
+            # Add rank
+            for i, entry in enumerate(results):
+                entry["rank"] = i + 1
+                entry["season_id"] = season_id
+            
+            return results
+        except Exception as e:
+            print(f"Error getting season leaderboard: {e}")
+            return []
+
+    def _season_score_stages(self, limit: int) -> List[Dict]:
+        """Player lookup, season_score and ordering shared by both sources."""
+        return [
             {
                 "$lookup": {
                     "from": "players",
@@ -268,19 +492,38 @@ class SeasonManager:
             {"$sort": {"season_score": -1, "treats_created": -1}},
             {"$limit": limit}
         ]
-        
-        try:
-            results = await self.db.treats.aggregate(pipeline).to_list(limit)
-            
-            # Add rank
-            for i, entry in enumerate(results):
-                entry["rank"] = i + 1
-                entry["season_id"] = season_id
-            
-            return results
-        except Exception as e:
-            print(f"Error getting season leaderboard: {e}")
-            return []
+
+    async def _season_leaderboard_from_treats(self, season_id: int, limit: int) -> List[Dict]:
+        """Raw-treat scan, only used until the first rollup backfill lands."""
+        start_date, end_date = self.get_season_dates(season_id)
+        pipeline = [
+            {
+                "$match": {
+                    "created_at": {
+                        "$gte": start_date,
+                        "$lte": end_date
+                    }
+                }
+            },
+            {
+                "$group": {
+                    "_id": "$creator_address",
+                    "treats_created": {"$sum": 1},
+                    "legendary_treats": {
+                        "$sum": {"$cond": [{"$eq": ["$rarity", "Legendary"]}, 1, 0]}
+                    },
+                    "epic_treats": {
+                        "$sum": {"$cond": [{"$eq": ["$rarity", "Epic"]}, 1, 0]}
+                    },
+                    "rare_treats": {
+                        "$sum": {"$cond": [{"$eq": ["$rarity", "Rare"]}, 1, 0]}
+                    },
+                    "total_ingredients": {"$sum": {"$size": "$ingredients"}}
+                }
+            },
+            *self._season_score_stages(limit)
+        ]
+        return await self.db.treats.aggregate(pipeline).to_list(limit)
     
     async def get_season_stats(self, season_id: int) -> Dict:
         """
@@ -306,50 +549,14 @@ class SeasonManager:
         start_date, end_date = self.get_season_dates(season_id)
         
         try:
-            # Total participants
-            participants = await self.db.treats.distinct("creator_address", {
-                "created_at": {"$gte": start_date, "$lte": end_date}
-            })
-            
-            # Total treats
-            total_treats = await self.db.treats.count_documents({
-                "created_at": {"$gte": start_date, "$lte": end_date}
-            })
-            
-            # Rarity distribution
-            rarity_pipeline = [
-                {"$match": {"created_at": {"$gte": start_date, "$lte": end_date}}},
-                {"$group": {"_id": "$rarity", "count": {"$sum": 1}}}
-            ]
-            rarity_results = await self.db.treats.aggregate(rarity_pipeline).to_list(None)
-            rarity_distribution = {item["_id"]: item["count"] for item in rarity_results}
-            
-            # Most used ingredient
-            ingredient_pipeline = [
-                {"$match": {"created_at": {"$gte": start_date, "$lte": end_date}}},
-                {"$unwind": "$ingredients"},
-                {"$group": {"_id": "$ingredients", "count": {"$sum": 1}}},
-                {"$sort": {"count": -1}},
-                {"$limit": 1}
-            ]
-            ingredient_results = await self.db.treats.aggregate(ingredient_pipeline).to_list(1)
-            most_used = ingredient_results[0]["_id"] if ingredient_results else "unknown"
-            
-            # Average ingredients per treat
-            avg_pipeline = [
-                {"$match": {"created_at": {"$gte": start_date, "$lte": end_date}}},
-                {"$group": {"_id": None, "avg_ingredients": {"$avg": {"$size": "$ingredients"}}}}
-            ]
-            avg_results = await self.db.treats.aggregate(avg_pipeline).to_list(1)
-            avg_ingredients = round(avg_results[0]["avg_ingredients"], 1) if avg_results else 0
+            if await self._rollups_ready():
+                stats = await self._season_stats_from_rollups(season_id)
+            else:
+                stats = await self._season_stats_from_treats(start_date, end_date)
             
             return {
                 "season_id": season_id,
-                "total_participants": len(participants),
-                "total_treats": total_treats,
-                "rarity_distribution": rarity_distribution,
-                "most_used_ingredient": most_used,
-                "average_ingredients_per_treat": avg_ingredients,
+                **stats,
                 "start_date": start_date.isoformat(),
                 "end_date": end_date.isoformat()
             }
@@ -357,6 +564,96 @@ class SeasonManager:
         except Exception as e:
             print(f"Error getting season stats: {e}")
             return {"error": str(e)}
+
+    async def _season_stats_from_rollups(self, season_id: int) -> Dict:
+        """One $facet pass over the season's rollup rows."""
+        pipeline = [
+            {"$match": {"day": self._season_day_range(season_id)}},
+            {"$facet": {
+                "totals": [
+                    {"$group": {
+                        "_id": "$player_address",
+                        "treats": {"$sum": "$treats_created"},
+                        "ingredients": {"$sum": "$total_ingredients"},
+                    }},
+                    {"$group": {
+                        "_id": None,
+                        "participants": {"$sum": 1},
+                        "treats": {"$sum": "$treats"},
+                        "ingredients": {"$sum": "$ingredients"},
+                    }},
+                ],
+                "rarity": [
+                    {"$project": {"counts": {"$objectToArray": {"$ifNull": ["$rarity_counts", {}]}}}},
+                    {"$unwind": "$counts"},
+                    {"$group": {"_id": "$counts.k", "count": {"$sum": "$counts.v"}}},
+                ],
+                "ingredient": [
+                    {"$project": {"counts": {"$objectToArray": {"$ifNull": ["$ingredient_counts", {}]}}}},
+                    {"$unwind": "$counts"},
+                    {"$group": {"_id": "$counts.k", "count": {"$sum": "$counts.v"}}},
+                    {"$sort": {"count": -1}},
+                    {"$limit": 1},
+                ],
+            }},
+        ]
+        result = (await self.db.season_daily_rollups.aggregate(pipeline).to_list(1))[0]
+        totals = result["totals"][0] if result["totals"] else {"participants": 0, "treats": 0, "ingredients": 0}
+        total_treats = totals["treats"]
+        return {
+            "total_participants": totals["participants"],
+            "total_treats": total_treats,
+            "rarity_distribution": {item["_id"]: item["count"] for item in result["rarity"]},
+            "most_used_ingredient": result["ingredient"][0]["_id"] if result["ingredient"] else "unknown",
+            "average_ingredients_per_treat": round(totals["ingredients"] / total_treats, 1) if total_treats else 0,
+        }
+
+    async def _season_stats_from_treats(self, start_date: datetime, end_date: datetime) -> Dict:
+        """Raw-treat scans, only used until the first rollup backfill lands."""
+        # Total participants
+        participants = await self.db.treats.distinct("creator_address", {
+            "created_at": {"$gte": start_date, "$lte": end_date}
+        })
+        
+        # Total treats
+        total_treats = await self.db.treats.count_documents({
+            "created_at": {"$gte": start_date, "$lte": end_date}
+        })
+        
+        # Rarity distribution
+        rarity_pipeline = [
+            {"$match": {"created_at": {"$gte": start_date, "$lte": end_date}}},
+            {"$group": {"_id": "$rarity", "count": {"$sum": 1}}}
+        ]
+        rarity_results = await self.db.treats.aggregate(rarity_pipeline).to_list(None)
+        rarity_distribution = {item["_id"]: item["count"] for item in rarity_results}
+        
+        # Most used ingredient
+        ingredient_pipeline = [
+            {"$match": {"created_at": {"$gte": start_date, "$lte": end_date}}},
+            {"$unwind": "$ingredients"},
+            {"$group": {"_id": "$ingredients", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1}},
+            {"$limit": 1}
+        ]
+        ingredient_results = await self.db.treats.aggregate(ingredient_pipeline).to_list(1)
+        most_used = ingredient_results[0]["_id"] if ingredient_results else "unknown"
+        
+        # Average ingredients per treat
+        avg_pipeline = [
+            {"$match": {"created_at": {"$gte": start_date, "$lte": end_date}}},
+            {"$group": {"_id": None, "avg_ingredients": {"$avg": {"$size": "$ingredients"}}}}
+        ]
+        avg_results = await self.db.treats.aggregate(avg_pipeline).to_list(1)
+        avg_ingredients = round(avg_results[0]["avg_ingredients"], 1) if avg_results else 0
+        
+        return {
+            "total_participants": len(participants),
+            "total_treats": total_treats,
+            "rarity_distribution": rarity_distribution,
+            "most_used_ingredient": most_used,
+            "average_ingredients_per_treat": avg_ingredients,
+        }
     
     def list_seasons(self, include_upcoming: bool = True, include_archived: bool = False) -> List[Season]:
         """
@@ -103,6 +103,59 @@ RARITY_CONFIG = {
 }
 
 
+# Secret combo definitions (stored server-side for security), keyed by the
+# sorted, lowercased ingredient ids joined with "+"
+SECRET_COMBOS = {
+    # High-value combos (+10% legendary/mythic chance)
+    "chocolate+honey+milk+strawberry": {
+        "name": "Ultimate Sweet Harmony",
+        "bonus_mythic": 5,
+        "bonus_legendary": 10,
+        "bonus_epic": 5,
+        "description": "The perfect dessert combination!"
+    },
+    "bacon+cheese+chicken+garlic": {
+        "name": "Savory Master Blend", 
+        "bonus_mythic": 5,
+        "bonus_legendary": 10,
+        "bonus_epic": 5,
+        "description": "Ultimate protein and flavor combo!"
+    },
+    "chili_flakes+honey+peanut_butter+rainbow_sprinkles": {
+        "name": "Sweet Fire Surprise",
+        "bonus_mythic": 3,
+        "bonus_legendary": 8,
+        "bonus_epic": 7,
+        "description": "Unexpected but amazing!"
+    },
+    
+    # Medium combos (+5% legendary chance)
+    "chocolate+milk+vanilla": {
+        "name": "Classic Milkshake",
+        "bonus_mythic": 2,
+        "bonus_legendary": 5,
+        "bonus_epic": 3,
+        "description": "Timeless favorite!"
+    },
+    "banana+honey+peanut_butter": {
+        "name": "Monkey's Dream",
+        "bonus_mythic": 2,
+        "bonus_legendary": 5,
+        "bonus_epic": 3,
+        "description": "Natural energy boost!"
+    },
+    
+    # Fun combos (+3% bonus)
+    "cookie_crumbs+milk": {
+        "name": "Cookie Dunk Special",
+        "bonus_mythic": 1,
+        "bonus_legendary": 3,
+        "bonus_epic": 2,
+        "description": "Just like childhood!"
+    }
+}
+
+
 class TreatGameEngine:
     def __init__(self, secret_key: str = None):
         """
@@ -141,6 +194,25 @@ class TreatGameEngine:
         
         # Season duration in months
         self.season_duration_months = 3
+
+        # HMAC keyed once; each roll copies it instead of re-keying
+        self._hmac_base = hmac.new(self.secret_key.encode('utf-8'), digestmod=hashlib.sha256)
+        
+        # Cumulative roll thresholds per ingredient count, in rarity_order,
+        # summed exactly as calculate_treat_rarity always has
+        self._max_requirement = max(self.rarity_requirements.values())
+        self._rarity_tables = {}
+        for count in range(2, self._max_requirement + 1):
+            cumulative_chance = 0
+            table = []
+            for rarity in self.rarity_order:
+                if count >= self.rarity_requirements[rarity]:
+                    cumulative_chance += RARITY_CONFIG[rarity]["probability"]
+                    table.append((cumulative_chance, rarity))
+            self._rarity_tables[count] = table or [(100.0, TreatRarity.COMMON)]
+
+        # repr() of the {"rarity": ...} seed dict, per rarity
+        self._rarity_seed_reprs = {r: repr({"rarity": r.value}) for r in TreatRarity}
         
     def generate_secure_random(self, player_address: str, treat_data: Dict, timestamp: int = None) -> float:
         """
@@ -159,18 +231,18 @@ class TreatGameEngine:
             
         # Create deterministic seed from player data
         seed_string = f"{player_address}:{treat_data}:{timestamp}:{self.secret_key}"
-        seed_bytes = seed_string.encode('utf-8')
-        
+        return self._random_from_seed(seed_string)
+
+    def _random_from_seed(self, seed_string: str) -> float:
         # Use HMAC-SHA256 for cryptographically secure randomness
-        hmac_hash = hmac.new(
-            self.secret_key.encode('utf-8'),
-            seed_bytes,
-            hashlib.sha256
-        ).hexdigest()
-        
-        # Convert hash to float between 0 and 1
-        hash_int = int(hmac_hash[:16], 16)  # Use first 16 hex chars for more precision
-        return hash_int / 0xFFFFFFFFFFFFFFFF
+        mac = self._hmac_base.copy()
+        mac.update(seed_string.encode('utf-8'))
+        
+        # Convert the first 8 bytes (16 hex chars) to a float between 0 and 1
+        return int.from_bytes(mac.digest()[:8], 'big') / 0xFFFFFFFFFFFFFFFF
+
+    def _rarity_table(self, num_ingredients: int) -> List[Tuple[float, TreatRarity]]:
+        return self._rarity_tables[min(num_ingredients, self._max_requirement)]
     
     def calculate_treat_rarity(self, ingredients: List[str], player_level: int, 
                              player_address: str, timestamp: int = None,
@@ -202,15 +274,6 @@ class TreatGameEngine:
         if num_ingredients < 2:
             raise ValueError("Minimum 2 ingredients required for treat creation")
         
-        # Determine allowed rarities based on ingredient count
-        allowed_rarities = []
-        for rarity in self.rarity_order:
-            if num_ingredients >= self.rarity_requirements[rarity]:
-                allowed_rarities.append(rarity)
-        
-        if not allowed_rarities:
-            allowed_rarities = [TreatRarity.COMMON]  # Fallback
-        
         # Generate secure random number
         random_value = self.generate_secure_random(
             player_address, 
@@ -228,13 +291,14 @@ class TreatGameEngine:
             bonus_applied = roll * (1 - rare_chance_bonus)
             roll = bonus_applied
         
-        # Check rarities in order of rarity (highest first)
-        cumulative_chance = 0
-        for rarity in self.rarity_order:
-            if rarity in allowed_rarities:
-                cumulative_chance += RARITY_CONFIG[rarity]["probability"]
-                if roll <= cumulative_chance:
-                    return rarity
+        return self._rarity_for_roll(num_ingredients, roll)
+
+    def _rarity_for_roll(self, num_ingredients: int, roll: float) -> TreatRarity:
+        # Check rarities in order of rarity (highest first) among those the
+        # ingredient count allows
+        for cumulative_chance, rarity in self._rarity_table(num_ingredients):
+            if roll <= cumulative_chance:
+                return rarity
         
         # Fallback to common
         return TreatRarity.COMMON
@@ -318,58 +382,7 @@ class TreatGameEngine:
         sorted_ingredients = sorted([ing.lower() for ing in ingredients])
         combo_key = "+".join(sorted_ingredients)
         
-        # Secret combo definitions (stored server-side for security)
-        secret_combos = {
-            # High-value combos (+10% legendary/mythic chance)
-            "chocolate+honey+milk+strawberry": {
-                "name": "Ultimate Sweet Harmony",
-                "bonus_mythic": 5,
-                "bonus_legendary": 10,
-                "bonus_epic": 5,
-                "description": "The perfect dessert combination!"
-            },
-            "bacon+cheese+chicken+garlic": {
-                "name": "Savory Master Blend", 
-                "bonus_mythic": 5,
-                "bonus_legendary": 10,
-                "bonus_epic": 5,
-                "description": "Ultimate protein and flavor combo!"
-            },
-            "chili_flakes+honey+peanut_butter+rainbow_sprinkles": {
-                "name": "Sweet Fire Surprise",
-                "bonus_mythic": 3,
-                "bonus_legendary": 8,
-                "bonus_epic": 7,
-                "description": "Unexpected but amazing!"
-            },
-            
-            # Medium combos (+5% legendary chance)
-            "chocolate+milk+vanilla": {
-                "name": "Classic Milkshake",
-                "bonus_mythic": 2,
-                "bonus_legendary": 5,
-                "bonus_epic": 3,
-                "description": "Timeless favorite!"
-            },
-            "banana+honey+peanut_butter": {
-                "name": "Monkey's Dream",
-                "bonus_mythic": 2,
-                "bonus_legendary": 5,
-                "bonus_epic": 3,
-                "description": "Natural energy boost!"
-            },
-            
-            # Fun combos (+3% bonus)
-            "cookie_crumbs+milk": {
-                "name": "Cookie Dunk Special",
-                "bonus_mythic": 1,
-                "bonus_legendary": 3,
-                "bonus_epic": 2,
-                "description": "Just like childhood!"
-            }
-        }
-        
-        combo = secret_combos.get(combo_key, {})
+        combo = SECRET_COMBOS.get(combo_key, {})
         return {
             "is_secret_combo": bool(combo),
             "combo_name": combo.get("name", ""),
@@ -464,6 +477,85 @@ class TreatGameEngine:
             "season_id": self.get_current_season_id()
         }
     
+    def calculate_treat_outcomes_batch(self, requests: List[Dict]) -> List[Dict]:
+        """
+        calculate_treat_outcome for many treats at once, for bulk callers
+        (auto-mixer passes, admin tooling)
+        
+        Builds each seed string directly rather than through a dict repr and
+        reuses the pre-keyed HMAC and rarity tables, so rarity, timer and
+        rewards are bit-identical to the single-call path for the same
+        (player_address, ingredients, player_level, timestamp).
+        
+        Args:
+            requests: Dicts with ingredients, player_level, player_address
+                and optionally timestamp (ms, defaults to now) and
+                rare_chance_bonus
+            
+        Returns:
+            One compact dict per request, in order: rarity,
+            timer_duration_seconds, points_reward, xp_reward,
+            is_secret_combo, created_at, ready_at
+        """
+        now_ms = int(time.time() * 1000)
+        key_suffix = f":{self.secret_key}"
+        results = []
+        for req in requests:
+            ingredients = req["ingredients"]
+            if len(ingredients) < 2:
+                raise ValueError("Minimum 2 ingredients required")
+            player_address = req["player_address"]
+            player_level = req["player_level"]
+            timestamp = req.get("timestamp")
+            if timestamp is None:
+                timestamp = now_ms
+            rare_chance_bonus = req.get("rare_chance_bonus", 0.0)
+            seed_tail = f":{timestamp}{key_suffix}"
+            ingredients_repr = repr(sorted(ingredients))
+            
+            # Same seeds as calculate_treat_rarity / the combo re-roll:
+            # f"{address}:{treat_data}:{timestamp}:{secret_key}"
+            roll = self._random_from_seed(
+                f"{player_address}:{{'ingredients': {ingredients_repr}, 'level': {player_level!r}}}{seed_tail}"
+            ) * 100
+            if rare_chance_bonus > 0:
+                roll = roll * (1 - rare_chance_bonus)
+            rarity = self._rarity_for_roll(len(ingredients), roll)
+            
+            combo_bonus = self.check_secret_combo_bonus(ingredients)
+            if combo_bonus["is_secret_combo"]:
+                bonus_roll = self._random_from_seed(
+                    f"{player_address}_bonus:{{'ingredients': {ingredients_repr}, "
+                    f"'level': {player_level!r}, 'combo': True}}{seed_tail}"
+                ) * 100
+                if rarity != TreatRarity.MYTHIC and bonus_roll <= combo_bonus["bonus_mythic"]:
+                    rarity = TreatRarity.MYTHIC
+                elif (rarity not in [TreatRarity.MYTHIC, TreatRarity.LEGENDARY] and
+                      bonus_roll <= combo_bonus["bonus_legendary"]):
+                    rarity = TreatRarity.LEGENDARY
+                elif (rarity not in [TreatRarity.MYTHIC, TreatRarity.LEGENDARY, TreatRarity.EPIC] and
+                      bonus_roll <= combo_bonus["bonus_epic"]):
+                    rarity = TreatRarity.EPIC
+            
+            config = RARITY_CONFIG[rarity]
+            rarity_seed = f":{self._rarity_seed_reprs[rarity]}{seed_tail}"
+            timer_random = self._random_from_seed(f"{player_address}_timer{rarity_seed}")
+            points_random = self._random_from_seed(f"{player_address}_points{rarity_seed}")
+            xp_random = self._random_from_seed(f"{player_address}_xp{rarity_seed}")
+            
+            hours = config["timer_min_hours"] + (timer_random * (config["timer_max_hours"] - config["timer_min_hours"]))
+            timer_duration = int(hours * 3600)
+            results.append({
+                "rarity": rarity.value,
+                "timer_duration_seconds": timer_duration,
+                "points_reward": int(config["points_min"] + (points_random * (config["points_max"] - config["points_min"]))),
+                "xp_reward": int(config["xp_min"] + (xp_random * (config["xp_max"] - config["xp_min"]))),
+                "is_secret_combo": combo_bonus["is_secret_combo"],
+                "created_at": timestamp // 1000,
+                "ready_at": (timestamp // 1000) + timer_duration,
+            })
+        return results
+    
     def get_current_season_id(self) -> int:
         """
         Calculate current season ID based on 3-month cycles
@@ -599,6 +691,22 @@ def test_game_engine():
     print(f"  Points: {outcome['points_reward']} ({outcome['points_range']})")
     print(f"  XP: {outcome['xp_reward']} ({outcome['xp_range']})")
     
+    # Test batch outcomes match the single-call path
+    print("\nBatch Outcomes (1000 treats):")
+    batch_requests = [
+        {"ingredients": ["chocolate", "honey", "milk", "strawberry"][: 2 + i % 3], "player_level": 5,
+         "player_address": f"0x{i:040x}", "timestamp": i * 1000, "rare_chance_bonus": 0.15 * (i % 2)}
+        for i in range(1000)
+    ]
+    mismatches = 0
+    for req, compact in zip(batch_requests, engine.calculate_treat_outcomes_batch(batch_requests)):
+        single = engine.calculate_treat_outcome(
+            req["ingredients"], req["player_level"], req["player_address"], req["timestamp"], req["rare_chance_bonus"]
+        )
+        if any(single[k] != compact[k] for k in ("rarity", "timer_duration_seconds", "points_reward", "xp_reward")):
+            mismatches += 1
+    print(f"  Mismatches vs calculate_treat_outcome: {mismatches}")
+    
     # Test rarity info
     print("\nRarity System Info:")
     rarity_info = engine.get_rarity_info()
@@ -0,0 +1,205 @@
+"""
+DogeFood Lab — per-player sliding window of treat creations
+Creation times and ingredient sets for the treat limit checks, one capped
+document per player (treat_rate_windows) fronted by an in-process LRU.
+"""
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from pymongo import ReturnDocument, UpdateOne
+
+WINDOW_HOURS = 24
+WINDOW_MAX_EVENTS = 100
+WINDOW_CACHE_SIZE = 20_000
+WINDOW_CACHE_TTL_SECONDS = 30
+# Idle players' window docs expire on their own
+WINDOW_DOC_TTL_SECONDS = 2 * 24 * 3600
+
+
+def _event(created_at, ingredients) -> Dict:
+    return {"t": _naive_utc(created_at), "i": sorted(ingredients or [])}
+
+
+def _naive_utc(value) -> Optional[datetime]:
+    """Treat timestamps the way the anti-cheat checks compare them: naive UTC."""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is not None:
+        value = value.replace(tzinfo=None) - value.utcoffset()
+    return value
+
+
+class TreatRateWindow:
+    def __init__(self, db, cache_size: int = WINDOW_CACHE_SIZE):
+        self.db = db
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()  # address -> (loaded_at, events)
+
+    async def ensure_indexes(self):
+        await self.db.treat_rate_windows.create_index(
+            "updated_at", expireAfterSeconds=WINDOW_DOC_TTL_SECONDS
+        )
+
+    # ── LRU ─────────────────────────────────────────────────────────────
+
+    def _cache_get(self, address: str) -> Optional[List[Dict]]:
+        hit = self._cache.get(address)
+        if hit is None:
+            return None
+        loaded_at, events = hit
+        if time.monotonic() - loaded_at > WINDOW_CACHE_TTL_SECONDS:
+            del self._cache[address]
+            return None
+        self._cache.move_to_end(address)
+        return events
+
+    def _cache_put(self, address: str, events: List[Dict]) -> None:
+        self._cache[address] = (time.monotonic(), events)
+        self._cache.move_to_end(address)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    # ── Load / bootstrap ────────────────────────────────────────────────
+
+    async def _bootstrap(self, address: str) -> List[Dict]:
+        """Build the window doc from the player's treats (first use only)."""
+        cutoff = datetime.utcnow() - timedelta(hours=WINDOW_HOURS)
+        treats = await self.db.treats.find(
+            {"creator_address": address, "created_at": {"$gte": cutoff}},
+            {"_id": 0, "created_at": 1, "ingredients": 1},
+        ).sort("created_at", -1).to_list(WINDOW_MAX_EVENTS)
+        events = [_event(t.get("created_at"), t.get("ingredients")) for t in reversed(treats)]
+        events = [e for e in events if e["t"] is not None]
+        await self.db.treat_rate_windows.update_one(
+            {"_id": address},
+            {"$setOnInsert": {"events": events}, "$set": {"updated_at": datetime.utcnow()}},
+            upsert=True,
+        )
+        return events
+
+    async def _events(self, address: str) -> List[Dict]:
+        events = self._cache_get(address)
+        if events is None:
+            doc = await self.db.treat_rate_windows.find_one({"_id": address}, {"events": 1})
+            events = doc["events"] if doc else await self._bootstrap(address)
+            self._cache_put(address, events)
+        return events
+
+    async def _load_many(self, addresses: List[str]) -> None:
+        """Warm the LRU for many players with one read (plus one bootstrap
+        read for players without a window doc)."""
+        missing = [a for a in dict.fromkeys(addresses) if a and self._cache_get(a) is None]
+        if not missing:
+            return
+        docs = await self.db.treat_rate_windows.find(
+            {"_id": {"$in": missing}}, {"events": 1}
+        ).to_list(None)
+        for doc in docs:
+            self._cache_put(doc["_id"], doc["events"])
+
+        unseen = set(missing) - {doc["_id"] for doc in docs}
+        if not unseen:
+            return
+        cutoff = datetime.utcnow() - timedelta(hours=WINDOW_HOURS)
+        treats = await self.db.treats.find(
+            {"creator_address": {"$in": list(unseen)}, "created_at": {"$gte": cutoff}},
+            {"_id": 0, "creator_address": 1, "created_at": 1, "ingredients": 1},
+        ).sort("created_at", 1).to_list(None)
+        by_address: Dict[str, List[Dict]] = {a: [] for a in unseen}
+        for t in treats:
+            event = _event(t.get("created_at"), t.get("ingredients"))
+            if event["t"] is not None:
+                by_address[t["creator_address"]].append(event)
+        now = datetime.utcnow()
+        await self.db.treat_rate_windows.bulk_write([
+            UpdateOne(
+                {"_id": address},
+                {"$setOnInsert": {"events": events[-WINDOW_MAX_EVENTS:]}, "$set": {"updated_at": now}},
+                upsert=True,
+            )
+            for address, events in by_address.items()
+        ], ordered=False)
+        for address, events in by_address.items():
+            self._cache_put(address, events[-WINDOW_MAX_EVENTS:])
+
+    @staticmethod
+    def _shape(events: List[Dict], hours: float) -> List[Dict]:
+        cutoff = datetime.utcnow() - timedelta(hours=hours)
+        events = sorted((e for e in events if e["t"] >= cutoff), key=lambda e: e["t"], reverse=True)
+        return [{"created_at": e["t"], "ingredients": e["i"]} for e in events]
+
+    # ── Public API ──────────────────────────────────────────────────────
+
+    async def recent(self, address: str, hours: float = WINDOW_HOURS) -> List[Dict]:
+        """Creations in the last `hours`, newest first, shaped like the treat
+        docs the limit checks used to read: {"created_at", "ingredients"}."""
+        return self._shape(await self._events(address), hours)
+
+    async def recent_many(self, addresses: List[str], hours: float = WINDOW_HOURS) -> Dict[str, List[Dict]]:
+        """recent() for a batch of players, keyed by address."""
+        await self._load_many(addresses)
+        result = {}
+        for address in dict.fromkeys(addresses):
+            events = self._cache_get(address)
+            if events is None:
+                events = await self._events(address)
+            result[address] = self._shape(events, hours)
+        return result
+
+    async def record(self, address: str, created_at=None, ingredients: List[str] = None) -> None:
+        """Append one creation. Call after every treat insert."""
+        if not address:
+            return
+        # Make sure the doc holds the history before the first append
+        await self._events(address)
+        event = {"t": _naive_utc(created_at) or datetime.utcnow(), "i": sorted(ingredients or [])}
+        doc = await self.db.treat_rate_windows.find_one_and_update(
+            {"_id": address},
+            {
+                "$push": {"events": {"$each": [event], "$slice": -WINDOW_MAX_EVENTS}},
+                "$set": {"updated_at": datetime.utcnow()},
+            },
+            projection={"events": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        self._cache_put(address, doc["events"])
+
+    async def record_many(self, creations: List[tuple]) -> None:
+        """record() for a batch of (address, created_at, ingredients) in one
+        bulk write. Cached windows are appended to locally rather than
+        re-read, so they can trail other workers' writes until the cache
+        entry expires."""
+        creations = [c for c in creations if c[0]]
+        if not creations:
+            return
+        await self._load_many([address for address, _, _ in creations])
+        now = datetime.utcnow()
+        ops, appended = [], {}
+        for address, created_at, ingredients in creations:
+            event = _event(created_at, ingredients)
+            if event["t"] is None:
+                event["t"] = now
+            ops.append(UpdateOne(
+                {"_id": address},
+                {"$push": {"events": {"$each": [event], "$slice": -WINDOW_MAX_EVENTS}},
+                 "$set": {"updated_at": now}},
+                upsert=True,
+            ))
+            appended.setdefault(address, []).append(event)
+        await self.db.treat_rate_windows.bulk_write(ops, ordered=False)
+        for address, events in appended.items():
+            cached = self._cache_get(address)
+            if cached is None:
+                continue
+            self._cache_put(address, (cached + events)[-WINDOW_MAX_EVENTS:])
+
+    def forget(self, address: str) -> None:
+        self._cache.pop(address, None)
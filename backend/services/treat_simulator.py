@@ -0,0 +1,214 @@
+"""
+DogeFood Lab — vectorized Monte-Carlo simulator for treat economics
+Plays a season of treats with NumPy arrays in place of HMAC rolls, using
+the engine's rarity tables, secret combos and reward ranges.
+"""
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from services.anti_cheat import MAX_DAILY_TREATS, get_streak_bonus
+from services.arena_system import (
+    HEAT_COLLECT_POINTS_MULT, HEAT_EVENTS, HEAT_RARE_CHANCE_BONUS, RARE_CHANCE_BONUS_CAP,
+)
+from services.treat_game_engine import RARITY_CONFIG, TreatGameEngine, TreatRarity
+
+MAX_SIMULATION_DRAWS = 50_000_000
+CHUNK_DRAWS = 2_000_000
+
+# Rarities as small ints, Common (0) .. Mythic (5), so "rarer than" is `>`
+_RARITIES = list(TreatRarity)
+_CODE = {r: i for i, r in enumerate(_RARITIES)}
+_COMMON, _EPIC, _LEGENDARY, _MYTHIC = (_CODE[r] for r in (
+    TreatRarity.COMMON, TreatRarity.EPIC, TreatRarity.LEGENDARY, TreatRarity.MYTHIC))
+
+_POINTS_MIN = np.array([RARITY_CONFIG[r]["points_min"] for r in _RARITIES], dtype=np.float64)
+_POINTS_SPAN = np.array([RARITY_CONFIG[r]["points_max"] - RARITY_CONFIG[r]["points_min"] for r in _RARITIES], dtype=np.float64)
+_XP_MIN = np.array([RARITY_CONFIG[r]["xp_min"] for r in _RARITIES], dtype=np.float64)
+_XP_SPAN = np.array([RARITY_CONFIG[r]["xp_max"] - RARITY_CONFIG[r]["xp_min"] for r in _RARITIES], dtype=np.float64)
+
+_HEAT_IDS = [e["id"] for e in HEAT_EVENTS]
+
+
+def _rarity_table(engine: TreatGameEngine, ingredient_count: int):
+    """(cumulative %, rarity code per bucket) for calculate_treat_rarity;
+    the extra trailing code is its Common fallback."""
+    allowed = [r for r in engine.rarity_order if ingredient_count >= engine.rarity_requirements[r]]
+    allowed = allowed or [TreatRarity.COMMON]
+    cumulative = np.cumsum([RARITY_CONFIG[r]["probability"] for r in allowed])
+    codes = np.array([_CODE[r] for r in allowed] + [_COMMON], dtype=np.int8)
+    return cumulative, codes
+
+
+def _heat_lookup(table: Dict[str, float], default: float) -> np.ndarray:
+    return np.array([table.get(h, default) for h in _HEAT_IDS], dtype=np.float64)
+
+
+def simulate(
+    engine: TreatGameEngine,
+    recipes: Sequence[Sequence[str]],
+    recipe_weights: Optional[Sequence[float]] = None,
+    players: int = 1000,
+    days: int = 90,
+    treats_per_day: Optional[int] = None,
+    rare_chance_bonus: float = 0.0,
+    streak_days: int = 1,
+    heat_event_id: Optional[str] = None,
+    starting_supply: Optional[float] = None,
+    seed: Optional[int] = None,
+) -> Dict:
+    """
+    Simulate a season of treats.
+
+    Args:
+        engine: TreatGameEngine whose rarity rules are simulated
+        recipes: ingredient lists players brew (secret combos included)
+        recipe_weights: relative frequency of each recipe (default equal)
+        players / days: season size
+        treats_per_day: treats each player makes a day (default the daily
+            limit for `streak_days`, bonus treats included)
+        rare_chance_bonus: character bonus (Rex = 0.15)
+        streak_days: streak length, for the XP multiplier and bonus treats
+        heat_event_id: fix the heat event for brew and collect; None draws
+            each from the heat calendar independently
+        starting_supply: points in circulation at season start, for the
+            inflation percentage
+        seed: NumPy seed for reproducible runs
+
+    Returns:
+        Dictionary with the rarity histogram, per-treat and per-player-day
+        expectations and season totals
+    """
+    if not recipes:
+        raise ValueError("at least one recipe required")
+    if any(len(r) < 2 for r in recipes):
+        raise ValueError("Minimum 2 ingredients required for treat creation")
+    if heat_event_id is not None and heat_event_id not in _HEAT_IDS:
+        raise ValueError(f"unknown heat event '{heat_event_id}'")
+
+    streak = get_streak_bonus(streak_days)
+    if treats_per_day is None:
+        treats_per_day = MAX_DAILY_TREATS + streak["bonus_treats"] * 4
+    total_draws = players * days * treats_per_day
+    if players < 1 or days < 1 or treats_per_day < 1:
+        raise ValueError("players, days and treats_per_day must be positive")
+    if total_draws > MAX_SIMULATION_DRAWS:
+        raise ValueError(f"{total_draws:,} treats exceeds the {MAX_SIMULATION_DRAWS:,} simulation limit")
+
+    weights = np.asarray(recipe_weights if recipe_weights is not None else [1.0] * len(recipes), dtype=np.float64)
+    if weights.shape != (len(recipes),) or (weights < 0).any() or weights.sum() <= 0:
+        raise ValueError("recipe_weights must be one non-negative weight per recipe")
+    weights = weights / weights.sum()
+
+    # Per-recipe tables, indexed by recipe number
+    tables = [_rarity_table(engine, len(r)) for r in recipes]
+    combos = [engine.check_secret_combo_bonus(list(r)) for r in recipes]
+    is_combo = np.array([c["is_secret_combo"] for c in combos])
+    bonus_mythic = np.array([c["bonus_mythic"] for c in combos], dtype=np.float64)
+    bonus_legendary = np.array([c["bonus_legendary"] for c in combos], dtype=np.float64)
+    bonus_epic = np.array([c["bonus_epic"] for c in combos], dtype=np.float64)
+
+    heat_rare = _heat_lookup(HEAT_RARE_CHANCE_BONUS, 0.0)
+    heat_points = _heat_lookup(HEAT_COLLECT_POINTS_MULT, 1.0)
+    xp_multiplier = streak["xp_multiplier"]
+
+    rng = np.random.default_rng(seed)
+    rarity_counts = np.zeros(len(_RARITIES), dtype=np.int64)
+    player_points = np.zeros(players, dtype=np.float64)
+    player_xp = np.zeros(players, dtype=np.float64)
+    points_sq_sum = 0.0
+
+    per_day = players * treats_per_day
+    days_per_chunk = max(1, CHUNK_DRAWS // per_day)
+    for first_day in range(0, days, days_per_chunk):
+        n_days = min(days_per_chunk, days - first_day)
+        n = per_day * n_days
+        owner = np.tile(np.repeat(np.arange(players), treats_per_day), n_days)
+
+        recipe = rng.choice(len(recipes), size=n, p=weights)
+        if heat_event_id is None:
+            brew_heat = rng.integers(len(_HEAT_IDS), size=n)
+            collect_heat = rng.integers(len(_HEAT_IDS), size=n)
+        else:
+            brew_heat = collect_heat = np.full(n, _HEAT_IDS.index(heat_event_id))
+
+        # ── Rarity roll ───────────────────────────────────────────────────
+        bonus = np.minimum(rare_chance_bonus + heat_rare[brew_heat], RARE_CHANCE_BONUS_CAP)
+        roll = rng.random(n) * 100 * (1 - bonus)
+        rarity = np.empty(n, dtype=np.int8)
+        for idx, (cumulative, codes) in enumerate(tables):
+            mask = recipe == idx
+            if mask.any():
+                rarity[mask] = codes[np.searchsorted(cumulative, roll[mask], side="left")]
+
+        # ── Secret combo upgrade (mythic, else legendary, else epic) ─────
+        combo = is_combo[recipe]
+        if combo.any():
+            bonus_roll = rng.random(n) * 100
+            to_mythic = combo & (rarity != _MYTHIC) & (bonus_roll <= bonus_mythic[recipe])
+            to_legendary = combo & ~to_mythic & (rarity < _LEGENDARY) & (bonus_roll <= bonus_legendary[recipe])
+            to_epic = combo & ~to_mythic & ~to_legendary & (rarity < _EPIC) & (bonus_roll <= bonus_epic[recipe])
+            rarity[to_mythic] = _MYTHIC
+            rarity[to_legendary] = _LEGENDARY
+            rarity[to_epic] = _EPIC
+
+        # ── Rewards ───────────────────────────────────────────────────────
+        points = np.floor(_POINTS_MIN[rarity] + rng.random(n) * _POINTS_SPAN[rarity])
+        xp = np.floor(_XP_MIN[rarity] + rng.random(n) * _XP_SPAN[rarity])
+        if xp_multiplier > 1.0:
+            xp = np.floor(xp * xp_multiplier)
+        points = np.floor(points * heat_points[collect_heat])
+
+        rarity_counts += np.bincount(rarity, minlength=len(_RARITIES))
+        player_points += np.bincount(owner, weights=points, minlength=players)
+        player_xp += np.bincount(owner, weights=xp, minlength=players)
+        points_sq_sum += float(np.dot(points, points))
+
+    total_points = float(player_points.sum())
+    mean_points = total_points / total_draws
+    season_percentiles = np.percentile(player_points, [50, 90, 99])
+
+    return {
+        "treats_simulated": total_draws,
+        "scenario": {
+            "players": players,
+            "days": days,
+            "treats_per_day": treats_per_day,
+            "recipes": [list(r) for r in recipes],
+            "recipe_weights": weights.round(6).tolist(),
+            "rare_chance_bonus": rare_chance_bonus,
+            "streak_days": streak_days,
+            "xp_multiplier": xp_multiplier,
+            "heat_event_id": heat_event_id or "calendar",
+        },
+        "rarity_distribution": {
+            r.value: {"count": int(c), "percent": round(100 * c / total_draws, 4)}
+            for r, c in zip(_RARITIES, rarity_counts)
+        },
+        "per_treat": {
+            "points_mean": round(mean_points, 4),
+            "points_std": round(max(0.0, points_sq_sum / total_draws - mean_points ** 2) ** 0.5, 4),
+            "xp_mean": round(float(player_xp.sum()) / total_draws, 4),
+        },
+        "per_player_day": {
+            "points": round(total_points / (players * days), 4),
+            "xp": round(float(player_xp.sum()) / (players * days), 4),
+        },
+        "season": {
+            "points_minted": int(total_points),
+            "points_per_player_p50": float(season_percentiles[0]),
+            "points_per_player_p90": float(season_percentiles[1]),
+            "points_per_player_p99": float(season_percentiles[2]),
+            "inflation_percent": (round(100 * total_points / starting_supply, 4)
+                                  if starting_supply else None),
+        },
+    }
+
+
+def rarity_distribution(engine: TreatGameEngine, ingredients: List[str],
+                        draws: int = 1_000_000, rare_chance_bonus: float = 0.0,
+                        seed: Optional[int] = None) -> Dict[str, float]:
+    """Rarity percentages for one recipe with no heat event."""
+    result = simulate(engine, [ingredients], players=1, days=1, treats_per_day=draws,
+                      rare_chance_bonus=rare_chance_bonus, heat_event_id="idle_calm", seed=seed)
+    return {name: row["percent"] for name, row in result["rarity_distribution"].items()}
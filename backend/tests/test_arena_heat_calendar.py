@@ -0,0 +1,72 @@
+"""
+Test file: Deterministic heat-event calendar
+Tests GET /api/arena/heat and GET /api/arena/heat/schedule:
+- Current event sits on a 30-minute slot boundary
+- upcoming=N returns N consecutive slots
+- Day schedule covers the whole arena day, is cacheable and agrees with /arena/heat
+"""
+
+import pytest
+import requests
+import os
+from datetime import datetime, timedelta
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestHeatCalendar:
+    """Tests for GET /api/arena/heat"""
+
+    def test_current_event_on_slot_boundary(self):
+        response = requests.get(f"{BASE_URL}/api/arena/heat")
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        data = response.json()
+        for field in ["event", "started_at", "ends_at", "duration_min"]:
+            assert field in data, f"Missing field '{field}'"
+        started = datetime.fromisoformat(data["started_at"])
+        assert started.minute in (0, 30) and started.second == 0
+        assert datetime.fromisoformat(data["ends_at"]) - started == timedelta(minutes=data["duration_min"])
+        print(f"✓ Current heat event {data['event']['id']} from {data['started_at']}")
+
+    def test_upcoming_events_consecutive(self):
+        response = requests.get(f"{BASE_URL}/api/arena/heat?upcoming=3")
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["upcoming"]) == 3
+        previous_end = data["ends_at"]
+        for slot in data["upcoming"]:
+            assert slot["started_at"] == previous_end, "Upcoming slots should be back to back"
+            previous_end = slot["ends_at"]
+        print(f"✓ Next events: {[s['event']['id'] for s in data['upcoming']]}")
+
+
+class TestHeatSchedule:
+    """Tests for GET /api/arena/heat/schedule"""
+
+    def test_schedule_covers_arena_day(self):
+        response = requests.get(f"{BASE_URL}/api/arena/heat/schedule")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["events"][0]["started_at"] == data["day_started_at"]
+        assert data["events"][-1]["ends_at"] == data["day_ends_at"]
+        assert len(data["events"]) == 24 * 60 // data["duration_min"]
+        print(f"✓ Schedule has {len(data['events'])} events for {data['day_started_at']}")
+
+    def test_schedule_cacheable(self):
+        response = requests.get(f"{BASE_URL}/api/arena/heat/schedule")
+        assert response.status_code == 200
+        assert "max-age=" in response.headers.get("Cache-Control", "")
+        print(f"✓ Cache-Control: {response.headers['Cache-Control']}")
+
+    def test_schedule_agrees_with_current_event(self):
+        current = requests.get(f"{BASE_URL}/api/arena/heat").json()
+        schedule = requests.get(f"{BASE_URL}/api/arena/heat/schedule").json()
+        slot = next((s for s in schedule["events"] if s["started_at"] == current["started_at"]), None)
+        if slot is None:
+            pytest.skip("Arena day rolled over between requests")
+        assert slot["event"]["id"] == current["event"]["id"]
+        print("✓ Schedule and /arena/heat agree")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,84 @@
+"""
+Test file: In-process arena ranking
+Tests GET /api/arena/leaderboard and GET /api/arena/standing/{address}:
+- Leaderboard response shape unchanged, ranks sequential, points descending
+- Standing rank agrees with the leaderboard and neighbours are contiguous
+- Players who haven't joined get rank=None
+- Both endpoints respond quickly while polled
+"""
+
+import pytest
+import requests
+import os
+import time
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestArenaLeaderboard:
+    """Tests for GET /api/arena/leaderboard"""
+
+    def test_leaderboard_shape(self):
+        response = requests.get(f"{BASE_URL}/api/arena/leaderboard?limit=20")
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        data = response.json()
+        for field in ["arena", "top", "entries", "now"]:
+            assert field in data, f"Missing field '{field}'"
+        assert data["arena"]["status"] == "active"
+        print(f"✓ Arena leaderboard returns {len(data['entries'])} entries")
+
+    def test_leaderboard_ranks_sequential_and_sorted(self):
+        response = requests.get(f"{BASE_URL}/api/arena/leaderboard?limit=50")
+        assert response.status_code == 200
+        entries = response.json()["entries"]
+        for i, entry in enumerate(entries):
+            assert entry["rank"] == i + 1, f"Entry {i} should have rank {i + 1}, got {entry['rank']}"
+        points = [e["points"] for e in entries]
+        assert points == sorted(points, reverse=True), "Arena entries should be sorted by points descending"
+        print("✓ Ranks sequential and points descending")
+
+    def test_leaderboard_polling_fast(self):
+        timings = []
+        for _ in range(5):
+            start = time.time()
+            response = requests.get(f"{BASE_URL}/api/arena/leaderboard?limit=50")
+            timings.append(time.time() - start)
+            assert response.status_code == 200
+        assert max(timings[1:]) < 1.0, f"Polling took up to {max(timings[1:]):.2f}s, expected < 1s"
+        print(f"✓ Arena leaderboard polls in {min(timings):.3f}-{max(timings):.3f}s")
+
+
+class TestArenaStanding:
+    """Tests for GET /api/arena/standing/{address}"""
+
+    def _last_entry(self):
+        response = requests.get(f"{BASE_URL}/api/arena/leaderboard?limit=5")
+        assert response.status_code == 200
+        entries = response.json()["entries"]
+        if not entries:
+            pytest.skip("Arena has no entries")
+        return entries[-1]
+
+    def test_standing_matches_leaderboard(self):
+        entry = self._last_entry()
+        response = requests.get(f"{BASE_URL}/api/arena/standing/{entry['player_address']}?radius=2")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["rank"] == entry["rank"]
+        ranks = [e["rank"] for e in data["around"]]
+        assert entry["rank"] in ranks
+        assert ranks == list(range(ranks[0], ranks[0] + len(ranks))), "Neighbour ranks should be contiguous"
+        assert len(ranks) <= 5
+        print(f"✓ Standing rank {data['rank']} of {data['total']}, around {ranks}")
+
+    def test_standing_unknown_player(self):
+        response = requests.get(f"{BASE_URL}/api/arena/standing/0xNOT_IN_ARENA_{int(time.time())}")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["rank"] is None
+        assert data["around"] == []
+        print("✓ Player outside the arena gets rank=None")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
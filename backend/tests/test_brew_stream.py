@@ -0,0 +1,49 @@
+"""
+Test file: Brewing timer stream (SSE)
+Tests GET /api/treats/{address}/stream:
+- Responds with text/event-stream
+- First event is a `snapshot` with the same shape as /treats/{address}/active
+"""
+
+import json
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+TEST_ADDRESS = "test_brew_stream_player"
+
+
+def _read_first_event(response):
+    event, data = None, []
+    for line in response.iter_lines(decode_unicode=True):
+        if line.startswith("event:"):
+            event = line.split(":", 1)[1].strip()
+        elif line.startswith("data:"):
+            data.append(line.split(":", 1)[1].strip())
+        elif line == "" and event:
+            return event, json.loads("".join(data))
+    return event, None
+
+
+class TestBrewStream:
+    """Tests for GET /api/treats/{address}/stream"""
+
+    def test_stream_content_type(self):
+        with requests.get(f"{BASE_URL}/api/treats/{TEST_ADDRESS}/stream", stream=True, timeout=10) as response:
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+        print("✓ Stream served as text/event-stream")
+
+    def test_stream_starts_with_snapshot(self):
+        with requests.get(f"{BASE_URL}/api/treats/{TEST_ADDRESS}/stream", stream=True, timeout=10) as response:
+            event, data = _read_first_event(response)
+        assert event == "snapshot", f"Expected snapshot first, got {event}"
+        for field in ("treats", "server_time", "count"):
+            assert field in data, f"Snapshot missing '{field}'"
+        assert data["count"] == len(data["treats"])
+        print(f"✓ Snapshot with {data['count']} treats")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
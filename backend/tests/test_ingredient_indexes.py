@@ -0,0 +1,83 @@
+"""
+Test file: Precomputed ingredient indexes
+Tests GET /api/ingredients/unlocked/{level}, GET /api/ingredients and
+POST /api/ingredients/validate-recipe:
+- Unlocked/locked counts partition the catalog at every level
+- /ingredients?level= and /ingredients/unlocked/{level} list the same ingredients
+- Out-of-range levels (0, 999) answer with empty / full unlocks
+- Recipe validation doesn't depend on ingredient order
+"""
+
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestUnlockedIngredients:
+    """Tests for GET /api/ingredients/unlocked/{level} and GET /api/ingredients"""
+
+    def _catalog_size(self):
+        response = requests.get(f"{BASE_URL}/api/ingredients/catalog")
+        assert response.status_code == 200
+        return response.json()["total_ingredients"]
+
+    def test_counts_partition_catalog(self):
+        total = self._catalog_size()
+        previous = -1
+        for level in [1, 10, 25, 50]:
+            response = requests.get(f"{BASE_URL}/api/ingredients/unlocked/{level}")
+            assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+            data = response.json()
+            assert data["player_level"] == level
+            assert data["unlocked_count"] + data["locked_count"] == total
+            assert data["unlocked_count"] == len(data["ingredients"])
+            assert data["unlocked_count"] >= previous, "Unlocks should only grow with level"
+            assert all(ing["unlock_level"] <= level for ing in data["ingredients"])
+            previous = data["unlocked_count"]
+        print(f"✓ Unlocked/locked counts partition {total} ingredients")
+
+    def test_frontend_list_matches_unlocked(self):
+        for level in [1, 20, 50]:
+            unlocked = requests.get(f"{BASE_URL}/api/ingredients/unlocked/{level}").json()
+            response = requests.get(f"{BASE_URL}/api/ingredients?level={level}")
+            assert response.status_code == 200
+            data = response.json()
+            assert data["level"] == level
+            assert "heat_event_id" in data and "heat_event" in data
+            assert [i["id"] for i in data["ingredients"]] == [i["id"] for i in unlocked["ingredients"]]
+        print("✓ /ingredients and /ingredients/unlocked agree")
+
+    def test_out_of_range_levels(self):
+        total = self._catalog_size()
+        low = requests.get(f"{BASE_URL}/api/ingredients/unlocked/0").json()
+        high = requests.get(f"{BASE_URL}/api/ingredients/unlocked/999").json()
+        assert low["player_level"] == 0 and low["unlocked_count"] == 0
+        assert high["player_level"] == 999 and high["unlocked_count"] == total
+        assert high["next_unlocks"] == []
+        print("✓ Levels 0 and 999 handled")
+
+
+class TestValidateRecipe:
+    """Tests for POST /api/ingredients/validate-recipe"""
+
+    def test_order_independent(self):
+        recipe = ["S2_050", "S2_041", "S2_045", "S2_047", "S2_040"]
+        results = []
+        for ingredients in (recipe, list(reversed(recipe))):
+            response = requests.post(
+                f"{BASE_URL}/api/ingredients/validate-recipe?player_level=50",
+                json=ingredients,
+            )
+            assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+            results.append(response.json())
+        forward, backward = results
+        for field in ["rarity_modifier", "has_mythic_catalyst", "has_legendary_gate", "possible_rarities"]:
+            assert forward[field] == backward[field], f"{field} differs with ingredient order"
+        assert sorted(forward["special_effects"]) == sorted(backward["special_effects"])
+        print(f"✓ Recipe profile order-independent: modifier {forward['rarity_modifier']}")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
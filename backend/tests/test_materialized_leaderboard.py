@@ -0,0 +1,122 @@
+"""
+Test file: Materialized leaderboard (leaderboard_entries)
+Tests GET /api/leaderboard now served from the pre-ranked view:
+- Response shape unchanged for the frontend
+- Ranks sequential, points descending, limit respected
+- No duplicate Telegram identities (tg_/TG_/telegram_id docs collapsed)
+- Endpoint responds under 2 seconds
+- Rank lookups (lab-estimate, leaderboard/around) agree with the list
+"""
+
+import pytest
+import requests
+import os
+import time
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestMaterializedLeaderboard:
+    """Tests for GET /api/leaderboard"""
+
+    def test_leaderboard_returns_list(self):
+        response = requests.get(f"{BASE_URL}/api/leaderboard?limit=20")
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        assert isinstance(response.json(), list)
+        print(f"✓ Leaderboard returns {len(response.json())} entries")
+
+    def test_leaderboard_entry_fields(self):
+        response = requests.get(f"{BASE_URL}/api/leaderboard?limit=20")
+        assert response.status_code == 200
+        required_fields = ["address", "nickname", "points", "level", "is_nft_holder",
+                           "is_dogeonews_holder", "is_vip", "rank", "selected_character",
+                           "character_name", "character_image"]
+        for i, entry in enumerate(response.json()):
+            for field in required_fields:
+                assert field in entry, f"Entry {i} missing required field '{field}'"
+        print("✓ All entries keep the original response shape")
+
+    def test_leaderboard_ranks_sequential_and_sorted(self):
+        response = requests.get(f"{BASE_URL}/api/leaderboard?limit=50")
+        assert response.status_code == 200
+        data = response.json()
+        for i, entry in enumerate(data):
+            assert entry["rank"] == i + 1, f"Entry {i} should have rank {i + 1}, got {entry['rank']}"
+        points = [entry["points"] for entry in data]
+        assert points == sorted(points, reverse=True), "Leaderboard should be sorted by points descending"
+        print("✓ Ranks sequential and points descending")
+
+    def test_leaderboard_limit_respected(self):
+        response = requests.get(f"{BASE_URL}/api/leaderboard?limit=3")
+        assert response.status_code == 200
+        assert len(response.json()) <= 3
+        print(f"✓ Limit respected (got {len(response.json())})")
+
+    def test_leaderboard_no_duplicate_telegram_identities(self):
+        response = requests.get(f"{BASE_URL}/api/leaderboard?limit=200")
+        assert response.status_code == 200
+        tg_keys = [e["address"].lower() for e in response.json() if e["address"].lower().startswith("tg_")]
+        assert len(tg_keys) == len(set(tg_keys)), "Telegram identities should appear once"
+        print(f"✓ {len(tg_keys)} Telegram entries, no duplicates")
+
+    def test_leaderboard_performance_under_2s(self):
+        start = time.time()
+        response = requests.get(f"{BASE_URL}/api/leaderboard?limit=200")
+        elapsed = time.time() - start
+        assert response.status_code == 200
+        assert elapsed < 2.0, f"Leaderboard took {elapsed:.2f}s, expected < 2s"
+        print(f"✓ Leaderboard responded in {elapsed:.3f}s")
+
+
+class TestLeaderboardRankLookup:
+    """Tests for GET /api/player/{address}/lab-estimate and /api/leaderboard/around/{address}"""
+
+    def _top_entry(self):
+        response = requests.get(f"{BASE_URL}/api/leaderboard?limit=5")
+        assert response.status_code == 200
+        data = response.json()
+        if not data:
+            pytest.skip("Leaderboard is empty")
+        return data[-1]
+
+    def test_lab_estimate_rank_matches_leaderboard(self):
+        entry = self._top_entry()
+        response = requests.get(f"{BASE_URL}/api/player/{entry['address']}/lab-estimate")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["rank"] == entry["rank"], f"Expected rank {entry['rank']}, got {data['rank']}"
+        assert data["in_reward_range"] == (entry["rank"] <= 50)
+        print(f"✓ lab-estimate rank {data['rank']} matches the leaderboard")
+
+    def test_lab_estimate_unknown_player_has_no_rank(self):
+        response = requests.get(f"{BASE_URL}/api/player/test_no_such_player_rank/lab-estimate")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["rank"] is None
+        assert data["rank_based_lab"] == 0
+        print("✓ Unknown player gets rank=None")
+
+    def test_leaderboard_around_player(self):
+        entry = self._top_entry()
+        response = requests.get(f"{BASE_URL}/api/leaderboard/around/{entry['address']}?radius=2")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["rank"] == entry["rank"]
+        ranks = [e["rank"] for e in data["entries"]]
+        assert entry["rank"] in ranks
+        assert ranks == list(range(ranks[0], ranks[0] + len(ranks))), "Neighbour ranks should be contiguous"
+        assert len(ranks) <= 5
+        print(f"✓ around returned ranks {ranks}")
+
+    def test_lab_estimate_performance_under_1s(self):
+        entry = self._top_entry()
+        start = time.time()
+        response = requests.get(f"{BASE_URL}/api/player/{entry['address']}/lab-estimate")
+        elapsed = time.time() - start
+        assert response.status_code == 200
+        assert elapsed < 1.0, f"lab-estimate took {elapsed:.2f}s, expected < 1s"
+        print(f"✓ lab-estimate responded in {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,88 @@
+"""
+Test file: Player identity index
+Tests POST /api/players/telegram-register against legacy Telegram docs:
+- A Telegram user with a legacy TG_<id> doc holding points keeps those
+  points after registering, under every address spelling
+- Holds whether or not the legacy doc's alias was already resolved
+"""
+
+import pytest
+import requests
+import os
+import time
+import json
+import hmac
+import hashlib
+import random
+import urllib.parse
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN', '')
+
+LEGACY_POINTS = 1234
+
+
+def _init_data(telegram_id: int) -> str:
+    """Telegram Mini App initData signed the way validate_telegram_data checks it."""
+    data = {
+        "auth_date": str(int(time.time())),
+        "user": json.dumps({"id": telegram_id, "first_name": "Legacy", "username": f"legacy_{telegram_id}"}),
+    }
+    check_string = "\n".join(f"{k}={v}" for k, v in sorted(data.items()))
+    secret_key = hmac.new(b"WebAppData", BOT_TOKEN.encode(), hashlib.sha256).digest()
+    data["hash"] = hmac.new(secret_key, check_string.encode(), hashlib.sha256).hexdigest()
+    return urllib.parse.urlencode(data)
+
+
+def _create_legacy_player(telegram_id: int) -> str:
+    address = f"TG_{telegram_id}"
+    response = requests.post(f"{BASE_URL}/api/player", json={"address": address, "nickname": "Legacy"})
+    assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+    response = requests.post(f"{BASE_URL}/api/player/progress", json={
+        "address": address, "experience": 0, "points": LEGACY_POINTS, "level": 1,
+    })
+    assert response.status_code == 200
+    return address
+
+
+def _points(address: str) -> int:
+    response = requests.get(f"{BASE_URL}/api/player/{address}")
+    assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+    return response.json()["points"]
+
+
+class TestTelegramRegisterWithLegacyDoc:
+    """Tests for POST /api/players/telegram-register"""
+
+    def setup_method(self):
+        if not BOT_TOKEN:
+            pytest.skip("TELEGRAM_BOT_TOKEN not set")
+
+    def _register(self, telegram_id: int):
+        response = requests.post(
+            f"{BASE_URL}/api/players/telegram-register",
+            json={"initData": _init_data(telegram_id)},
+        )
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+
+    def test_legacy_points_survive_registration(self):
+        telegram_id = random.randint(10**12, 10**13)
+        _create_legacy_player(telegram_id)
+        self._register(telegram_id)
+        for address in [f"TG_{telegram_id}", f"tg_{telegram_id}"]:
+            assert _points(address) == LEGACY_POINTS, f"{address} lost the legacy doc's points"
+        print(f"✓ Legacy TG_{telegram_id} points kept after registration")
+
+    def test_resolved_alias_not_repointed(self):
+        telegram_id = random.randint(10**12, 10**13)
+        address = _create_legacy_player(telegram_id)
+        # Resolve first so the alias already points at the legacy doc
+        assert _points(address) == LEGACY_POINTS
+        self._register(telegram_id)
+        assert _points(address) == LEGACY_POINTS
+        assert _points(f"tg_{telegram_id}") == LEGACY_POINTS
+        print(f"✓ Existing alias for TG_{telegram_id} not repointed at the new doc")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,96 @@
+"""
+Test file: Vectorized treat economics simulator
+Tests POST /api/game/simulate-economy (admin):
+- Requires the admin key
+- Base rarity odds for a 5-ingredient recipe match the published table
+- Ingredient-count gates hold (2 ingredients never roll Rare+)
+- Season totals are consistent with per-player-day expectations
+- A million-treat scenario returns within seconds
+"""
+
+import pytest
+import requests
+import os
+import time
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+ADMIN_KEY = os.environ.get('ADMIN_SECRET', '')
+
+FIVE_INGREDIENTS = ["chicken", "rice", "carrot", "pumpkin", "beef"]
+
+
+def _simulate(payload, admin_key=ADMIN_KEY):
+    return requests.post(
+        f"{BASE_URL}/api/game/simulate-economy",
+        json=payload,
+        headers={"X-Admin-Key": admin_key},
+        timeout=60,
+    )
+
+
+class TestSimulateEconomy:
+    """Tests for POST /api/game/simulate-economy"""
+
+    def setup_method(self):
+        if not ADMIN_KEY:
+            pytest.skip("ADMIN_SECRET not set")
+
+    def test_requires_admin(self):
+        response = _simulate({"recipes": [FIVE_INGREDIENTS]}, admin_key="wrong_key_12345")
+        assert response.status_code == 403
+        print("✓ Simulation rejected without a valid admin key")
+
+    def test_base_odds_match_rarity_table(self):
+        response = _simulate({
+            "recipes": [FIVE_INGREDIENTS], "players": 1, "days": 1,
+            "treats_per_day": 1_000_000, "heat_event_id": "idle_calm", "seed": 7,
+        })
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        dist = response.json()["rarity_distribution"]
+        expected = {"Common": 45.0, "Uncommon": 30.0, "Rare": 15.0, "Epic": 7.0, "Legendary": 2.5, "Mythic": 0.5}
+        for rarity, pct in expected.items():
+            assert abs(dist[rarity]["percent"] - pct) < 0.3, f"{rarity}: {dist[rarity]['percent']}% vs {pct}%"
+        print(f"✓ Rarity odds: {({k: v['percent'] for k, v in dist.items()})}")
+
+    def test_two_ingredients_never_rare(self):
+        response = _simulate({
+            "recipes": [["chicken", "rice"]], "players": 10, "days": 10, "seed": 7,
+        })
+        assert response.status_code == 200
+        dist = response.json()["rarity_distribution"]
+        for rarity in ["Rare", "Epic", "Legendary", "Mythic"]:
+            assert dist[rarity]["count"] == 0, f"2-ingredient treats should never be {rarity}"
+        print("✓ Ingredient-count gates respected")
+
+    def test_season_totals_consistent(self):
+        response = _simulate({
+            "recipes": [FIVE_INGREDIENTS, ["chocolate", "honey", "milk", "strawberry"]],
+            "players": 200, "days": 30, "streak_days": 7, "starting_supply": 1_000_000, "seed": 7,
+        })
+        assert response.status_code == 200
+        data = response.json()
+        scenario = data["scenario"]
+        assert data["treats_simulated"] == scenario["players"] * scenario["days"] * scenario["treats_per_day"]
+        per_day = data["per_player_day"]["points"]
+        minted = data["season"]["points_minted"]
+        assert abs(minted - per_day * scenario["players"] * scenario["days"]) <= scenario["players"] * scenario["days"]
+        assert data["season"]["inflation_percent"] == pytest.approx(100 * minted / 1_000_000, rel=1e-3)
+        print(f"✓ {per_day} points per player-day, {minted:,} minted")
+
+    def test_rejects_single_ingredient_recipe(self):
+        response = _simulate({"recipes": [["chicken"]]})
+        assert response.status_code == 400
+        print("✓ Single-ingredient recipe rejected")
+
+    def test_million_treats_fast(self):
+        start = time.time()
+        response = _simulate({"recipes": [FIVE_INGREDIENTS], "players": 1000, "days": 60, "seed": 7})
+        elapsed = time.time() - start
+        assert response.status_code == 200
+        assert response.json()["treats_simulated"] >= 900_000
+        assert elapsed < 10.0, f"Simulation took {elapsed:.2f}s, expected < 10s"
+        print(f"✓ {response.json()['treats_simulated']:,} treats simulated in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])